@@ -0,0 +1,266 @@
+"""
+数据生成性能基准：对 db_stats.json 以及合成的宽表、深依赖链 schema 运行生成引擎，
+统计每种列类型、每张表和端到端的生成速度（行/秒）以及峰值内存（RSS），结果写为 JSON，便于在提交之间比较。
+
+用法：
+    python -m benchmark.bench_generation --records 5000 --output benchmark_results.json
+    python -m benchmark.bench_generation --compare old_results.json --output new_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+# 合成 schema 中各类列的模板
+SYNTHETIC_COLUMNS = [
+    {"type": "integer", "stats": {"min": 1.0, "max": 1000000.0}},
+    {"type": "bigint", "stats": {"min": 1.0, "max": 1e12}},
+    {"type": "numeric", "stats": {"min": 0.5, "max": 999.99}},
+    {"type": "double precision", "stats": {"min": 0.0, "max": 1.0}},
+    {"type": "character varying", "stats": {"A": 0.5, "B": 0.3, "C": 0.15, "D": 0.05}},
+    {"type": "text", "stats": {"min_length": 8, "max_length": 8}},
+    {"type": "date", "stats": {"min_date": "2015-01-01", "max_date": "2024-12-31"}, "sample_data": ["2020-05-06"]},
+    {"type": "timestamp without time zone", "stats": {"min_date": "2015-01-01 00:00:00",
+                                                      "max_date": "2024-12-31 23:59:59"},
+     "sample_data": ["2020-05-06 10:11:12"]},
+    {"type": "date", "stats": {"min_date": "2015-01-01", "max_date": "2024-12-31"}, "sample_data": ["2020年05月06日"]},
+    {"type": "boolean", "stats": {}},
+    {"type": "name", "stats": {"note": "Type specified in config.yaml"}},
+    {"type": "address", "stats": {"note": "Type specified in config.yaml"}},
+    {"type": "phone_number", "stats": {"note": "Type specified in config.yaml"}},
+]
+
+
+def make_column(name, template, **extra):
+    column = {"name": name, "type": template["type"], "stats": dict(template["stats"]), "null_rate": 0.0,
+              "sample_data": list(template.get("sample_data", [])), "is_primary_key": False, "foreign_key": None,
+              "is_unique": False}
+    column.update(extra)
+    return column
+
+
+def wide_schema(width=300):
+    """一张 width 列的宽表，列类型按 SYNTHETIC_COLUMNS 轮流分配"""
+    columns = [make_column("id", {"type": "bigint", "stats": {"min": 1.0, "max": 1e9}}, is_primary_key=True)]
+    columns += [make_column(f"c{i:04d}", SYNTHETIC_COLUMNS[i % len(SYNTHETIC_COLUMNS)]) for i in range(width - 1)]
+    return {"wide_table": {"is_codetable": False, "table_stats": {"total_rows": 1000, "total_columns": width},
+                           "dependency": {"dep_table": "", "dep_relation": "", "dependencies": {}},
+                           "columns": columns}}
+
+
+def deep_schema(depth=6, width=12):
+    """depth 层的依赖链，每层按 1:3 关联上一层，并带一个引用根表的外键"""
+    db_stats = {}
+    for level in range(depth):
+        table = f"level_{level}"
+        columns = [make_column("id", {"type": "integer", "stats": {"min": 1.0, "max": 1e6}}, is_primary_key=True),
+                   make_column("parent_id", {"type": "integer", "stats": {"min": 1.0, "max": 1e6}})]
+        columns += [make_column(f"c{i:02d}", SYNTHETIC_COLUMNS[(i + level) % len(SYNTHETIC_COLUMNS)])
+                    for i in range(width)]
+        dependency = {"dep_table": "", "dep_relation": "", "dependencies": {}}
+        if level > 0:
+            dependency = {"dep_table": f"level_{level - 1}", "dep_relation": "1:3",
+                          "dependencies": {"parent_id": {"field": "id", "func": ""}}}
+            columns.append(make_column("root_id", {"type": "integer", "stats": {}},
+                                       foreign_key={"foreign_table_name": "level_0", "foreign_column_name": "id"}))
+        db_stats[table] = {"is_codetable": False, "table_stats": {"total_rows": 1000 * 2 ** level},
+                           "dependency": dependency, "columns": columns}
+    return db_stats
+
+
+def load_schema(name, stats_file):
+    if name == "db_stats":
+        with open(stats_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if name == "wide":
+        return wide_schema()
+    if name == "deep":
+        return deep_schema()
+    raise ValueError(f"未知的 schema: {name}")
+
+
+def column_types(db_stats):
+    """{表名: {列类型: 列数}}，依赖列与生成引擎的计时一致，计入 DEPENDENCY_COLUMN_TYPE"""
+    from tools.GenerationMetrics import DEPENDENCY_COLUMN_TYPE
+
+    result = {}
+    for table, table_info in db_stats.items():
+        if table_info.get('is_codetable', False):
+            continue
+        dependency = table_info.get('dependency', {})
+        dependencies = dependency.get('dependencies', {}) if dependency.get('dep_table') else {}
+        counts = result.setdefault(table, {})
+        for column in table_info.get('columns', []):
+            column_type = DEPENDENCY_COLUMN_TYPE if column['name'] in dependencies else column['type']
+            counts[column_type] = counts.get(column_type, 0) + 1
+    return result
+
+
+def rate(rows, seconds):
+    return rows / seconds if seconds > 0 else None
+
+
+def bench_engine(db_stats, mode, num_records, seed, workers):
+    """端到端运行生成引擎，返回耗时、每张表和每种列类型的生成速度"""
+    from gen_data_by_stats import build_dependency_graph, topological_sort, generate_column_store, generate_data
+    from tools.GenerationMetrics import GenerationMetrics
+
+    sorted_tables = topological_sort(build_dependency_graph(db_stats))
+    metrics = GenerationMetrics(num_records, report_interval=None)
+    start = time.perf_counter()
+    if mode == "columnar":
+        generate_column_store(db_stats, sorted_tables, num_records, seed, workers, metrics)
+    else:
+        generate_data(db_stats, sorted_tables, num_records, metrics)
+    elapsed = time.perf_counter() - start
+    snapshot = metrics.snapshot()
+
+    tables = {}
+    type_rows = {}
+    for table, counters in snapshot["tables"].items():
+        seconds = snapshot["table_seconds"].get(table, 0.0)
+        tables[table] = {"rows": counters["rows"], "seconds": seconds,
+                         "rows_per_second": rate(counters["rows"], seconds)}
+        for column_type, count in column_types(db_stats).get(table, {}).items():
+            type_rows[column_type] = type_rows.get(column_type, 0) + counters["rows"] * count
+    # 每种列类型按生成的单元格数计算速度，多个同类型列的耗时已合计在 column_seconds 中
+    types = {column_type: {"cells": cells, "seconds": snapshot["column_seconds"].get(column_type, 0.0),
+                           "cells_per_second": rate(cells, snapshot["column_seconds"].get(column_type, 0.0))}
+             for column_type, cells in type_rows.items()}
+    rows = snapshot["rows"]
+    return {"seconds": elapsed, "rows": rows, "rows_per_second": rate(rows, elapsed), "tables": tables,
+            "column_types": types}
+
+
+def bench_generators(db_stats, num_rows, seed):
+    """单独测量每个编译后的列生成器一次生成 num_rows 个值的速度，按列类型汇总"""
+    from gen_data_by_stats import build_dependency_graph, topological_sort, compile_generation_plan, \
+        load_code_tables
+
+    sorted_tables = topological_sort(build_dependency_graph(db_stats))
+    plan = compile_generation_plan(db_stats, sorted_tables, load_code_tables(db_stats, sorted_tables))
+    rng = np.random.default_rng(seed)
+    types = {}
+    for table, table_plan in plan.items():
+        for column, generator in zip(db_stats[table]['columns'], table_plan.columns):
+            if generator is None:
+                continue
+            start = time.perf_counter()
+            generator.batch(num_rows, rng)
+            seconds = time.perf_counter() - start
+            stats = types.setdefault(column['type'], {"cells": 0, "seconds": 0.0})
+            stats["cells"] += num_rows
+            stats["seconds"] += seconds
+    for stats in types.values():
+        stats["cells_per_second"] = rate(stats["cells"], stats["seconds"])
+    return types
+
+
+def run_scenario(scenario):
+    """在独立的子进程中运行一个场景，峰值 RSS 只包含该场景"""
+    db_stats = load_schema(scenario["schema"], scenario["stats_file"])
+    if scenario["mode"] == "generators":
+        result = {"column_types": bench_generators(db_stats, scenario["records"], scenario["seed"])}
+    else:
+        result = bench_engine(db_stats, scenario["mode"], scenario["records"], scenario["seed"], scenario["workers"])
+    # Linux 上 ru_maxrss 的单位为 KB。workers > 1 时分片在子进程中生成，RUSAGE_CHILDREN 是已结束的子进程中
+    # 最大的峰值 RSS；两者之和是该场景同时占用内存的上界
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result["peak_rss_children_mb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    result["peak_rss_total_mb"] = result["peak_rss_mb"] + result["peak_rss_children_mb"]
+    return {**{key: scenario[key] for key in ("schema", "mode", "records", "workers")}, **result}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_key(result):
+    return f"{result['schema']}/{result['mode']}/{result['records']}/{result['workers']}"
+
+
+def peak_rss_total(result):
+    """场景的峰值内存（主进程与子进程之和）；之前的结果中没有子进程的峰值时只有主进程"""
+    return result.get("peak_rss_total_mb", result["peak_rss_mb"])
+
+
+def compare(previous, current):
+    """输出与之前结果相比端到端速度和峰值内存的变化"""
+    previous_results = {scenario_key(result): result for result in previous["results"]}
+    print(f"\n与 {previous.get('commit')} 比较：")
+    for result in current["results"]:
+        old = previous_results.get(scenario_key(result))
+        if old is None:
+            continue
+        speed = None
+        if result.get("rows_per_second") and old.get("rows_per_second"):
+            speed = result["rows_per_second"] / old["rows_per_second"]
+        print(f"  {scenario_key(result)}: 速度 {'-' if speed is None else f'{speed:.2f}x'}，"
+              f"峰值内存 {peak_rss_total(old):.0f} MB -> {peak_rss_total(result):.0f} MB")
+
+
+def print_summary(results):
+    for result in results:
+        print(f"\n[{scenario_key(result)}] 峰值内存 {peak_rss_total(result):.0f} MB"
+              f"（主进程 {result['peak_rss_mb']:.0f} MB，子进程 {result['peak_rss_children_mb']:.0f} MB）")
+        if "rows_per_second" in result:
+            print(f"  端到端: {result['rows']} 行，{result['seconds']:.2f} 秒，{result['rows_per_second']:.0f} 行/秒")
+        for column_type, stats in sorted(result["column_types"].items(),
+                                         key=lambda item: item[1]["cells_per_second"] or 0):
+            speed = stats["cells_per_second"]
+            print(f"  {column_type:<30} {'-' if speed is None else f'{speed:,.0f}'} 值/秒")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数据生成性能基准")
+    parser.add_argument("--schemas", default="db_stats,wide,deep", help="逗号分隔：db_stats、wide、deep")
+    parser.add_argument("--modes", default="columnar,generators",
+                        help="逗号分隔：columnar（列式端到端）、row（逐行端到端）、generators（单列生成器）")
+    parser.add_argument("--records", type=int, default=5000, help="根记录数；generators 模式下为每列生成的值个数")
+    parser.add_argument("--row-records", type=int, default=200, help="row 模式的根记录数（逐行模式较慢）")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--stats-file", default="db_stats.json")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="之前的结果文件，输出速度和内存的变化")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        {"schema": schema, "mode": mode, "records": args.row_records if mode == "row" else args.records,
+         "workers": args.workers if mode == "columnar" else 1, "seed": args.seed,
+         "stats_file": os.path.abspath(args.stats_file)}
+        for schema in args.schemas.split(",") for mode in args.modes.split(",")
+    ]
+    results = []
+    for scenario in scenarios:
+        # 每个场景使用新的进程，避免之前场景的内存占用影响峰值 RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results.append(executor.submit(run_scenario, scenario).result())
+
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": sys.version.split()[0], "platform": platform.platform(), "cpu_count": os.cpu_count(),
+              "results": results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print_summary(results)
+    print(f"\n结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from streamlit_ace import st_ace
 from gen_data_by_stats import gen_data_by_stats
 from get_db_statistic import get_db_statistic
 from save_data_to_db import save_data_to_db
+from tools.GenerationMetrics import GenerationMetrics
 from tools.ParquetExporter import ParquetExporter
 from tools.TableDependence import TableConfigurator
 from tools.import_excel_to_postgres import excel_to_db
@@ -24,6 +25,9 @@ with open('style.css', encoding='utf-8') as f:
 
 st.title("🚀 数据孪生应用")
 
+# 列式生成的数据每张表预览的行数
+PREVIEW_ROWS = 100
+
 
 # Function to load configuration
 def load_config(file_path):
@@ -72,6 +76,9 @@ drop_existing = st.sidebar.checkbox("删除现有表", value=True)
 # Add row_num input to the sidebar
 row_num = st.sidebar.number_input("最小生成行数", min_value=0, value=None, step=1, help="每张表生成的最小行数,留空则使用默认逻辑")
 
+# 列式批量生成：每列一次性生成所有值，速度更快
+columnar = st.sidebar.checkbox("列式批量生成", value=False)
+
 if selected_config:
     config = load_config(selected_config)
 
@@ -136,6 +143,10 @@ if selected_config:
         config['codetables'] = yaml.safe_load(codetables)
         config['specified_columns'] = df_to_specified_columns(edited_df)
 
+        # 默认只重新统计有变化的表
+        force_profile = st.checkbox("重新统计所有表", value=False,
+                                    help="不勾选时，与上次统计相比没有变化的表沿用 db_stats.json 中的统计信息")
+
         # Buttons for actions
         col1, col2, col3, col4 = st.columns(4)
 
@@ -146,7 +157,7 @@ if selected_config:
 
             try:
                 # Call get_db_statistic with the temporary config file
-                get_db_statistic(temp_config_file)
+                get_db_statistic(temp_config_file, force=force_profile)
 
                 # Check if db_stats.json was created
                 if os.path.exists('db_stats.json'):
@@ -194,17 +205,48 @@ if selected_config:
 
         if col2.button("生成数据"):
             try:
-                generated_data = gen_data_by_stats(stats_file='db_stats.json', num_records=row_num)
+                progress_bar = st.progress(0.0, text="正在生成数据...")
+                metrics = GenerationMetrics(
+                    report_interval=1.0,
+                    callback=lambda snapshot: progress_bar.progress(
+                        snapshot["progress"],
+                        text=f"已生成 {snapshot['rows']} 行，{snapshot['rows_per_second']:.0f} 行/秒"))
+                generated_data = gen_data_by_stats(stats_file='db_stats.json', num_records=row_num, columnar=columnar,
+                                                   metrics=metrics, as_store=columnar)
+                # 列式生成的数据保留在会话中，存入数据库和导出 Parquet 时直接使用；
+                # 保存 JSON 时逐个数据块转换，不在内存中构造整个记录字典
+                if columnar:
+                    st.session_state.generated_store = generated_data
+                    with open('generated_data.json', 'w', encoding='utf-8') as f:
+                        generated_data.write_json(f)
+                else:
+                    st.session_state.pop('generated_store', None)
 
-                # Save generated data to JSON file
-                with open('generated_data.json', 'w', encoding='utf-8') as f:
-                    json.dump(generated_data, f, ensure_ascii=False, indent=4)
+                    # Save generated data to JSON file
+                    with open('generated_data.json', 'w', encoding='utf-8') as f:
+                        json.dump(generated_data, f, ensure_ascii=False, indent=4)
 
                 st.success("数据已生成并保存到 generated_data.json")
 
+                # Display generation metrics
+                snapshot = metrics.snapshot()
+                st.subheader("生成统计")
+                st.dataframe(pd.DataFrame.from_dict(snapshot["tables"], orient="index"), use_container_width=True)
+                st.caption(f"共生成 {snapshot['rows']} 行，耗时 {snapshot['elapsed']:.1f} 秒，"
+                           f"{snapshot['rows_per_second']:.0f} 行/秒")
+
                 # Display generated data
                 st.subheader("生成的数据")
-                st.json(generated_data)
+                if columnar:
+                    # 每张表只预览前几行
+                    for table in generated_data.tables():
+                        st.caption(f"{table}：共 {generated_data.num_rows(table)} 行，显示前 {PREVIEW_ROWS} 行")
+                        st.dataframe(generated_data.head(table, PREVIEW_ROWS), use_container_width=True)
+                else:
+                    st.json(generated_data)
+                with open('generated_data.json', 'rb') as f:
+                    st.download_button("下载 generated_data.json", f, file_name="generated_data.json",
+                                       mime="application/json")
 
             except Exception as e:
                 st.error(f"生成数据时发生错误: {str(e)}")
@@ -218,7 +260,8 @@ if selected_config:
                         source_config=config['source_database'],
                         target_config=config['target_database'],
                         data_file='generated_data.json',
-                        drop_existing_tables=drop_existing
+                        drop_existing_tables=drop_existing,
+                        store=st.session_state.get('generated_store')
                     )
 
                 # 获取捕获的输出
@@ -240,9 +283,9 @@ if selected_config:
 
         if col4.button("📊 导出为Parquet"):
             json_file_path = os.path.join(os.getcwd(), "generated_data.json")
-            downloader = ParquetExporter(json_file_path=json_file_path)
+            downloader = ParquetExporter(json_file_path=json_file_path, store=st.session_state.get('generated_store'))
 
-            if downloader.load_json():
+            if downloader.store is not None or downloader.load_json():
                 with st.spinner("🔄 正在打包所有子表为 ZIP 文件..."):
                     downloader.download_zip_button(file_name="all_tables_exported.zip")
             else:
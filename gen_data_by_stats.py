@@ -1,16 +1,36 @@
 import json
+import os
 import re
 import random
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import Counter, namedtuple
+import uuid
+import zlib
 import networkx as nx
+import numpy as np
 from faker import Faker
 import logging
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
 from data_gen import generate_data_with_llm
+from tools.KeyAllocator import KeyAllocator
+from tools.AliasSampler import AliasSampler
+from tools.ColumnStore import ColumnStore
+from tools.DateTimeFormatter import DateTimeFormatter
+from tools.FakerValueBank import FakerValueBank
+from tools.GenerationMetrics import GenerationMetrics, DEPENDENCY_COLUMN_TYPE
+from tools.KeyPool import KeyPool
+from tools.ScalePlanner import plan_scale, report_scale_plan
+from tools.StreamWriter import StreamWriter
+from tools.TransformRegistry import registry as transform_registry
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 fake = Faker('zh_CN')
+# 常用 Faker provider 的取值库，缓存在项目根目录的 faker_cache 目录中
+faker_bank = FakerValueBank('zh_CN')
 
 
 def convert_to_date(input):
@@ -80,8 +100,9 @@ def build_dependency_graph(db_stats):
     for table, table_info in db_stats.items():
         G.add_node(table)
         # 检查表是否有依赖关系
-        if 'dependency' in table_info and 'dep_table' in table_info['dependency']:
-            dep_table = table_info['dependency']['dep_table']
+        # dep_table 为空字符串表示没有依赖表
+        dep_table = table_info.get('dependency', {}).get('dep_table')
+        if dep_table:
             G.add_edge(dep_table, table)
         # 检查列是否有外键关系
         for column in table_info.get('columns', []):
@@ -95,9 +116,14 @@ def topological_sort(G):
     return list(nx.topological_sort(G))
 
 
-def generate_data(db_stats, sorted_tables, num_records=10):
+def generate_data(db_stats, sorted_tables, num_records=10, metrics=None):
+    if metrics is None:
+        metrics = GenerationMetrics(num_records)
+    if not metrics.total_records:
+        metrics.total_records = num_records
     code_table_data = {}
-    unique_values = defaultdict(set)  # 用于跟踪唯一字段的值
+    key_allocators = {}  # 每个主键列一个键空间分配器
+    key_seed = random.getrandbits(63)
 
     # 先生成代码表数据
     print("加载代码表")
@@ -107,38 +133,42 @@ def generate_data(db_stats, sorted_tables, num_records=10):
             print(f"{table}，共 {len(code_table_data[table])} 条记录")
 
     all_data = code_table_data.copy()
+    plan = compile_generation_plan(db_stats, sorted_tables, code_table_data)
 
     print("\n加载非代码表")
     for _ in range(num_records):
-        print(f"第{_ + 1}条")
+        logger.debug("第%d条", _ + 1)
         current_record = code_table_data.copy()
         for table in sorted_tables:
             if not db_stats[table].get('is_codetable', False):
                 current_record[table] = []
                 # 非代码表生成数据
-                generate_table_data(db_stats, table, current_record, unique_values)
+                with metrics.time_table(table):
+                    generate_table_data(db_stats, table, current_record, key_allocators, plan, key_seed, metrics)
 
         # 将当前记录合并到 all_data, 要跳过 code_table_data 中的数据
         for table, data in current_record.items():
             if table not in code_table_data:
-                if table not in all_data:
-                    all_data[table] = []
-                all_data[table] = all_data[table] + data
+                all_data.setdefault(table, []).extend(data)
+        metrics.advance()
 
+    metrics.maybe_report(force=True)
     all_data = {k: v for k, v in all_data.items() if k not in code_table_data}
     return all_data
 
 
 """
-db_stats, table, current_record, unique_values
+db_stats, table, current_record, key_allocators
 """
 
 
-def generate_table_data(db_stats, table, all_data, unique_values):
+def generate_table_data(db_stats, table, all_data, key_allocators, plan=None, key_seed=0, metrics=None):
     table_info = db_stats[table]
     dependency = table_info.get('dependency', {})
     dep_table = dependency.get('dep_table')
-    print(f"表:{table}, 关联表:{dep_table}")
+    logger.debug("表:%s, 关联表:%s", table, dep_table)
+    if metrics is None:
+        metrics = GenerationMetrics()
 
     # del
     if dep_table:
@@ -148,44 +178,64 @@ def generate_table_data(db_stats, table, all_data, unique_values):
         # 依赖表的最后一条记录作为“父记录”
         parent_record = all_data[dep_table][-1]
 
-        # 从配置项中读取类似 "1:3" 的字符串，拆分为最小和最大记录数。
-        min_records, max_records = map(int, dependency['dep_relation'].split(':'))
         # 随机决定要生成多少条子记录。
-        num_records = random.randint(min_records, max_records)
-        print(f"随机生成{num_records}条子记录")
+        if plan:
+            num_records = plan[table].child_counts.one()
+        else:
+            num_records = compile_child_count_sampler(dependency).one()
+        logger.debug("随机生成%d条子记录", num_records)
 
         for _ in range(num_records):
-            record = generate_record(db_stats, table, parent_record, dependency, unique_values, all_data)
+            record = generate_record(db_stats, table, parent_record, dependency, key_allocators, all_data, plan,
+                                     key_seed, metrics)
             if record:
                 all_data[table].append(record)
+                metrics.add_rows(table)
+            else:
+                metrics.add_dropped(table)
     else:
         # 如果没有依赖表，生成一条记录
-        record = generate_record(db_stats, table, None, None, unique_values, all_data)
+        record = generate_record(db_stats, table, None, None, key_allocators, all_data, plan, key_seed, metrics)
         if record:
             all_data[table].append(record)
+            metrics.add_rows(table)
+        else:
+            metrics.add_dropped(table)
 
 
-def generate_record(db_stats, table, parent_record, dependency, unique_values, all_data):
+def generate_record(db_stats, table, parent_record, dependency, key_allocators, all_data, plan=None, key_seed=0,
+                    metrics=None):
     record = {}
     table_info = db_stats[table]
+    generators = plan[table].columns if plan else [None] * len(table_info['columns'])
 
-    for column in table_info['columns']:
+    for column, generator in zip(table_info['columns'], generators):
         column_name = column['name']
+        start = time.perf_counter()
+        column_type = column['type']
         # del
         if dependency and parent_record and column_name in dependency.get('dependencies', {}):
+            column_type = DEPENDENCY_COLUMN_TYPE
             dep_info = dependency['dependencies'][column_name]
             parent_field = dep_info['field']
-            func = dep_info['func']
-            if func:
-                # 执行自定义函数
-                value = eval(func)(parent_record[parent_field])
+            if dep_info.get('func'):
+                # 执行预编译的转换函数
+                if plan:
+                    transform = plan[table].transforms[column_name]
+                else:
+                    transform = transform_registry.compile(dep_info['func'])
+                value = transform.one(parent_record[parent_field])
             else:
                 # 父记录中关联字段的值，作为子记录字段的值
                 value = parent_record[parent_field]
-            print(f"字段:{column_name},关联字段:{parent_field},值:{value}")
+            logger.debug("字段:%s,关联字段:%s,值:%s", column_name, parent_field, value)
         else:
-            value = generate_column_data(table, column, unique_values, all_data)
+            value = generate_column_data(table, column, key_allocators, all_data, generator, key_seed)
+        if metrics is not None:
+            metrics.add_column_time(column_type, time.perf_counter() - start)
         if value is None:
+            if metrics is not None and column.get('is_primary_key', False):
+                metrics.add_pk_shortfall(table)
             return None  # 如果无法生成唯一值，则放弃整个记录
 
         record[column_name] = value
@@ -193,7 +243,7 @@ def generate_record(db_stats, table, parent_record, dependency, unique_values, a
     return record
 
 
-def generate_column_data(table, column, unique_values, all_data):
+def generate_column_data(table, column, key_allocators, all_data, generator=None, key_seed=0):
     # print(f"正在生成表 {table} 列 {column['name']},类型为:{column['type']} 的数据")
     # 外键
     if 'foreign_key' in column:
@@ -203,8 +253,8 @@ def generate_column_data(table, column, unique_values, all_data):
             foreign_column = fk_info['foreign_column_name']
             if foreign_table in all_data and all_data[foreign_table]:
                 foreign_column_value = random.choice(all_data[foreign_table])[foreign_column]
-                print(
-                    f"字段 {column['name']},关联表 {foreign_table},关联字段 {foreign_column},值(父字段随机一条) {foreign_column_value}")
+                logger.debug("字段 %s,关联表 %s,关联字段 %s,值(父字段随机一条) %s", column['name'], foreign_table,
+                             foreign_column, foreign_column_value)
                 return foreign_column_value
             else:
                 return None  # 如果外键表还没有数据，返回 None
@@ -213,46 +263,29 @@ def generate_column_data(table, column, unique_values, all_data):
     is_primary = column.get('is_primary_key', False)
     # 主键
     if is_primary:
-        max_attempts = 100  # 最大尝试次数
         primary_key = f"{table}.{column['name']}"
-        print("主键:", primary_key)
+        logger.debug("主键: %s", primary_key)
 
-        for _ in range(max_attempts):
-            primary_value = generate_unique_data(column, unique_values.get(primary_key, set()))
-            if primary_value is not None and primary_value not in unique_values.get(primary_key, set()):
-                if primary_key not in unique_values:
-                    unique_values[primary_key] = set()
-                unique_values[primary_key].add(primary_value)
-                return primary_value
-        return None  # 如果无法生成唯一值，则返回 None
+        primary_values = allocate_primary_keys(key_allocators, table, column, 1, key_seed)
+        if primary_values is None or len(primary_values) == 0:
+            return None  # 如果无法生成唯一值，则返回 None
+        return primary_values.tolist()[0]
 
     code_key = all_data.get(column['name'])
     if code_key:
         options = all_data[column['name']]
-        code_value = random.choice(options)["value"]
-        print(f"字段 {column['name']},其值取自代码表:{code_value}")
+        code_value = generator.one() if generator is not None else random.choice(options)["value"]
+        logger.debug("字段 %s,其值取自代码表:%s", column['name'], code_value)
         return code_value
+    elif generator is not None:
+        # 其它列：使用预编译的生成函数
+        return generator.one()
     else:
         # 其它列
         other_column_val = generate_single_column_data(column)
         return other_column_val
 
 
-def generate_unique_data(column, existing_values):
-    column_type = column['type']
-
-    if column_type in ('integer', 'bigint'):
-        return random.randint(0, 1000000)
-    elif column_type in ('numeric', 'real', 'double precision'):
-        return round(random.uniform(0, 1000000), 2)
-    elif column_type in ('character', 'character varying', 'text'):
-        return fake.uuid4()
-    elif column_type in ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone'):
-        return fake.date_time().isoformat()
-    else:
-        return None  # 不支持的类型
-
-
 def generate_single_column_data(column):
     # 这里包含原来 generate_column_data 函数的逻辑
     if column['type'] == 'llm_gen':
@@ -375,7 +408,7 @@ def get_faker_method(sample_data):
         return None
 
 
-def generate_numeric_data(column, is_integer=False):
+def get_numeric_range(column, is_integer=False):
     stats = column.get('stats', {})
     if stats and 'min' in stats and 'max' in stats:
         min_val = stats.get('min')
@@ -386,6 +419,11 @@ def generate_numeric_data(column, is_integer=False):
     else:
         min_val = 0
         max_val = 1000000 if is_integer else 1000.0
+    return min_val, max_val
+
+
+def generate_numeric_data(column, is_integer=False):
+    min_val, max_val = get_numeric_range(column, is_integer)
 
     if is_integer:
         return random.randint(int(min_val), int(max_val))
@@ -419,9 +457,7 @@ def generate_text_data(column):
     return fake.text(max_nb_chars=length)
 
 
-def generate_date_data(column):
-    print(column)
-
+def get_date_range(column):
     stats = column.get('stats', {})
     if stats and 'min_date' in stats and 'max_date' in stats:
         min_date = parse_date(stats.get('min_date', '1970-01-01'))
@@ -429,6 +465,13 @@ def generate_date_data(column):
     else:
         min_date = datetime(1970, 1, 1)
         max_date = datetime.now()
+    return min_date, max_date
+
+
+def generate_date_data(column):
+    logger.debug("%s", column)
+
+    min_date, max_date = get_date_range(column)
 
     generated_date = fake.date_time_between(start_date=min_date, end_date=max_date)
     # 检测样本数据的格式
@@ -459,15 +502,895 @@ def parse_date(date_string):
     raise ValueError(f"无法解析日期: {date_string}")
 
 
-def gen_data_by_stats(stats_file='db_stats.json', num_records=10):
+# ---------------------------------------------------------------------------
+# 主键分配：每个主键列一个键空间分配器，不重试、不保存已发放的值
+# ---------------------------------------------------------------------------
+
+# allocator 发放不重复的偏移量，to_values 把偏移量映射为该列类型的取值
+PrimaryKeyGenerator = namedtuple('PrimaryKeyGenerator', ['allocator', 'to_values'])
+
+INTEGER_TYPE_MAX = {'smallint': 2 ** 15 - 1, 'integer': 2 ** 31 - 1, 'bigint': 2 ** 63 - 1}
+
+
+def allocate_primary_keys(key_allocators, table, column, n, key_seed, shard_index=0, shard_count=1):
+    """
+    为主键列发放 n 个不重复的值，返回数组；键空间耗尽时数量可能少于 n，不支持的类型返回 None
+    """
+    primary_key = f"{table}.{column['name']}"
+    if primary_key not in key_allocators:
+        # 同一次运行的所有分片使用相同的置换种子，保证分片之间不重叠
+        column_seed = [key_seed, zlib.crc32(primary_key.encode('utf-8'))]
+        key_allocators[primary_key] = create_primary_key_generator(column, column_seed, shard_index, shard_count)
+    generator = key_allocators[primary_key]
+    if generator is None:
+        return None  # 不支持的类型
+    return generator.to_values(generator.allocator.allocate(n))
+
+
+def create_primary_key_generator(column, seed, shard_index=0, shard_count=1):
+    """键空间优先使用源数据中观察到的 min/max，用完后在 max 之上单调递增"""
+    column_type = column['type'].lower()
+
+    if column_type in INTEGER_TYPE_MAX:
+        min_val, max_val = get_numeric_range(column, is_integer=True)
+        low = int(min_val)
+        allocator = KeyAllocator(int(max_val) - low + 1, seed, shard_index, shard_count,
+                                 limit=INTEGER_TYPE_MAX[column_type] - low + 1)
+        return PrimaryKeyGenerator(allocator, lambda offsets: offsets.astype(np.int64) + np.int64(low))
+    elif column_type in ('numeric', 'real', 'double precision'):
+        # 以分（两位小数）为单位划分键空间
+        min_val, max_val = get_numeric_range(column, is_integer=False)
+        low = float(min_val)
+        allocator = KeyAllocator(int(round((float(max_val) - low) * 100)) + 1, seed, shard_index, shard_count)
+        return PrimaryKeyGenerator(allocator, lambda offsets: np.round(low + offsets / 100, 2))
+    elif column_type in ('character', 'character varying', 'text'):
+        # 高 64 位每列随机，低 62 位来自置换，按 UUID v4 格式输出
+        high = int(np.random.default_rng(seed).integers(0, 2 ** 63)) << 64
+        allocator = KeyAllocator(2 ** 62, seed, shard_index, shard_count)
+        return PrimaryKeyGenerator(allocator, lambda offsets: np.asarray(
+            [str(uuid.UUID(int=high | offset, version=4)) for offset in offsets.tolist()], dtype=object))
+    elif column_type in ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone'):
+        # 以秒为单位划分键空间
+        min_date, max_date = get_date_range(column)
+        start = np.datetime64(min_date, 's').astype(np.int64)
+        end = np.datetime64(max_date, 's').astype(np.int64)
+        allocator = KeyAllocator(int(end - start) + 1, seed, shard_index, shard_count)
+        return PrimaryKeyGenerator(allocator, lambda offsets: np.asarray(np.datetime_as_string(
+            (offsets.astype(np.int64) + start).astype('datetime64[s]'), unit='s'), dtype=object))
+    else:
+        return None  # 不支持的类型
+
+
+# ---------------------------------------------------------------------------
+# 列式批量生成：每列一次 NumPy 调用生成 N 个值，输出时再组装成行
+# ---------------------------------------------------------------------------
+
+class GenerationState:
+    """
+    一次列式生成运行（或多进程中的一个分片）的可变状态：随机数发生器、代码表、主键分配器等。
+    同一次运行的所有分片共享 key_seed，各分片发放的主键互不重叠。
+    """
+
+    def __init__(self, db_stats, sorted_tables, seed=None, shard_index=0, shard_count=1, key_seed=None,
+                 metrics=None, scale_plan=None):
+        self.rng = np.random.default_rng(seed)
+        self.metrics = metrics if metrics is not None else GenerationMetrics()
+        faker_bank.rewind()
+        self.code_table_data = load_code_tables(db_stats, sorted_tables)
+        self.key_allocators = {}  # 每个主键列一个键空间分配器
+        self.key_seed = int(self.rng.integers(0, 2 ** 63)) if key_seed is None else key_seed
+        self.key_pools = create_key_pools(db_stats, self.code_table_data)  # 被外键引用列的键值池
+        self.plan = compile_generation_plan(db_stats, sorted_tables, self.code_table_data)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        # 按比例因子生成时的行数规划（ScalePlan），root_offset 为已生成的根记录数
+        self.scale_plan = scale_plan
+        self.root_offset = 0
+        if scale_plan is not None:
+            for table, factor in scale_plan.child_factors.items():
+                if factor != 1.0:
+                    self.plan[table] = self.plan[table]._replace(
+                        child_counts=scale_child_count_sampler(self.plan[table].child_counts, factor))
+
+    def root_records(self, table, num_records):
+        """本批次根表的行数：按比例因子规划时按累计的根记录数折算，各批次合计接近目标行数"""
+        if self.scale_plan is None:
+            return num_records
+        ratio = self.scale_plan.root_ratios.get(table, 1.0)
+        return math.floor((self.root_offset + num_records) * ratio) - math.floor(self.root_offset * ratio)
+
+    def get_state(self, pool_dir=None) -> dict:
+        """
+        返回可序列化的生成器状态：随机数发生器和 Faker 的状态、主键分配器位置和被外键引用列的键值池。
+        之后的运行用 from_state 恢复，继续发放新的主键并引用已生成的父记录。
+        键值池与主键分配器发放的值完全一致时只记录 from_allocator，恢复时按分配器位置重建；
+        代码表的键值池在创建时填充，不保存；其它键值池设置 pool_dir 时写入其中只追加的旁路文件（见 KeyPool.get_state），
+        否则以列表保存在状态中。
+        """
+        version, internal_state, gauss = fake.random.getstate()
+        return {
+            "shard_index": self.shard_index,
+            "shard_count": self.shard_count,
+            "key_seed": self.key_seed,
+            "root_offset": self.root_offset,
+            "rng": self.rng.bit_generator.state,
+            "faker": [version, list(internal_state), gauss],
+            "faker_bank": faker_bank.get_state(),
+            "key_allocators": {key: None if generator is None else generator.allocator.get_state()
+                               for key, generator in self.key_allocators.items()},
+            "key_pools": self.get_key_pool_states(pool_dir),
+        }
+
+    def get_key_pool_states(self, pool_dir=None) -> dict:
+        states = {}
+        for key, pool in self.key_pools.items():
+            if key.split('.', 1)[0] in self.code_table_data:
+                continue
+            generator = self.key_allocators.get(key)
+            if generator is not None and len(pool) == generator.allocator.position and not pool.weighted:
+                # 每次发放的主键都完整写入了键值池（没有被放弃的批次），键值池就是分配器发放的序列
+                states[key] = {"from_allocator": True}
+            elif pool_dir is None:
+                states[key] = pool.get_state()
+            else:
+                os.makedirs(pool_dir, exist_ok=True)
+                states[key] = pool.get_state(os.path.join(pool_dir, f"{key}.shard-{self.shard_index:05d}"))
+        return states
+
+    @classmethod
+    def from_state(cls, db_stats, sorted_tables, state, metrics=None, scale_plan=None):
+        """根据 get_state 的结果恢复生成器状态"""
+        generation_state = cls(db_stats, sorted_tables, None, state["shard_index"], state["shard_count"],
+                               state["key_seed"], metrics, scale_plan)
+        generation_state.rng.bit_generator.state = state["rng"]
+        generation_state.root_offset = state.get("root_offset", 0)
+        version, internal_state, gauss = state["faker"]
+        fake.random.setstate((version, tuple(internal_state), gauss))
+        faker_bank.set_state(state.get("faker_bank", {}))
+        for key, allocator_state in state["key_allocators"].items():
+            generation_state.key_allocators[key] = restore_primary_key_generator(db_stats, key, allocator_state)
+        for key, pool_state in state["key_pools"].items():
+            if pool_state.get("from_allocator"):
+                generation_state.key_pools[key] = rebuild_key_pool(generation_state.key_allocators[key])
+            else:
+                generation_state.key_pools[key] = KeyPool.from_state(pool_state)
+        return generation_state
+
+
+def restore_primary_key_generator(db_stats, primary_key, allocator_state):
+    """按 "表名.列名" 重建主键生成器，并恢复分配器已发放的位置"""
+    if allocator_state is None:
+        return None
+    table, column_name = primary_key.split('.', 1)
+    column = next(column for column in db_stats[table]['columns'] if column['name'] == column_name)
+    generator = create_primary_key_generator(column, allocator_state["seed"], allocator_state["shard_index"],
+                                             allocator_state["shard_count"])
+    generator.allocator.position = allocator_state["position"]
+    return generator
+
+
+def rebuild_key_pool(generator, chunk_size=1000000):
+    """按主键生成器已发放的数量，从头重新发放一遍得到相同的键值序列"""
+    allocator = KeyAllocator.from_state({**generator.allocator.get_state(), "position": 0})
+    pool = KeyPool()
+    while allocator.position < generator.allocator.position:
+        offsets = allocator.allocate(min(chunk_size, generator.allocator.position - allocator.position))
+        if len(offsets) == 0:
+            break
+        pool.extend(generator.to_values(offsets))
+    return pool
+
+
+def key_pool_dir(state_file):
+    """追加模式下键值池旁路文件所在的目录"""
+    return f"{state_file}.pools" if state_file else None
+
+
+def create_generation_state(db_stats, sorted_tables, seed=None, metrics=None, previous=None, scale_plan=None):
+    """单进程运行的生成器状态：previous 为 load_generation_state 读取的上一次运行状态时从中恢复"""
+    if previous is not None:
+        check_shard_count(previous, 1)
+        return GenerationState.from_state(db_stats, sorted_tables, previous["shards"][0], metrics, scale_plan)
+    if seed is not None:
+        fake.seed_instance(seed)
+    return GenerationState(db_stats, sorted_tables, seed, metrics=metrics, scale_plan=scale_plan)
+
+
+def load_generation_state(state_file):
+    """读取上一次运行保存的生成器状态，state_file 为空或文件不存在时返回 None"""
+    if not state_file or not os.path.exists(state_file):
+        return None
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_generation_state(state_file, previous, shard_states):
+    """
+    保存本次运行结束时各分片的生成器状态，run 为追加运行的序号（首次运行为 0）
+    先写临时文件再替换，写入中断时不会破坏上一次的状态
+    """
+    if not state_file:
+        return
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({"run": next_run(previous), "shards": shard_states}, f)
+    os.replace(tmp_file, state_file)
+
+
+def next_run(previous):
+    return 0 if previous is None else previous["run"] + 1
+
+
+def check_shard_count(previous, workers):
+    if len(previous["shards"]) != workers:
+        raise ValueError(f"追加生成的分片数必须与之前的运行相同：之前为 {len(previous['shards'])}，本次为 {workers}")
+
+
+def generate_data_columnar(db_stats, sorted_tables, num_records=10, seed=None, workers=1, metrics=None):
+    """
+    列式批量生成数据，返回结构与 generate_data 相同：{表名: [记录, ...]}
+
+    根表一次生成 num_records 条记录；依赖表按 dep_relation 为每条父记录生成子记录；
+    外键从已生成的全部父记录中随机抽取。workers > 1 时按分片多进程生成后按分片顺序合并。
+    """
+    return generate_column_store(db_stats, sorted_tables, num_records, seed, workers, metrics).to_dict()
+
+
+def generate_column_store(db_stats, sorted_tables, num_records=10, seed=None, workers=1, metrics=None,
+                          state_file=None, scale_plan=None):
+    """
+    与 generate_data_columnar 相同，但以 ColumnStore 返回，不转换为记录字典。
+    设置 state_file 时为追加模式：从上一次运行保存的状态继续生成（忽略 seed），结束后保存新的状态，
+    只返回本次新增的记录，主键不与之前的运行重复，外键可以引用之前运行生成的父记录。
+    设置 scale_plan（plan_scale 的结果）时按其规划每张表的行数，num_records 为根记录迭代次数。
+    """
+    previous = load_generation_state(state_file)
+    store = ColumnStore()
+    if workers > 1:
+        shard_results, shard_states = run_shards(db_stats, sorted_tables, num_records, workers, seed, metrics=metrics,
+                                                 previous=previous, scale_plan=scale_plan,
+                                                 pool_dir=key_pool_dir(state_file))
+        for shard_data in shard_results:
+            for table, chunks in shard_data.items():
+                for columns in chunks:
+                    store.append(table, columns)
+    else:
+        state = create_generation_state(db_stats, sorted_tables, seed, metrics, previous, scale_plan)
+        for table, columns in iter_generate_data(db_stats, sorted_tables, num_records, max(num_records, 1),
+                                                 state=state):
+            store.append(table, columns)
+        shard_states = [state.get_state(key_pool_dir(state_file))]
+    save_generation_state(state_file, previous, shard_states)
+    return store
+
+
+def iter_generate_data(db_stats, sorted_tables, num_records=10, chunk_size=10000, seed=None, state=None,
+                       metrics=None):
+    """
+    流式列式生成：每次生成 chunk_size 条根记录及其子记录，按表逐块产出 (表名, {列名: 数组})。
+    已产出的数据块不再保留，只有被外键引用的列保存在键值池中；dep_table 子表只关联同一数据块内的父记录，
+    外键则从之前所有数据块的父记录中抽取。
+    """
+    if state is None:
+        state = create_generation_state(db_stats, sorted_tables, seed, metrics)
+    if not state.metrics.total_records:
+        state.metrics.total_records = num_records
+
+    for start in range(0, num_records, chunk_size):
+        chunk_records = min(chunk_size, num_records - start)
+        batch = generate_batch(db_stats, sorted_tables, chunk_records, state)
+        state.root_offset += chunk_records
+        for table, columns in batch.items():
+            yield table, columns
+        state.metrics.advance(chunk_records)
+    state.metrics.maybe_report(force=True)
+
+
+def create_key_pools(db_stats, code_table_data):
+    """
+    为每个被外键引用的列创建键值池，键为 "表名.列名"；引用代码表的键值池直接用代码表数据填充
+    """
+    key_pools = {}
+    for table_info in db_stats.values():
+        for column in table_info.get('columns', []):
+            fk_info = column.get('foreign_key')
+            if not fk_info:
+                continue
+            foreign_table = fk_info['foreign_table_name']
+            foreign_column = fk_info['foreign_column_name']
+            pool_key = f"{foreign_table}.{foreign_column}"
+            if pool_key in key_pools:
+                continue
+            key_pools[pool_key] = KeyPool()
+            if code_table_data.get(foreign_table):
+                key_pools[pool_key].extend(
+                    np.asarray([row[foreign_column] for row in code_table_data[foreign_table]], dtype=object))
+    return key_pools
+
+
+def load_code_tables(db_stats, sorted_tables):
+    code_table_data = {}
+    for table in sorted_tables:
+        if table and db_stats[table].get('is_codetable', False):
+            code_table_data[table] = db_stats[table].get('data', [])
+    return code_table_data
+
+
+# ---------------------------------------------------------------------------
+# 多进程分片：每个分片独立的随机种子、Faker 种子和主键区间
+# ---------------------------------------------------------------------------
+
+def split_records(num_records, workers):
+    """把 num_records 条根记录尽量均匀地分给 workers 个分片"""
+    base, extra = divmod(num_records, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+def run_shards(db_stats, sorted_tables, num_records, workers, seed=None, chunk_size=10000,
+               output_dir=None, fmt='ndjson', metrics=None, previous=None, scale_plan=None, pool_dir=None):
+    """
+    在进程池中运行各分片，按分片顺序返回 (各分片结果, 各分片结束时的生成器状态)；各分片的指标合并到 metrics。
+    previous 为上一次运行保存的状态时，各分片从各自的状态继续生成；pool_dir 为各分片保存键值池旁路文件的目录
+    """
+    if metrics is not None and not metrics.total_records:
+        metrics.total_records = num_records
+    if previous is not None:
+        check_shard_count(previous, workers)
+    shard_states = previous["shards"] if previous is not None else [None] * workers
+    run = next_run(previous)
+    root_seed = np.random.SeedSequence(seed)
+    key_seed = int(root_seed.generate_state(1, np.uint64)[0] >> np.uint64(1))
+    seeds = root_seed.spawn(workers)
+    # 先在主进程中编译一次生成计划，加载（或生成并缓存）Faker 取值库，各分片使用相同的取值
+    compile_generation_plan(db_stats, sorted_tables, load_code_tables(db_stats, sorted_tables))
+    # 子进程由 fork 创建，先等待取值库的后台线程结束，避免子进程复制到被持有的锁
+    faker_bank.wait()
+    tasks = [
+        (db_stats, sorted_tables, shard_records, chunk_size, seeds[i], i, workers, key_seed, output_dir, fmt,
+         shard_states[i], run, scale_plan, pool_dir)
+        for i, shard_records in enumerate(split_records(num_records, workers))
+    ]
+    results = []
+    states = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result, snapshot, state in executor.map(generate_shard, tasks):
+            if metrics is not None:
+                metrics.merge(snapshot)
+            results.append(result)
+            states.append(state)
+    return results, states
+
+
+def generate_shard(task):
+    """
+    生成一个分片，返回 (结果, 指标快照, 生成器状态)。output_dir 为空时结果为 {表名: [数据块, ...]}
+    （列式数组传回主进程比记录字典快得多），否则写入每张表的分片文件 {表名}.part-{序号}.{格式}，结果为每张表的记录数。
+    """
+    (db_stats, sorted_tables, num_records, chunk_size, seed_seq, shard_index, shard_count, key_seed,
+     output_dir, fmt, shard_state, run, scale_plan, pool_dir) = task
+    # 分片内不输出进度，由主进程合并指标后统一输出
+    metrics = GenerationMetrics(num_records, report_interval=None)
+    if shard_state is not None:
+        state = GenerationState.from_state(db_stats, sorted_tables, shard_state, metrics, scale_plan)
+    else:
+        # 子进程可能复制了父进程的 Faker 状态，必须按分片重新设置种子
+        fake.seed_instance(int(seed_seq.generate_state(1)[0]))
+        state = GenerationState(db_stats, sorted_tables, seed_seq, shard_index, shard_count, key_seed, metrics,
+                                scale_plan)
+    chunks = iter_generate_data(db_stats, sorted_tables, num_records, chunk_size, state=state)
+
+    if output_dir is None:
+        shard_data = {}
+        for table, columns in chunks:
+            shard_data.setdefault(table, []).append(columns)
+        return shard_data, metrics.snapshot(), state.get_state(pool_dir)
+
+    with StreamWriter(output_dir, fmt, part=shard_index, run=run) as writer:
+        for table, columns in chunks:
+            writer.write(table, columns)
+    return writer.row_counts, metrics.snapshot(), state.get_state(pool_dir)
+
+
+def merge_row_counts(shard_results):
+    merged = {}
+    for row_counts in shard_results:
+        for table, count in row_counts.items():
+            merged[table] = merged.get(table, 0) + count
+    return merged
+
+
+def generate_batch(db_stats, sorted_tables, num_records, state):
+    """按拓扑顺序生成一个批次的所有非代码表，返回 {表名: {列名: 数组}}"""
+    batch = {}
+    for table in sorted_tables:
+        if db_stats[table].get('is_codetable', False):
+            continue
+        with state.metrics.time_table(table):
+            batch[table] = generate_table_columns(db_stats, table, state.root_records(table, num_records), batch,
+                                                  state)
+        # 被引用列的取值追加到键值池，之后的数据块也能引用这些父记录
+        for column_name, values in batch[table].items():
+            pool = state.key_pools.get(f"{table}.{column_name}")
+            if pool is not None:
+                pool.extend(values)
+    return batch
+
+
+def generate_table_columns(db_stats, table, num_records, batch, state):
+    table_info = db_stats[table]
+    dependency = table_info.get('dependency', {})
+    dep_table = dependency.get('dep_table')
+
+    parent_columns = None
+    parent_index = None
+    if dep_table:
+        parent_columns = batch.get(dep_table)
+        parent_rows = table_length(parent_columns)
+        if parent_rows == 0:
+            return {}
+
+        # 一次为所有父记录抽取子记录数，再展开为子记录对应的父记录下标
+        child_counts = state.plan[table].child_counts.batch(parent_rows, state.rng)
+        parent_index = np.repeat(np.arange(parent_rows), child_counts)
+        num_records = len(parent_index)
+
+    dependencies = dependency.get('dependencies', {}) if parent_columns else {}
+    columns = {}
+    for column, generator in zip(table_info['columns'], state.plan[table].columns):
+        column_name = column['name']
+        if column_name in dependencies:
+            dep_info = dependencies[column_name]
+            with state.metrics.time_column(DEPENDENCY_COLUMN_TYPE):
+                values = np.asarray(parent_columns[dep_info['field']])[parent_index]
+                transform = state.plan[table].transforms.get(column_name)
+                if transform is not None:
+                    # 预编译的转换函数一次映射整个父字段数组
+                    values = transform.batch(values)
+        else:
+            with state.metrics.time_column(column['type']):
+                values = generate_column_batch(table, column, generator, num_records, batch, state)
+        if values is None:
+            state.metrics.add_dropped(table, num_records)
+            return {}  # 与逐行模式一致：某列无法生成时放弃整批记录
+
+        columns[column_name] = values
+
+    # 主键取值不足时截断到最短列，相当于逐行模式中放弃的记录
+    num_rows = min(len(values) for values in columns.values()) if columns else 0
+    state.metrics.add_rows(table, num_rows)
+    state.metrics.add_dropped(table, num_records - num_rows)
+    return {name: values[:num_rows] for name, values in columns.items()}
+
+
+def table_length(columns):
+    if not columns:
+        return 0
+    return len(next(iter(columns.values())))
+
+
+def generate_column_batch(table, column, generator, n, batch, state):
+    rng = state.rng
+    # 外键
+    fk_info = column.get('foreign_key')
+    if fk_info:
+        pool = state.key_pools[f"{fk_info['foreign_table_name']}.{fk_info['foreign_column_name']}"]
+        if len(pool) == 0:
+            return None  # 如果外键表还没有数据，返回 None
+        return pool.sample(n, rng)
+
+    # 主键
+    if column.get('is_primary_key', False):
+        primary_values = allocate_primary_keys(state.key_allocators, table, column, n, state.key_seed,
+                                               state.shard_index, state.shard_count)
+        if primary_values is not None and len(primary_values) < n:
+            state.metrics.add_pk_shortfall(table, n - len(primary_values))
+        return primary_values
+
+    # 代码表列和其它列
+    return generator.batch(n, rng)
+
+
+# ---------------------------------------------------------------------------
+# 生成计划：每次运行只编译一次，把每列绑定到预先准备好的生成函数
+# ---------------------------------------------------------------------------
+
+# one() 生成单个值（逐行模式），batch(n, rng) 生成 n 个值的数组（列式模式）
+ColumnGenerator = namedtuple('ColumnGenerator', ['one', 'batch'])
+
+# 不支持的类型：与原逻辑一致返回 None，由调用方放弃记录
+UNSUPPORTED_GENERATOR = ColumnGenerator(lambda: None, lambda n, rng: None)
+
+# columns: 与表的 columns 顺序一致的 ColumnGenerator 列表；child_counts: 依赖表的子记录数抽样器；
+# transforms: {依赖列名: Transform}，dependency.json 中配置了 func 的依赖列
+TablePlan = namedtuple('TablePlan', ['columns', 'child_counts', 'transforms'])
+
+
+def compile_generation_plan(db_stats, sorted_tables, code_table_data):
+    """
+    遍历 db_stats 一次，为每张非代码表编译生成计划，返回 {表名: TablePlan}。
+    外键和主键列在运行时处理，对应位置为 None；取值来自代码表的列共用该代码表的抽样器；
+    没有依赖表时 child_counts 为 None。
+    """
+    code_table_generators = {}
+    plan = {}
+    for table in sorted_tables:
+        if db_stats[table].get('is_codetable', False):
+            continue
+        columns = []
+        for column in db_stats[table]['columns']:
+            if column.get('foreign_key') or column.get('is_primary_key', False):
+                columns.append(None)
+            elif code_table_data.get(column['name']):
+                code_table = column['name']
+                if code_table not in code_table_generators:
+                    code_table_generators[code_table] = compile_code_table_generator(code_table_data[code_table])
+                columns.append(code_table_generators[code_table])
+            else:
+                columns.append(compile_column_generator(column))
+        dependency = db_stats[table].get('dependency', {})
+        plan[table] = TablePlan(columns, compile_child_count_sampler(dependency), compile_transforms(dependency))
+    return plan
+
+
+def compile_transforms(dependency):
+    """编译依赖列的转换函数（转换名或受限表达式，见 TransformRegistry），返回 {列名: Transform}"""
+    if not dependency.get('dep_table'):
+        return {}
+    return {
+        column_name: transform_registry.compile(dep_info['func'])
+        for column_name, dep_info in dependency.get('dependencies', {}).items()
+        if column_name and dep_info.get('func')
+    }
+
+
+def compile_child_count_sampler(dependency):
+    """
+    编译子记录数抽样器：优先使用统计阶段从源库采集的经验分布 dep_distribution（{子记录数: 父记录数}），
+    否则在 dep_relation（如 "1:3"）范围内均匀抽取。返回的 batch(n, rng) 一次为 n 条父记录抽取子记录数。
+    """
+    if not dependency.get('dep_table'):
+        return None
+
+    distribution = dependency.get('dep_distribution')
+    if distribution:
+        sampler = AliasSampler(np.asarray([int(count) for count in distribution.keys()], dtype=np.int64),
+                               [float(weight) for weight in distribution.values()])
+        return ColumnGenerator(sampler.draw, sampler.sample)
+
+    # 从配置项中读取类似 "1:3" 的字符串，拆分为最小和最大记录数。
+    min_records, max_records = map(int, dependency['dep_relation'].split(':'))
+    return ColumnGenerator(lambda: random.randint(min_records, max_records),
+                           lambda n, rng: rng.integers(min_records, max_records, size=n, endpoint=True))
+
+
+def scale_child_count_sampler(sampler, factor):
+    """按系数缩放抽取的子记录数，小数部分按概率进位，使平均子记录数乘以 factor"""
+    def scale(counts, random_values):
+        scaled = counts * factor
+        return (np.floor(scaled) + (random_values < scaled - np.floor(scaled))).astype(np.int64)
+
+    return ColumnGenerator(lambda: int(scale(np.asarray(sampler.one()), np.asarray(random.random()))),
+                           lambda n, rng: scale(sampler.batch(n, rng), rng.random(n)))
+
+
+def compile_column_generator(column):
+    """faker 方法识别、日期格式识别、日期边界解析和权重计算都只在这里做一次"""
+    if column['type'] == 'llm_gen':
+        return compile_llm_generator(column)
+
+    faker_type = get_faker_type(column)
+
+    if faker_type:
+        return compile_faker_generator(faker_type, column)
+
+    column_type = column['type']
+    if column_type == 'boolean':
+        return ColumnGenerator(lambda: random.choice([True, False]),
+                               lambda n, rng: rng.integers(0, 2, size=n).astype(bool))
+    elif column_type.lower() in ('integer', 'bigint', 'smallint'):
+        min_val, max_val = get_numeric_range(column, is_integer=True)
+        min_val, max_val = int(min_val), int(max_val)
+        return ColumnGenerator(lambda: random.randint(min_val, max_val),
+                               lambda n, rng: rng.integers(min_val, max_val, size=n, endpoint=True))
+    elif column_type in ('numeric', 'real', 'double precision'):
+        min_val, max_val = get_numeric_range(column, is_integer=False)
+        min_val, max_val = float(min_val), float(max_val)
+        # 默认保留两位小数
+        return ColumnGenerator(lambda: round(random.uniform(min_val, max_val), 2),
+                               lambda n, rng: np.round(rng.uniform(min_val, max_val, size=n), 2))
+    elif column_type in ('character', 'character varying'):
+        return compile_character_generator(column)
+    elif column_type == 'text':
+        return ColumnGenerator(lambda: "未模拟", lambda n, rng: np.full(n, "未模拟", dtype=object))
+    elif column_type in ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone'):
+        min_date, max_date = get_date_range(column)
+        return compile_date_generator(min_date, max_date, get_sample_format(column))
+    else:
+        return UNSUPPORTED_GENERATOR
+
+
+def compile_llm_generator(column):
+    sample_data = column.get('sample_data', [])
+    if not sample_data:
+        return UNSUPPORTED_GENERATOR
+
+    pool = []
+
+    def get_pool():
+        # 第一次使用时才调用大模型，之后复用同一批结果
+        if not pool:
+            generated_data = generate_data_with_llm(sample_data, 20)
+            pool.append(np.asarray(generated_data if len(generated_data) < len(sample_data) else sample_data,
+                                   dtype=object))
+        return pool[0]
+
+    def generate_one():
+        values = get_pool()
+        return random.choice(values.tolist()) if len(values) else None
+
+    def generate_batch(n, rng):
+        values = get_pool()
+        return values[rng.integers(0, len(values), size=n)] if len(values) else None
+
+    return ColumnGenerator(generate_one, generate_batch)
+
+
+def compile_faker_generator(faker_type, column):
+    if faker_type in ['date', 'time', 'date_time']:
+        stats = column.get('stats', {})
+        min_date = parse_date(stats.get('min_date', '-30y'))
+        max_date = parse_date(stats.get('max_date', 'now'))
+        return compile_date_generator(min_date, max_date, get_sample_format(column))
+
+    if faker_bank.supports(faker_type):
+        # 从预先生成的取值库中抽取，不再逐个调用 Faker
+        return ColumnGenerator(lambda: faker_bank.draw(faker_type),
+                               lambda n, rng: faker_bank.sample(faker_type, n, rng))
+    provider = getattr(fake, faker_type)
+    return ColumnGenerator(provider, lambda n, rng: np.asarray([provider() for _ in range(n)], dtype=object))
+
+
+def compile_character_generator(column):
+    stats = column.get('stats', {})
+    if not stats:
+        # 使用Faker生成随机单词
+        return compile_faker_generator('word', column)
+
+    try:
+        sampler = AliasSampler(list(stats.keys()), [float(value) for value in stats.values()])
+    except ValueError:
+        sampler = AliasSampler(list(stats.keys()))
+    return ColumnGenerator(sampler.draw, sampler.sample)
+
+
+def compile_code_table_generator(options):
+    """代码表的 value 列等概率抽样"""
+    sampler = AliasSampler([option['value'] for option in options])
+    return ColumnGenerator(sampler.draw, sampler.sample)
+
+
+def compile_date_generator(min_date, max_date, date_format):
+    """在 [min_date, max_date] 之间按秒均匀抽取 epoch 秒数，再按检测到的格式批量格式化"""
+    start = int(np.datetime64(min_date, 's').astype(np.int64))
+    end = max(start, int(np.datetime64(max_date, 's').astype(np.int64)))
+    formatter = DateTimeFormatter(date_format, start, end)
+    return ColumnGenerator(lambda: formatter.format_one(random.randint(start, end)),
+                           lambda n, rng: formatter.format(rng.integers(start, end, size=n, endpoint=True)))
+
+
+def gen_data_by_stats(stats_file='db_stats.json', num_records=10, columnar=False, seed=None, workers=1,
+                      metrics=None, debug=None, as_store=False, state_file=None, scale_factor=None):
+    """
+    :param metrics: GenerationMetrics 实例，用于查询进度和统计指标；为空时内部创建
+    :param debug: 为 True 时输出逐字段的调试信息，为 False 时只输出 INFO 及以上；为空时不修改日志级别
+    :param as_store: 为 True 时使用列式生成并返回 ColumnStore，可直接交给 ParquetExporter 和 save_data_to_db
+    :param state_file: 追加模式的生成器状态文件（列式生成），见 generate_column_store
+    :param scale_factor: 比例因子，按 table_stats.total_rows × scale_factor 规划每张表的行数（列式生成），
+                         设置后忽略 num_records
+    """
+    if debug is not None:
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    if metrics is None:
+        metrics = GenerationMetrics(num_records)
     db_stats = load_db_stats(stats_file)
     dependency_graph = build_dependency_graph(db_stats)
     sorted_tables = topological_sort(dependency_graph)
-    generated_data = generate_data(db_stats, sorted_tables, num_records)
+    scale_plan = None
+    if scale_factor:
+        scale_plan = plan_scale(db_stats, sorted_tables, scale_factor)
+        report_scale_plan(scale_plan)
+        num_records = metrics.total_records = scale_plan.num_records
+    if as_store or state_file or scale_plan:
+        generated_data = generate_column_store(db_stats, sorted_tables, num_records, seed, workers, metrics, state_file,
+                                               scale_plan)
+        if not as_store:
+            generated_data = generated_data.to_dict()
+    elif columnar or workers > 1:
+        generated_data = generate_data_columnar(db_stats, sorted_tables, num_records, seed, workers, metrics)
+    else:
+        generated_data = generate_data(db_stats, sorted_tables, num_records, metrics)
 
     return generated_data
 
 
+def gen_data_by_stats_stream(stats_file='db_stats.json', num_records=10, output_dir='generated_data',
+                             fmt='ndjson', chunk_size=10000, seed=None, workers=1, metrics=None, debug=None,
+                             state_file=None, scale_factor=None, checkpoint_every=None):
+    """
+    流式生成数据并逐块写入 output_dir 下每张表一个 NDJSON/Parquet 文件，返回每张表的记录数。
+    workers > 1 时每个分片写各自的分片文件 {表名}.part-{序号}.{格式}。
+    设置 state_file 时为追加模式：从上一次运行的状态继续生成，新增的记录写入 {表名}.run-{序号}.{格式}，
+    可以直接追加到目标表。设置 scale_factor 时按比例因子规划每张表的行数，忽略 num_records。
+    设置 checkpoint_every 时每生成 checkpoint_every 个数据块保存一次检查点（见 run_with_checkpoints），
+    运行中断后用 resume_gen_data_by_stats_stream 继续。
+    debug 与 gen_data_by_stats 相同，为空时不修改日志级别。
+    """
+    if debug is not None:
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    if metrics is None:
+        metrics = GenerationMetrics(num_records)
+    db_stats = load_db_stats(stats_file)
+    sorted_tables = topological_sort(build_dependency_graph(db_stats))
+    scale_plan = None
+    if scale_factor:
+        scale_plan = plan_scale(db_stats, sorted_tables, scale_factor)
+        report_scale_plan(scale_plan)
+        num_records = metrics.total_records = scale_plan.num_records
+
+    if checkpoint_every:
+        if workers > 1:
+            raise ValueError("检查点模式只支持单进程生成")
+        check_no_unfinished_run(output_dir)
+        previous = load_generation_state(state_file)
+        manifest = {"stats_file": stats_file, "num_records": num_records, "chunk_size": chunk_size, "fmt": fmt,
+                    "seed": seed, "scale_factor": scale_factor, "checkpoint_every": checkpoint_every,
+                    "state_file": state_file, "run": next_run(previous), "completed_records": 0, "segment": 0,
+                    "row_counts": {}, "state": None, "finished": False}
+        state = create_generation_state(db_stats, sorted_tables, seed, metrics, previous, scale_plan)
+        # 同一运行序号之前已完成的检查点运行的段文件会与本次的输出混在一起，开始前删除
+        remove_run_segments(output_dir, manifest["run"], sorted_tables)
+        return run_with_checkpoints(db_stats, sorted_tables, output_dir, manifest, state, previous)
+
+    previous = load_generation_state(state_file)
+    if workers > 1:
+        shard_results, shard_states = run_shards(db_stats, sorted_tables, num_records, workers, seed, chunk_size,
+                                                 output_dir, fmt, metrics, previous, scale_plan,
+                                                 key_pool_dir(state_file))
+        row_counts = merge_row_counts(shard_results)
+        metrics.maybe_report(force=True)
+    else:
+        state = create_generation_state(db_stats, sorted_tables, seed, metrics, previous, scale_plan)
+        with StreamWriter(output_dir, fmt, run=next_run(previous)) as writer:
+            for table, columns in iter_generate_data(db_stats, sorted_tables, num_records, chunk_size, state=state):
+                writer.write(table, columns)
+        row_counts = writer.row_counts
+        shard_states = [state.get_state(key_pool_dir(state_file))]
+    save_generation_state(state_file, previous, shard_states)
+    print(f"数据已写入 {output_dir}: {row_counts}")
+    return row_counts
+
+
+# ---------------------------------------------------------------------------
+# 检查点：按段写出完整的数据文件，每段完成后保存清单（manifest.json）和生成器状态
+# ---------------------------------------------------------------------------
+
+MANIFEST_FILE = 'manifest.json'
+# 没有设置 state_file 时，检查点中的键值池旁路文件保存在输出目录下的这个目录中
+KEY_POOL_DIR = 'key_pools'
+
+
+def run_with_checkpoints(db_stats, sorted_tables, output_dir, manifest, state, previous=None):
+    """
+    每 checkpoint_every 个数据块为一段，每段写入各自完整的文件 {表名}[.run-{运行序号}].segment-{段序号}.{格式}，
+    运行序号与非检查点模式的追加运行相同，多次追加运行写入同一目录时互不覆盖。
+    一段的文件全部关闭后才更新清单，清单记录运行序号、已完成的根记录数、每张表的行数和生成器状态。
+    清单之后的段文件视为未完成，恢复时删除后从清单中的状态重新生成，因此不会产生重复的主键。
+    清单中的键值池只记录分配器位置或只追加的旁路文件（见 GenerationState.get_state），每次保存的开销与本段的数据量成正比。
+    """
+    num_records = manifest["num_records"]
+    segment_records = manifest["chunk_size"] * manifest["checkpoint_every"]
+    state.metrics.total_records = num_records
+    state.metrics.completed_records = manifest["completed_records"]
+    os.makedirs(output_dir, exist_ok=True)
+    pool_dir = key_pool_dir(manifest.get("state_file")) or os.path.join(output_dir, KEY_POOL_DIR)
+    remove_unfinished_segment(output_dir, manifest, sorted_tables)
+    save_manifest(output_dir, manifest)
+
+    while manifest["completed_records"] < num_records:
+        records = min(segment_records, num_records - manifest["completed_records"])
+        with segment_writer(output_dir, manifest) as writer:
+            for table, columns in iter_generate_data(db_stats, sorted_tables, records, manifest["chunk_size"],
+                                                     state=state):
+                writer.write(table, columns)
+        for table, count in writer.row_counts.items():
+            manifest["row_counts"][table] = manifest["row_counts"].get(table, 0) + count
+        manifest["completed_records"] += records
+        manifest["segment"] += 1
+        manifest["state"] = state.get_state(pool_dir)
+        manifest["finished"] = manifest["completed_records"] >= num_records
+        save_manifest(output_dir, manifest)
+        logger.info("检查点：已完成 %d/%d 条根记录", manifest["completed_records"], num_records)
+
+    save_generation_state(manifest.get("state_file"), previous, [state.get_state(pool_dir)])
+    print(f"数据已写入 {output_dir}: {manifest['row_counts']}")
+    return manifest["row_counts"]
+
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def segment_writer(output_dir, manifest):
+    """清单中当前段的 StreamWriter"""
+    return StreamWriter(output_dir, manifest["fmt"], run=manifest.get("run", 0), segment=manifest["segment"])
+
+
+def remove_unfinished_segment(output_dir, manifest, sorted_tables):
+    """
+    删除本次运行中清单之后的段文件：它们属于未保存检查点的段。
+    每段完成后才开始下一段，因此只有清单中的当前段可能未完成；其他运行和多进程分片的文件不受影响。
+    """
+    writer = segment_writer(output_dir, manifest)
+    for table in sorted_tables:
+        path = writer.path_for(table)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def remove_run_segments(output_dir, run, sorted_tables):
+    """删除运行序号为 run 的所有段文件 {表名}[.run-{运行序号}].segment-*.{格式}，其他运行和非检查点模式的文件不受影响"""
+    if not os.path.isdir(output_dir):
+        return
+    run_suffix = f".run-{run:05d}" if run else ""
+    patterns = [re.compile(re.escape(table + run_suffix) + r"\.segment-\d+\.(?:" + "|".join(StreamWriter.FORMATS) + ")")
+                for table in sorted_tables]
+    for file_name in os.listdir(output_dir):
+        if any(pattern.fullmatch(file_name) for pattern in patterns):
+            os.remove(os.path.join(output_dir, file_name))
+
+
+def check_no_unfinished_run(output_dir):
+    """output_dir 中有未完成的检查点运行时不能开始新的运行，避免覆盖其清单"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if not json.load(f)["finished"]:
+            raise ValueError(f"{output_dir} 中有未完成的检查点运行，请先用 resume_gen_data_by_stats_stream 继续")
+
+
+def resume_gen_data_by_stats_stream(output_dir='generated_data', metrics=None, debug=None):
+    """
+    从 output_dir 中最近的检查点继续 gen_data_by_stats_stream(checkpoint_every=...) 的运行，返回每张表的记录数。
+    运行参数（统计文件、记录数、数据块大小、格式、比例因子）从清单中读取。
+    debug 与 gen_data_by_stats 相同，为空时不修改日志级别。
+    """
+    if debug is not None:
+        logger.setLevel(logging.DEBUG if debug else logging.INFO)
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest["finished"]:
+        logger.info("%s 中的运行已经完成", output_dir)
+        return manifest["row_counts"]
+
+    db_stats = load_db_stats(manifest["stats_file"])
+    sorted_tables = topological_sort(build_dependency_graph(db_stats))
+    scale_plan = plan_scale(db_stats, sorted_tables, manifest["scale_factor"]) if manifest["scale_factor"] else None
+    if metrics is None:
+        metrics = GenerationMetrics(manifest["num_records"])
+    previous = load_generation_state(manifest.get("state_file"))
+    if manifest["state"] is not None:
+        state = GenerationState.from_state(db_stats, sorted_tables, manifest["state"], metrics, scale_plan)
+    else:
+        # 第一个检查点之前中断：按原来的参数重新开始
+        state = create_generation_state(db_stats, sorted_tables, manifest["seed"], metrics, previous, scale_plan)
+    return run_with_checkpoints(db_stats, sorted_tables, output_dir, manifest, state, previous)
+
+
 def save_to_json(data, file_path):
     with open(file_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
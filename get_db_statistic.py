@@ -2,10 +2,26 @@ import yaml
 from psycopg2 import sql
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+import hashlib
 import json
+import math
+import os
+import random
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from data_gen import analyze_llm_field
+from tools.TableProfiler import TableProfiler
+
+STATS_FILE = 'db_stats.json'
+# 每张表的变化指纹，保存在 db_stats.json 旁边，用于增量统计
+FINGERPRINT_FILE = 'db_stats.fingerprints.json'
+
+DATE_TYPES = ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone')
+
+# 一张表的结构：columns 为 [[列名, 数据类型], ...]，foreign_keys 的记录格式与 get_foreign_keys 相同
+TableCatalog = namedtuple('TableCatalog', ['columns', 'primary_keys', 'foreign_keys', 'unique_constraints'])
 
 
 # Add this new class for custom JSON encoding
@@ -22,13 +38,14 @@ def load_config(config_file):
     return config
 
 
-def connect_to_db(config):
+def connect_to_db(config, pool_size=5):
+    """
+    :param pool_size: 连接池大小，并行统计时与同时执行查询的线程数一致，多个线程共享同一个连接池
+    """
     db_config = config['source_database']
     conn_string = f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['name']}"
-    engine = create_engine(conn_string)
-
-    # 强制清理连接池中的所有连接（确保不会复用旧连接）
-    engine.dispose()
+    # pool_pre_ping 在取出连接时检查连接是否可用，不会复用已失效的连接
+    engine = create_engine(conn_string, pool_size=pool_size, max_overflow=pool_size, pool_pre_ping=True)
 
     with engine.connect() as conn:
         return engine, conn
@@ -39,6 +56,7 @@ def get_tables(engine):
         SELECT table_name 
         FROM information_schema.tables 
         WHERE table_schema = 'public'
+        ORDER BY table_name
     """
     with engine.connect() as conn:
         return pd.read_sql(query, conn)['table_name'].tolist()
@@ -101,6 +119,86 @@ def get_unique_constraints(engine, table):
     return pd.read_sql(query, engine)['attname'].tolist()
 
 
+CATALOG_COLUMNS_QUERY = """
+SELECT c.relname AS table_name,
+       a.attname AS column_name,
+       CASE
+           WHEN t.typcategory = 'A' THEN 'ARRAY'
+           WHEN t.typtype = 'd' THEN format_type(t.typbasetype, NULL)
+           WHEN t.typtype IN ('c', 'e', 'r', 'm') THEN 'USER-DEFINED'
+           ELSE format_type(a.atttypid, NULL)
+       END AS data_type
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_type t ON t.oid = a.atttypid
+WHERE n.nspname = :schema
+  AND c.relkind IN ('r', 'p', 'v', 'f')
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY c.relname, a.attnum
+"""
+
+CATALOG_INDEXES_QUERY = """
+SELECT c.relname AS table_name, a.attname, i.indisprimary
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+WHERE n.nspname = :schema
+  AND (i.indisprimary OR i.indisunique)
+ORDER BY c.relname, NOT i.indisprimary, i.indexrelid, array_position(i.indkey::int2[], a.attnum)
+"""
+
+CATALOG_FOREIGN_KEYS_QUERY = """
+SELECT n.nspname AS table_schema,
+       con.conname AS constraint_name,
+       c.relname AS table_name,
+       a.attname AS column_name,
+       fn.nspname AS foreign_table_schema,
+       fc.relname AS foreign_table_name,
+       fa.attname AS foreign_column_name
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+JOIN pg_class fc ON fc.oid = con.confrelid
+JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+CROSS JOIN LATERAL unnest(con.conkey, con.confkey) AS k(attnum, fattnum)
+JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+JOIN pg_attribute fa ON fa.attrelid = con.confrelid AND fa.attnum = k.fattnum
+WHERE con.contype = 'f'
+  AND n.nspname = :schema
+ORDER BY c.relname, con.conname, k.attnum
+"""
+
+
+def load_catalog(engine, schema='public'):
+    """
+    用三个 pg_catalog 查询读取 schema 中所有表的列、主键、唯一索引和外键，
+    代替逐表调用 get_columns、get_primary_keys、get_unique_constraints 和 get_foreign_keys。
+    :return: {表名: TableCatalog}
+    """
+    params = {"schema": schema}
+    columns = pd.read_sql(text(CATALOG_COLUMNS_QUERY), engine, params=params)
+    indexes = pd.read_sql(text(CATALOG_INDEXES_QUERY), engine, params=params)
+    foreign_keys = pd.read_sql(text(CATALOG_FOREIGN_KEYS_QUERY), engine, params=params)
+
+    catalog = {}
+    for table, group in columns.groupby('table_name', sort=False):
+        catalog[table] = TableCatalog(group[['column_name', 'data_type']].values.tolist(), [], [], [])
+    for row in indexes.itertuples():
+        table_catalog = catalog.get(row.table_name)
+        if table_catalog is None:
+            continue
+        names = table_catalog.primary_keys if row.indisprimary else table_catalog.unique_constraints
+        if row.attname not in names:
+            names.append(row.attname)
+    for record in foreign_keys.to_dict('records'):
+        if record['table_name'] in catalog:
+            catalog[record['table_name']].foreign_keys.append(record)
+    return catalog
+
+
 def calculate_null_rate(df, column):
     total_count = len(df)
     if total_count == 0:
@@ -188,6 +286,158 @@ def analyze_long_text(engine, table, column):
     }
 
 
+def quote_ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def column_kind(data_type):
+    """与 analyze_column 的分派一致，不支持的类型返回 None"""
+    if data_type in ('integer', 'numeric', 'real', 'double precision', 'bigint'):
+        return 'numeric'
+    if data_type in ('character', 'character varying'):
+        return 'character'
+    if data_type == 'text':
+        return 'text'
+    if data_type in DATE_TYPES:
+        return 'date'
+    return None
+
+
+def profile_table(engine, table, columns, chunk_size=100000, tablesample=''):
+    """
+    单次扫描表，同时计算多列的统计信息，结果格式与逐列调用 analyze_column 相同。
+    查询结果通过服务端游标按 chunk_size 分块读取，客户端每列只保留固定大小的在线摘要（见 TableProfiler），
+    内存占用与表的行数无关。
+    :param columns: [(列名, 数据类型), ...]，不支持的类型忽略
+    :param tablesample: 抽样子句（见 tablesample_clause），为空时扫描全表
+    :return: (扫描的行数, {列名: {stats, null_rate, sample_data, distinct_count}})
+    """
+    scan_columns = [(column, column_kind(data_type)) for column, data_type in columns if column_kind(data_type)]
+    if not scan_columns:
+        query = f"SELECT COUNT(*) FROM {quote_ident(table)} {tablesample}"
+        return int(pd.read_sql(query, engine).iloc[0, 0]), {}
+
+    profiler = TableProfiler(scan_columns)
+    query = f"SELECT {', '.join(quote_ident(column) for column, _ in scan_columns)} " \
+            f"FROM {quote_ident(table)} {tablesample}"
+    # 服务端游标每次最多缓冲 chunk_size 行
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as conn:
+        for chunk in pd.read_sql(query, conn, chunksize=chunk_size):
+            profiler.update(chunk)
+    return profiler.rows, profiler.result()
+
+
+# 字符列中视为空值的取值：空串或只包含空白字符
+BLANK_PATTERN = "'^[[:space:]]*$'"
+
+
+def build_aggregate_query(table, columns, tablesample=''):
+    """
+    构造一次扫描计算所有列聚合统计的查询：总行数、空值数，数值列的 min/max/avg，
+    日期列的 min/max，长文本列的长度 min/max/avg，字符列的有效值个数。
+    :param columns: [(列名, kind), ...]
+    """
+    select = ["count(*) AS total_rows"]
+    for i, (column, kind) in enumerate(columns):
+        name = quote_ident(column)
+        if kind in ('character', 'text'):
+            blank = f"{name} IS NULL OR {name} ~ {BLANK_PATTERN}"
+            select.append(f"count(*) FILTER (WHERE {blank}) AS c{i}_nulls")
+        else:
+            select.append(f"count(*) FILTER (WHERE {name} IS NULL) AS c{i}_nulls")
+        if kind == 'numeric':
+            select += [f"min({name})::float8 AS c{i}_min", f"max({name})::float8 AS c{i}_max",
+                       f"avg({name})::float8 AS c{i}_mean"]
+        elif kind == 'date':
+            select += [f"min({name})::text AS c{i}_min", f"max({name})::text AS c{i}_max"]
+        elif kind == 'text':
+            valid = f"FILTER (WHERE {name} !~ {BLANK_PATTERN})"
+            select += [f"min(length({name})) {valid} AS c{i}_min", f"max(length({name})) {valid} AS c{i}_max",
+                       f"(avg(length({name})) {valid})::float8 AS c{i}_mean"]
+    return f"SELECT {', '.join(select)} FROM {quote_ident(table)} {tablesample}".rstrip()
+
+
+def aggregate_analysis(row, i, kind, total_rows):
+    """把聚合查询结果的一行转换为 analyze_* 格式的统计（字符列的高频值和样本另行查询）"""
+    nulls = int(row[f"c{i}_nulls"])
+    null_rate = float(nulls / total_rows) if total_rows else 1.0
+    if total_rows - nulls <= 0:
+        return {"stats": {"error": "No non-null values found"}, "null_rate": null_rate, "sample_data": []}
+    if kind == 'numeric':
+        stats = {"mean": float(row[f"c{i}_mean"]), "min": float(row[f"c{i}_min"]), "max": float(row[f"c{i}_max"])}
+    elif kind == 'date':
+        stats = {"min_date": row[f"c{i}_min"], "max_date": row[f"c{i}_max"]}
+    elif kind == 'text':
+        stats = {"min_length": int(row[f"c{i}_min"]), "max_length": int(row[f"c{i}_max"]),
+                 "avg_length": float(row[f"c{i}_mean"])}
+    else:
+        stats = {}
+    return {"stats": stats, "null_rate": null_rate, "sample_data": []}
+
+
+def get_top_values(engine, table, column, valid_count, top_k=10, tablesample=''):
+    """在数据库中分组计数，只返回出现次数最多的 top_k 个值及其占比"""
+    name = quote_ident(column)
+    query = f"""
+    SELECT {name} AS value, count(*) AS frequency
+    FROM {quote_ident(table)} {tablesample}
+    WHERE {name} !~ {BLANK_PATTERN}
+    GROUP BY {name}
+    ORDER BY frequency DESC
+    LIMIT {int(top_k)}
+    """
+    df = pd.read_sql(query, engine)
+    return {str(row.value): int(row.frequency) / valid_count for row in df.itertuples()}
+
+
+def get_random_rows(engine, table, columns, sample_rows=100, tablesample=''):
+    """随机抽取 sample_rows 行，用于每列的样本数据"""
+    query = f"""
+    SELECT {', '.join(quote_ident(column) for column in columns)}
+    FROM {quote_ident(table)} {tablesample}
+    ORDER BY random()
+    LIMIT {int(sample_rows)}
+    """
+    return pd.read_sql(query, engine)
+
+
+def pick_samples(df, column, kind, sample_size=3):
+    values = df[column]
+    values = values[values.notnull()]
+    if kind in ('character', 'text'):
+        values = values[values.astype(str).str.strip() != '']
+    samples = values.head(sample_size).tolist()
+    return [str(value) for value in samples] if kind == 'date' else samples
+
+
+def pushdown_profile_table(engine, table, columns, top_k=10, sample_rows=100, tablesample=''):
+    """
+    在数据库中计算统计信息：一个聚合查询计算所有列的空值数和取值范围，字符列各用一个
+    GROUP BY ... ORDER BY count DESC LIMIT top_k 查询高频值，样本来自一次随机抽取的 sample_rows 行，
+    只有很小的结果集从数据库传到客户端。
+    :param columns: [(列名, 数据类型), ...]，不支持的类型忽略
+    :param tablesample: 抽样子句（见 tablesample_clause），为空时统计全表
+    :return: (统计的行数, {列名: {stats, null_rate, sample_data}})
+    """
+    scan_columns = [(column, column_kind(data_type)) for column, data_type in columns if column_kind(data_type)]
+    row = pd.read_sql(build_aggregate_query(table, scan_columns, tablesample), engine).iloc[0]
+    total_rows = int(row["total_rows"])
+    if not scan_columns:
+        return total_rows, {}
+
+    samples = get_random_rows(engine, table, [column for column, _ in scan_columns], sample_rows, tablesample)
+    analyses = {}
+    for i, (column, kind) in enumerate(scan_columns):
+        analysis = aggregate_analysis(row, i, kind, total_rows)
+        if "error" not in analysis["stats"]:
+            if kind == 'character':
+                valid_count = total_rows - int(row[f"c{i}_nulls"])
+                analysis["stats"] = get_top_values(engine, table, column, valid_count, top_k, tablesample)
+            analysis["sample_data"] = pick_samples(samples, column, kind)
+        analyses[column] = analysis
+    return total_rows, analyses
+
+
 def get_codetable_data(engine, table):
     query = f"SELECT * FROM {table}"
     df = pd.read_sql(query, engine)
@@ -197,22 +447,591 @@ def get_codetable_data(engine, table):
     return df.to_dict('records')
 
 
-def get_sample_data(engine, table, column, sample_size=100):
-    query = f"SELECT {column} FROM {table} LIMIT {sample_size}"
+def get_reltuples(engine, table):
+    """pg_class.reltuples 中的估计行数，表从未 ANALYZE 过（reltuples 为 -1 或 0）时返回 None"""
+    query = f"SELECT reltuples::bigint AS reltuples FROM pg_class WHERE oid = '{quote_ident(table)}'::regclass"
+    reltuples = int(pd.read_sql(query, engine).iloc[0, 0])
+    return reltuples if reltuples > 0 else None
+
+
+def estimate_row_count(engine, table):
+    """pg_class.reltuples 中的估计行数，表从未 ANALYZE 过时返回 COUNT(*)"""
+    reltuples = get_reltuples(engine, table)
+    if reltuples is not None:
+        return reltuples
+    return int(pd.read_sql(f"SELECT COUNT(*) FROM {quote_ident(table)}", engine).iloc[0, 0])
+
+
+def sample_fraction(total_rows, target_rows):
+    """抽取约 target_rows 行所需的比例，表不超过 target_rows 行时返回 1（不抽样）"""
+    if total_rows <= target_rows:
+        return 1.0
+    return target_rows / total_rows
+
+
+def tablesample_clause(method, fraction, seed=None):
+    """
+    :param method: SYSTEM（按数据页抽样，速度快）或 BERNOULLI（按行抽样，更均匀但需扫描全表）
+    :param fraction: 抽样比例 (0, 1]
+    :param seed: 指定时使用 REPEATABLE，多次统计抽取相同的样本
+    """
+    method = method.upper()
+    if method not in ('SYSTEM', 'BERNOULLI'):
+        raise ValueError(f"不支持的抽样方法: {method}")
+    clause = f"TABLESAMPLE {method} ({fraction * 100:.6f})"
+    if seed is not None:
+        clause += f" REPEATABLE ({int(seed)})"
+    return clause
+
+
+def sampling_error(sample_rows, total_rows, z=1.96):
+    """
+    比例类统计（null_rate、高频值占比）在 95% 置信度下的最大误差：z * sqrt(p(1-p)/n) 在 p=0.5 时取最大值，
+    并乘以有限总体修正 sqrt((N-n)/(N-1))。SYSTEM 按数据页抽样，数据按页聚集时实际误差可能更大。
+    """
+    if sample_rows <= 0:
+        return 1.0
+    correction = math.sqrt(max(total_rows - sample_rows, 0) / (total_rows - 1)) if total_rows > 1 else 0.0
+    return z * math.sqrt(0.25 / sample_rows) * correction
+
+
+def get_pg_stats(engine, table):
+    """读取 ANALYZE 收集在 pg_stats 中的列统计，返回 {列名: 统计}，数组转换为文本列表"""
+    query = f"""
+    SELECT attname, null_frac, avg_width, n_distinct,
+           array_to_json(most_common_vals::text::text[]) AS most_common_vals,
+           array_to_json(most_common_freqs) AS most_common_freqs,
+           array_to_json(histogram_bounds::text::text[]) AS histogram_bounds
+    FROM pg_stats
+    WHERE schemaname = 'public' AND tablename = '{table.replace("'", "''")}' AND NOT inherited
+    """
+    return {row['attname']: row for row in pd.read_sql(query, engine).to_dict('records')}
+
+
+def to_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def catalog_analysis(stats, kind, top_k=10, sample_size=3, rand=random):
+    """
+    由 pg_stats 的一行估计 analyze_* 格式的统计：most_common_vals/freqs 给出高频值及其占比，
+    histogram_bounds 把其余的非空值分为行数相等的区间，用于估计取值范围、均值和长度。
+    pg_stats 无法描述的列（没有高频值和直方图，或字符列没有高频值）返回 None，由调用方扫描统计。
+    """
+    null_rate = float(stats['null_frac'] or 0.0)
+    values = list(stats['most_common_vals'] or [])
+    freqs = [float(freq) for freq in stats['most_common_freqs'] or []]
+    bounds = list(stats['histogram_bounds'] or [])
+    if kind in ('character', 'text'):
+        # 与 calculate_null_rate 一致，空串和纯空白计为空值
+        pairs = [(value, freq) for value, freq in zip(values, freqs) if value.strip()]
+        null_rate += sum(freqs) - sum(freq for _, freq in pairs)
+        values = [value for value, _ in pairs]
+        freqs = [freq for _, freq in pairs]
+        bounds = [value for value in bounds if value.strip()]
+    null_rate = min(null_rate, 1.0)
+    if null_rate >= 1.0:
+        return {"stats": {"error": "No non-null values found"}, "null_rate": 1.0, "sample_data": []}
+    if not values and (not bounds or kind == 'character'):
+        return None
+
+    # 不在高频值中的非空值占比，按直方图区间均匀分布
+    rest = max(1.0 - null_rate - sum(freqs), 0.0) if bounds else 0.0
+    population = values + bounds
+    if kind == 'numeric':
+        numbers = [to_number(value) for value in values]
+        histogram = [to_number(value) for value in bounds]
+        midpoints = [(low + high) / 2 for low, high in zip(histogram, histogram[1:])] or histogram
+        total = sum(number * freq for number, freq in zip(numbers, freqs))
+        if midpoints:
+            total += rest * sum(midpoints) / len(midpoints)
+        stats = {"mean": float(total / (sum(freqs) + rest)), "min": float(min(numbers + histogram)),
+                 "max": float(max(numbers + histogram))}
+        population = numbers + histogram
+    elif kind == 'date':
+        stats = {"min_date": min(population), "max_date": max(population)}
+    elif kind == 'character':
+        valid = 1.0 - null_rate
+        stats = {value: freq / valid for value, freq in zip(values[:top_k], freqs[:top_k])}
+    else:
+        lengths = [len(value) for value in population]
+        total = sum(len(value) * freq for value, freq in zip(values, freqs))
+        if bounds:
+            total += rest * sum(len(value) for value in bounds) / len(bounds)
+        stats = {"min_length": min(lengths), "max_length": max(lengths),
+                 "avg_length": float(total / (sum(freqs) + rest))}
+    samples = rand.sample(population, min(sample_size, len(population)))
+    return {"stats": stats, "null_rate": null_rate, "sample_data": samples}
+
+
+def catalog_profile_table(engine, table, columns, top_k=10, run_analyze=False, chunk_size=100000):
+    """
+    不扫描数据，由 pg_class.reltuples 和 pg_stats 得到表的行数和各列的统计信息。
+    run_analyze 为 True 时先对该表执行 ANALYZE；pg_stats 无法描述的列单次扫描统计。
+    :param columns: [(列名, 数据类型), ...]，不支持的类型忽略
+    :return: (表的估计行数, {列名: {stats, null_rate, sample_data}})
+    """
+    if run_analyze:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ANALYZE {quote_ident(table)}")
+    total_rows = estimate_row_count(engine, table)
+    pg_stats = get_pg_stats(engine, table)
+
+    analyses = {}
+    missing = []
+    for column, data_type in columns:
+        kind = column_kind(data_type)
+        if kind is None:
+            continue
+        analysis = catalog_analysis(pg_stats[column], kind, top_k) if column in pg_stats else None
+        if analysis is None:
+            missing.append((column, data_type))
+        else:
+            analyses[column] = analysis
+    if missing:
+        print(f"表 {table} 中 {len(missing)} 列没有可用的 pg_stats 统计，扫描这些列")
+        analyses.update(profile_table(engine, table, missing, chunk_size)[1])
+    return total_rows, analyses
+
+
+def get_sample_data(engine, table, column, sample_size=100, tablesample='', shuffle=False):
+    """
+    :param tablesample: 抽样子句，指定时只从抽样的行中取样本
+    :param shuffle: 随机排序后取样本，否则取表中物理位置最前面的行
+    """
+    order = "ORDER BY random()" if shuffle else ""
+    query = f"SELECT {quote_ident(column)} FROM {quote_ident(table)} {tablesample} {order} LIMIT {sample_size}"
     return pd.read_sql(query, engine)[column].tolist()
 
 
+def get_child_distribution(engine, table, table_dependency):
+    """
+    采集依赖表每条父记录的子记录数分布，返回 {子记录数: 父记录数}。
+    子记录按 dependencies 中的关联字段分组；没有子记录的父记录数由父表总行数推算。
+    抽样统计时不使用该函数：抽样只保留每条父记录的部分子记录，分组计数偏小，改用 catalog_child_distribution
+    """
+    dep_table = table_dependency.get('dep_table')
+    group_columns = [column for column in table_dependency.get('dependencies', {}) if column]
+    if not dep_table or not group_columns:
+        return None
+
+    query = f"""
+    SELECT child_count, COUNT(*) AS parent_count
+    FROM (SELECT COUNT(*) AS child_count FROM {quote_ident(table)}
+          GROUP BY {', '.join(quote_ident(column) for column in group_columns)}) t
+    GROUP BY child_count
+    ORDER BY child_count
+    """
+    df = pd.read_sql(query, engine)
+    distribution = {str(int(row.child_count)): int(row.parent_count) for row in df.itertuples()}
+
+    parent_total = int(pd.read_sql(f"SELECT COUNT(*) FROM {quote_ident(dep_table)}", engine).iloc[0, 0])
+    zero_count = parent_total - sum(distribution.values())
+    if zero_count > 0:
+        distribution["0"] = zero_count
+    return distribution
+
+
+def catalog_child_distribution(engine, table, table_dependency):
+    """
+    catalog 模式下不扫描数据，由 pg_stats 中关联字段的统计和两张表的 reltuples 推算子记录数分布（见
+    child_distribution_from_stats）。只支持单个关联字段，任一张表没有 ANALYZE 过时返回 None
+    """
+    dep_table = table_dependency.get('dep_table')
+    group_columns = [column for column in table_dependency.get('dependencies', {}) if column]
+    if not dep_table or len(group_columns) != 1:
+        return None
+    child_rows = get_reltuples(engine, table)
+    parent_rows = get_reltuples(engine, dep_table)
+    stats = get_pg_stats(engine, table).get(group_columns[0])
+    if child_rows is None or parent_rows is None or stats is None:
+        return None
+    return child_distribution_from_stats(stats, child_rows, parent_rows)
+
+
+def child_distribution_from_stats(stats, child_rows, parent_rows):
+    """
+    由关联字段的 pg_stats 推算子记录数分布：每个高频值对应一条父记录，子记录数为 freq × 子表行数；
+    其余非空子记录平均分给其余不同取值（n_distinct 为负时表示占行数的比例），
+    父表行数减去不同取值个数为没有子记录的父记录数
+    """
+    non_null_rows = child_rows * (1 - (stats.get('null_frac') or 0.0))
+    n_distinct = stats.get('n_distinct') or 0.0
+    distinct = min(-n_distinct * child_rows if n_distinct < 0 else n_distinct, non_null_rows)
+    freqs = list(stats.get('most_common_freqs') or [])
+
+    distribution = Counter()
+    for freq in freqs:
+        distribution[max(1, round(freq * child_rows))] += 1
+    rest_parents = distinct - len(freqs)
+    rest_rows = non_null_rows - sum(freqs) * child_rows
+    if rest_parents >= 1 and rest_rows > 0:
+        # 平均子记录数不是整数时分摊到相邻的两个整数，保持均值不变
+        mean = max(rest_rows / rest_parents, 1.0)
+        low = int(mean)
+        distribution[low] += rest_parents * (1 - (mean - low))
+        distribution[low + 1] += rest_parents * (mean - low)
+    if parent_rows > distinct:
+        distribution[0] += parent_rows - distinct
+    return {str(count): int(round(parents)) for count, parents in sorted(distribution.items())
+            if round(parents) > 0}
+
+
 def load_dependency(dependency_file):
     with open(dependency_file, 'r', encoding='utf-8') as file:
         return json.load(file)
 
 
-def get_db_statistic(config_file='config.yaml', dependency_file='dependency.json'):
+def load_json_file(path):
+    """读取上次统计保存的 JSON 文件，不存在或无法解析时返回 {}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"无法读取 {path}，重新统计所有表: {e}")
+        return {}
+
+
+# 指纹使用的表活动计数。n_mod_since_analyze 和 ANALYZE 时间会被 ANALYZE（包括 catalog 模式执行的 ANALYZE
+# 和 autovacuum）重置，数据没有变化也会改变，不计入指纹；累计的增删改计数已经反映了数据的修改
+ACTIVITY_COLUMNS = ('n_tup_ins', 'n_tup_upd', 'n_tup_del', 'relation_size')
+
+
+def get_table_activity(engine, schema='public'):
+    """pg_stat_user_tables 中每张表的增删改计数和关系大小（见 ACTIVITY_COLUMNS）"""
+    query = """
+    SELECT relname AS table_name, n_tup_ins, n_tup_upd, n_tup_del,
+           pg_relation_size(relid) AS relation_size
+    FROM pg_stat_user_tables
+    WHERE schemaname = :schema
+    """
+    df = pd.read_sql(text(query), engine, params={"schema": schema})
+    return {row.pop('table_name'): {key: int(value) for key, value in row.items()}
+            for row in df.to_dict('records')}
+
+
+def table_fingerprint(table, activity, table_catalog, table_dependency, settings):
+    """
+    表的变化指纹：表和其 dep_table 的增删改计数与大小（父表变化会影响子记录数分布），列的定义，
+    以及约束和影响该表统计结果的配置的哈希。没有计数的表（如视图）返回 None，每次都重新统计。
+    :param settings: 影响该表统计结果的配置，如 specified_columns、codetables、profiling
+    """
+    if table not in activity:
+        return None
+    dep_table = table_dependency.get('dep_table')
+    config = json.dumps({"catalog": table_catalog, "dependency": table_dependency, "settings": settings},
+                        sort_keys=True, ensure_ascii=False, default=str)
+    dep_activity = activity.get(dep_table) if dep_table else None
+    return {
+        "activity": {key: activity[table].get(key) for key in ACTIVITY_COLUMNS},
+        "dep_activity": {key: dep_activity.get(key) for key in ACTIVITY_COLUMNS} if dep_activity else None,
+        "columns": [list(column) for column in table_catalog.columns],
+        "config": hashlib.sha256(config.encode('utf-8')).hexdigest()
+    }
+
+
+def get_specified_type(specified_columns, table, column):
+    """config.yaml 中为该列指定的类型，未指定时返回 None"""
+    for col_spec in specified_columns.get(table, []):
+        if column in col_spec:
+            print(f"表中列:{column},有指定类型:{col_spec[column]}")
+            return col_spec[column]
+    return None
+
+
+def needs_scan(specified_type, data_type):
+    """列是否需要扫描数据统计：未指定类型、由大模型判断类型（可能退回统计）或指定了类型的日期列"""
+    if specified_type in (None, 'llm'):
+        return True
+    return specified_type != 'llm_gen' and data_type in DATE_TYPES
+
+
+def get_analysis(analyses, engine, table, column, data_type):
+    """优先使用单次扫描的统计结果，没有时逐列查询"""
+    if column in analyses:
+        return analyses[column]
+    return analyze_column(engine, table, column, data_type)
+
+
+def profile_in_groups(profile, scan_columns, group_size=None, workers=1):
+    """
+    宽表按 group_size 列分组，最多 workers 组并行统计（每组单独扫描），按列的顺序合并结果
+    :param profile: 统计一组列的函数，返回 (行数, {列名: 统计})
+    """
+    if not group_size or workers <= 1 or len(scan_columns) <= group_size:
+        return profile(scan_columns)
+    groups = [scan_columns[i:i + group_size] for i in range(0, len(scan_columns), group_size)]
+    with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+        results = list(executor.map(profile, groups))
+    analyses = {}
+    for _, group_analyses in results:
+        analyses.update(group_analyses)
+    return results[0][0], analyses
+
+
+def profile_scan_columns(engine, table, scan_columns, profiling):
+    """
+    按 profiling 配置的方式统计需要扫描的列
+    :return: (总行数, {列名: 统计}, 抽样子句, 抽样信息, 是否失败)；column 模式或统计失败时统计结果为空，由调用方逐列统计
+    """
+    profile_mode = profiling.get('mode', 'table')
+    chunk_size = profiling.get('chunk_size', 100000)
+    top_k = profiling.get('top_k', 10)
+    # 近似统计：估计行数超过 target_rows 的表用 TABLESAMPLE 抽取约 target_rows 行统计
+    sampling = profiling.get('sample') or {}
+    group_size = profiling.get('column_group_size')
+    column_workers = profiling.get('column_workers', 1)
+
+    total_rows = None
+    analyses = {}
+    tablesample = ''
+    sample_stats = None
+    failed = False
+    if profile_mode in ('table', 'pushdown', 'catalog'):
+        try:
+            if sampling and profile_mode != 'catalog':
+                estimated_rows = estimate_row_count(engine, table)
+                fraction = sample_fraction(estimated_rows, sampling.get('target_rows', 100000))
+                if fraction < 1:
+                    method = sampling.get('method', 'SYSTEM')
+                    # 同一张表的所有查询（分组统计、高频值、样本）使用相同的种子，抽取相同的数据页；
+                    # 没有配置种子时随机选择一个并记录在抽样信息中
+                    seed = sampling.get('seed')
+                    if seed is None:
+                        seed = random.randrange(2 ** 31)
+                    tablesample = tablesample_clause(method, fraction, seed)
+            if profile_mode == 'catalog':
+                total_rows, analyses = catalog_profile_table(engine, table, scan_columns, top_k,
+                                                             profiling.get('analyze', False), chunk_size)
+            elif profile_mode == 'pushdown':
+                total_rows, analyses = profile_in_groups(
+                    lambda group: pushdown_profile_table(engine, table, group, top_k, tablesample=tablesample),
+                    scan_columns, group_size, column_workers)
+            else:
+                total_rows, analyses = profile_in_groups(
+                    lambda group: profile_table(engine, table, group, chunk_size, tablesample),
+                    scan_columns, group_size, column_workers)
+            if tablesample:
+                # 总行数按估计行数还原，记录抽样比例和比例类统计的误差范围
+                sample_stats = {
+                    "method": method.upper(),
+                    "fraction": fraction,
+                    "seed": seed,
+                    "sample_rows": total_rows,
+                    "confidence": 0.95,
+                    "proportion_error": sampling_error(total_rows, estimated_rows)
+                }
+                total_rows = estimated_rows
+        except Exception as e:
+            print(f"表 {table} {profile_mode} 模式统计失败，改为逐列统计: {e}")
+            failed = True
+            analyses = {}
+            tablesample = ''
+            total_rows = None
+    if total_rows is None:
+        total_rows = int(pd.read_sql(f"SELECT COUNT(*) FROM {table}", engine).iloc[0, 0])
+    return total_rows, analyses, tablesample, sample_stats, failed
+
+
+def build_table_stats(engine, table, table_catalog, table_dependency, specified_columns, profiling):
+    """
+    统计一张非代码表，返回 (db_stats.json 中该表的条目, 是否完整)。
+    按配置的模式统计失败改为逐列统计、某列统计出错或子记录数分布采集失败时不完整，增量统计时不沿用不完整的结果
+    """
+    columns, primary_keys, foreign_keys, unique_constraints = table_catalog
+    # print("表的主键:%s", primary_keys)
+    # print("表的外键:%s", foreign_keys)
+    # print("表的索引:%s", unique_constraints)
+    # print("表的列:%s", columns)
+
+    specified_types = {column: get_specified_type(specified_columns, table, column) for column, _ in columns}
+    scan_columns = [(column, data_type) for column, data_type in columns
+                    if needs_scan(specified_types[column], data_type)]
+    total_rows, analyses, tablesample, sample_stats, failed = profile_scan_columns(engine, table, scan_columns,
+                                                                                   profiling)
+    complete = not failed
+
+    table_stats = {
+        "total_rows": total_rows,
+        "total_columns": len(columns)
+    }
+    if sample_stats:
+        table_stats["sample"] = sample_stats
+
+    # 添加依赖关系信息
+    # profiling.child_distribution 开启时采集子记录数的经验分布，生成数据时优先于 dep_relation 使用；
+    # 精确分布需要对子表分组扫描一次，catalog 模式和抽样统计时不扫描数据，由 pg_stats 推算
+    # （无法推算时没有经验分布，生成数据时使用 dep_relation）
+    child_distribution = None
+    if profiling.get('child_distribution', False):
+        try:
+            if profiling.get('mode', 'table') == 'catalog' or tablesample:
+                child_distribution = catalog_child_distribution(engine, table, table_dependency)
+            else:
+                child_distribution = get_child_distribution(engine, table, table_dependency)
+        except Exception as e:
+            print(f"表 {table} 子记录数分布采集失败: {e}")
+            complete = False
+    if child_distribution:
+        table_dependency = {**table_dependency, "dep_distribution": child_distribution}
+    # print("配置的依赖:%s", table_dependency)
+
+    columns_info = []
+
+    for column, data_type in columns:
+        # Check if the column is specified in the YAML file
+        specified_type = specified_types[column]
+        if specified_type == 'llm':
+            # 获取样本数据
+            sample_data = get_sample_data(engine, table, column, tablesample=tablesample,
+                                          shuffle=bool(profiling.get('sample')))
+            # 使用大模型分析字段
+            llm_analysis = analyze_llm_field(table, column, sample_data)
+            if llm_analysis != 'other':
+                columns_info.append({
+                    "name": column,
+                    "type": llm_analysis,
+                    "stats": {"note": "LLM classification result"},
+                    "null_rate": None,
+                    "sample_data": sample_data[:5],  # 添加样本数据
+                    "is_primary_key": column in primary_keys,
+                    "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                    "is_unique": column in unique_constraints
+                })
+            else:
+                # 如果是"其他"类型，按照未指定类型处理
+                try:
+                    analysis = get_analysis(analyses, engine, table, column, data_type)
+                    columns_info.append({
+                        "name": column,
+                        "type": data_type,
+                        "stats": analysis["stats"],
+                        "null_rate": analysis["null_rate"],
+                        "sample_data": analysis["sample_data"],
+                        "is_primary_key": column in primary_keys,
+                        "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                        "is_unique": column in unique_constraints
+                    })
+                except Exception as e:
+                    complete = False
+                    columns_info.append({
+                        "name": column,
+                        "type": data_type,
+                        "stats": {"error": str(e)},
+                        "null_rate": None,
+                        "sample_data": [],
+                        "is_primary_key": column in primary_keys,
+                        "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                        "is_unique": column in unique_constraints
+                    })
+        elif specified_type == 'llm_gen':
+            # 由大模型分析字段，生成数据
+            sample_data = get_sample_data(engine, table, column, tablesample=tablesample,
+                                          shuffle=bool(profiling.get('sample')))
+            columns_info.append({
+                "name": column,
+                "type": specified_type,
+                "stats": {"note": "LLM will generates data for this column."},
+                "null_rate": None,
+                "sample_data": sample_data[:5],  # 添加样本数据
+                "is_primary_key": column in primary_keys,
+                "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                "is_unique": column in unique_constraints
+            })
+        elif specified_type:
+            if data_type in DATE_TYPES:
+                # 处理日期时间类型的列
+                analysis = get_analysis(analyses, engine, table, column, data_type)
+                columns_info.append({
+                    "name": column,
+                    "type": specified_type,
+                    "stats": analysis["stats"],
+                    "null_rate": analysis["null_rate"],
+                    "sample_data": analysis["sample_data"],
+                    "is_primary_key": column in primary_keys,
+                    "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                    "is_unique": column in unique_constraints
+                })
+            else:
+                columns_info.append({
+                    "name": column,
+                    "type": specified_type,
+                    "stats": {"note": "Type specified in config.yaml"},
+                    "null_rate": None,
+                    "sample_data": [],
+                    "is_primary_key": column in primary_keys,
+                    "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                    "is_unique": column in unique_constraints
+                })
+        else:
+            # 处理未指定类型的列
+            try:
+                analysis = get_analysis(analyses, engine, table, column, data_type)
+                columns_info.append({
+                    "name": column,
+                    "type": data_type,
+                    "stats": analysis["stats"],
+                    "null_rate": analysis["null_rate"],
+                    "sample_data": analysis["sample_data"],
+                    "is_primary_key": column in primary_keys,
+                    "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                    "is_unique": column in unique_constraints
+                })
+            except Exception as e:
+                complete = False
+                columns_info.append({
+                    "name": column,
+                    "type": data_type,
+                    "stats": {"error": str(e)},
+                    "null_rate": None,
+                    "sample_data": [],
+                    "is_primary_key": column in primary_keys,
+                    "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
+                    "is_unique": column in unique_constraints
+                })
+
+    # 单次扫描统计的列附带 HyperLogLog 估计的不同取值个数。抽样统计时这是样本中的不同取值个数，不能按抽样比例
+    # 简单还原，记为 sample_distinct_count，并在 table_stats.sample 中注明，避免被当作全表的基数
+    distinct_key = "sample_distinct_count" if sample_stats else "distinct_count"
+    for column_info in columns_info:
+        analysis = analyses.get(column_info["name"])
+        if analysis and "distinct_count" in analysis and column_info["stats"] is analysis["stats"]:
+            column_info[distinct_key] = analysis["distinct_count"]
+            if sample_stats:
+                sample_stats["distinct_count"] = "sample"
+
+    return {
+        "is_codetable": False,
+        "table_stats": table_stats,
+        "dependency": table_dependency,
+        "columns": columns_info
+    }, complete
+
+
+def get_db_statistic(config_file='config.yaml', dependency_file='dependency.json', force=False):
+    """
+    统计源数据库并保存到 db_stats.json。
+    profiling.incremental 开启（默认）时，与上次统计相比指纹未变化的表沿用 db_stats.json 中的结果，只统计有变化的表；
+    统计不完整的表不保存指纹，下次重新统计。force 为 True 时重新统计所有表。
+    """
     config = load_config(config_file)
     dependency = load_dependency(dependency_file)
-    engine, conn = connect_to_db(config)
+
+    # mode: table 每张表只扫描一次，同时统计所有列；pushdown 由数据库计算聚合统计，只传回结果；
+    # catalog 不扫描数据，使用 pg_stats 中 ANALYZE 的统计；column 每列单独查询。
+    # workers 张表并行统计，宽表按 column_group_size 列分组、每张表最多 column_workers 组并行
+    profiling = config.get('profiling') or {}
+    workers = max(int(profiling.get('workers', 1)), 1)
+    column_workers = max(int(profiling.get('column_workers', 1)), 1) if profiling.get('column_group_size') else 1
+    engine, conn = connect_to_db(config, pool_size=workers * column_workers)
 
     tables = get_tables(engine)
+    catalog = load_catalog(engine)
     # print("数据库表:", tables)
 
     codetables = config.get('codetables', [])
@@ -221,155 +1040,49 @@ def get_db_statistic(config_file='config.yaml', dependency_file='dependency.json
     specified_columns = config.get('specified_columns', {})
     # print("配置文件指定字段类型:%s", specified_columns)
 
-    result = {}
-
+    incremental = profiling.get('incremental', True) and not force
+    previous_stats = load_json_file(STATS_FILE) if incremental else {}
+    previous_fingerprints = load_json_file(FINGERPRINT_FILE) if incremental else {}
+    try:
+        activity = get_table_activity(engine)
+    except Exception as e:
+        print(f"无法读取 pg_stat_user_tables，重新统计所有表: {e}")
+        activity = {}
+    # 并行度不影响统计结果，不计入指纹
+    profile_settings = {key: value for key, value in profiling.items()
+                        if key not in ('workers', 'column_workers', 'incremental')}
+    fingerprints = {}
     for table in tables:
+        table_catalog = catalog.get(table, TableCatalog([], [], [], []))
+        settings = {"codetable": table in codetables, "specified_columns": specified_columns.get(table),
+                    "profiling": profile_settings}
+        fingerprints[table] = table_fingerprint(table, activity, table_catalog, dependency.get(table, {}), settings)
+    unchanged = {table for table in tables
+                 if fingerprints[table] is not None and table in previous_stats
+                 and previous_fingerprints.get(table) == fingerprints[table]}
+    if incremental:
+        print(f"增量统计：{len(unchanged)} 张表未变化，沿用上次的统计信息，{len(tables) - len(unchanged)} 张表重新统计")
+
+    def profile(table):
+        if table in unchanged:
+            return previous_stats[table], True
         if table in codetables:
-            result[table] = {
+            return {
                 "is_codetable": True,
                 "data": get_codetable_data(engine, table)
-            }
-        else:
-            primary_keys = get_primary_keys(engine, table)
-            foreign_keys = get_foreign_keys(engine, table)
-            unique_constraints = get_unique_constraints(engine, table)
-            columns = get_columns(engine, table)
-            # print("表的主键:%s", primary_keys)
-            # print("表的外键:%s", foreign_keys)
-            # print("表的索引:%s", unique_constraints)
-            # print("表的列:%s", columns)
-
-            table_stats = {
-                "total_rows": int(pd.read_sql(f"SELECT COUNT(*) FROM {table}", engine).iloc[0, 0]),
-                "total_columns": len(columns)
-            }
-
-            # 添加依赖关系信息
-            table_dependency = dependency.get(table, {})
-            # print("配置的依赖:%s", table_dependency)
-
-            columns_info = []
-
-            for column, data_type in columns:
-                # Check if the column is specified in the YAML file
-                specified_type = None
-                if table in specified_columns:
-                    for col_spec in specified_columns[table]:
-                        if column in col_spec:
-                            specified_type = col_spec[column]
-                            print(f"表中列:{column},有指定类型:{specified_type}")
-                            break
-                if specified_type == 'llm':
-                    # 获取样本数据
-                    sample_data = get_sample_data(engine, table, column)
-                    # 使用大模型分析字段
-                    llm_analysis = analyze_llm_field(table, column, sample_data)
-                    if llm_analysis != 'other':
-                        columns_info.append({
-                            "name": column,
-                            "type": llm_analysis,
-                            "stats": {"note": "LLM classification result"},
-                            "null_rate": None,
-                            "sample_data": sample_data[:5],  # 添加样本数据
-                            "is_primary_key": column in primary_keys,
-                            "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                            "is_unique": column in unique_constraints
-                        })
-                    else:
-                        # 如果是"其他"类型，按照未指定类型处理
-                        try:
-                            analysis = analyze_column(engine, table, column, data_type)
-                            columns_info.append({
-                                "name": column,
-                                "type": data_type,
-                                "stats": analysis["stats"],
-                                "null_rate": analysis["null_rate"],
-                                "sample_data": analysis["sample_data"],
-                                "is_primary_key": column in primary_keys,
-                                "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                                "is_unique": column in unique_constraints
-                            })
-                        except Exception as e:
-                            columns_info.append({
-                                "name": column,
-                                "type": data_type,
-                                "stats": {"error": str(e)},
-                                "null_rate": None,
-                                "sample_data": [],
-                                "is_primary_key": column in primary_keys,
-                                "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                                "is_unique": column in unique_constraints
-                            })
-                elif specified_type == 'llm_gen':
-                    # 由大模型分析字段，生成数据
-                    sample_data = get_sample_data(engine, table, column)
-                    columns_info.append({
-                        "name": column,
-                        "type": specified_type,
-                        "stats": {"note": "LLM will generates data for this column."},
-                        "null_rate": None,
-                        "sample_data": sample_data[:5],  # 添加样本数据
-                        "is_primary_key": column in primary_keys,
-                        "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                        "is_unique": column in unique_constraints
-                    })
-                elif specified_type:
-                    if data_type in ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone'):
-                        # 处理日期时间类型的列
-                        analysis = analyze_date(engine, table, column)
-                        columns_info.append({
-                            "name": column,
-                            "type": specified_type,
-                            "stats": analysis["stats"],
-                            "null_rate": analysis["null_rate"],
-                            "sample_data": analysis["sample_data"],
-                            "is_primary_key": column in primary_keys,
-                            "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                            "is_unique": column in unique_constraints
-                        })
-                    else:
-                        columns_info.append({
-                            "name": column,
-                            "type": specified_type,
-                            "stats": {"note": "Type specified in config.yaml"},
-                            "null_rate": None,
-                            "sample_data": [],
-                            "is_primary_key": column in primary_keys,
-                            "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                            "is_unique": column in unique_constraints
-                        })
-                else:
-                    # 处理未指定类型的列
-                    try:
-                        analysis = analyze_column(engine, table, column, data_type)
-                        columns_info.append({
-                            "name": column,
-                            "type": data_type,
-                            "stats": analysis["stats"],
-                            "null_rate": analysis["null_rate"],
-                            "sample_data": analysis["sample_data"],
-                            "is_primary_key": column in primary_keys,
-                            "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                            "is_unique": column in unique_constraints
-                        })
-                    except Exception as e:
-                        columns_info.append({
-                            "name": column,
-                            "type": data_type,
-                            "stats": {"error": str(e)},
-                            "null_rate": None,
-                            "sample_data": [],
-                            "is_primary_key": column in primary_keys,
-                            "foreign_key": next((fk for fk in foreign_keys if fk['column_name'] == column), None),
-                            "is_unique": column in unique_constraints
-                        })
-
-            result[table] = {
-                "is_codetable": False,
-                "table_stats": table_stats,
-                "dependency": table_dependency,
-                "columns": columns_info
-            }
+            }, True
+        return build_table_stats(engine, table, catalog.get(table, TableCatalog([], [], [], [])),
+                                 dependency.get(table, {}), specified_columns, profiling)
+
+    # 各表的统计相互独立，并行执行后按 tables 的顺序合并，输出与串行统计相同
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {table: executor.submit(profile, table) for table in tables}
+    result = {}
+    for table in tables:
+        result[table], complete = futures[table].result()
+        if not complete:
+            print(f"表 {table} 的统计不完整，下次统计时不沿用")
+            fingerprints[table] = None
 
     conn.close()
     engine.dispose()
@@ -378,8 +1091,11 @@ def get_db_statistic(config_file='config.yaml', dependency_file='dependency.json
     # print(json.dumps(result, indent=2, ensure_ascii=False, cls=DateTimeEncoder))
 
     # Dump JSON to file using the custom encoder
-    with open('db_stats.json', 'w', encoding='utf-8') as f:
+    with open(STATS_FILE, 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2, ensure_ascii=False, cls=DateTimeEncoder)
+    with open(FINGERPRINT_FILE, 'w', encoding='utf-8') as f:
+        json.dump({table: fingerprint for table, fingerprint in fingerprints.items() if fingerprint is not None}, f,
+                  indent=2, ensure_ascii=False)
 
 
 def analyze_column(engine, table, column, data_type):
@@ -389,7 +1105,7 @@ def analyze_column(engine, table, column, data_type):
         return analyze_character(engine, table, column)
     elif data_type == 'text':
         return analyze_long_text(engine, table, column)
-    elif data_type in ('date', 'timestamp', 'timestamp without time zone', 'timestamp with time zone'):
+    elif data_type in DATE_TYPES:
         return analyze_date(engine, table, column)
     else:
         return {"stats": {"error": f"Unsupported data type: {data_type}"}, "null_rate": None, "sample_data": []}
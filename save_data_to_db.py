@@ -7,6 +7,8 @@ from sqlalchemy import inspect
 from collections import OrderedDict
 from sqlalchemy import text
 import re
+import io
+import pyarrow.csv as pa_csv
 
 def load_config(file_path):
     with open(file_path, 'r') as file:
@@ -97,7 +99,46 @@ def insert_data(engine, data):
     finally:
         session.close()
 
-def save_data_to_db(source_config, target_config, data_file='db_data.json', drop_existing_tables=False):
+def copy_arrow_table(engine, table_name, arrow_table):
+    """
+    使用 PostgreSQL COPY 把 Arrow 表整体写入目标表：Arrow 直接编码为 CSV，不经过逐行的字典和 INSERT。
+    COPY 是整表事务，失败时抛出异常，由调用方回退到逐行插入。
+    """
+    buffer = io.BytesIO()
+    pa_csv.write_csv(arrow_table, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    columns = ", ".join(f'"{name}"' for name in arrow_table.column_names)
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY "{table_name}" ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def insert_column_store(engine, store):
+    """按生成顺序写入 ColumnStore 中的每张表；COPY 失败的表回退到逐行插入，跳过违反约束的记录"""
+    for table_name in store.tables():
+        arrow_table = store.to_arrow(table_name)
+        print(f"开始插入表 {table_name} 的数据")
+        try:
+            copy_arrow_table(engine, table_name, arrow_table)
+            print(f"表 {table_name}: 成功插入 {arrow_table.num_rows} 条记录")
+        except Exception as e:
+            print(f"表 {table_name} 批量写入失败，改为逐行插入: {str(e)}")
+            insert_data(engine, {table_name: store.to_records(table_name)})
+
+    print("所有数据按顺序插入完成")
+
+
+def save_data_to_db(source_config, target_config, data_file='db_data.json', drop_existing_tables=False, store=None):
+    """
+    :param store: 列式生成的 ColumnStore，设置后直接写入其中的数据，不再读取 data_file
+    """
     # 创建数据库引擎
     source_engine = create_engine(f"postgresql://{source_config['user']}:{source_config['password']}@{source_config['host']}:{source_config['port']}/{source_config['name']}")
     target_engine = create_engine(f"postgresql://{target_config['user']}:{target_config['password']}@{target_config['host']}:{target_config['port']}/{target_config['name']}")
@@ -108,6 +149,10 @@ def save_data_to_db(source_config, target_config, data_file='db_data.json', drop
     # 克隆数据库结构（包括主键和外键约束）
     clone_database_structure(source_engine, target_engine)
     
+    if store is not None:
+        insert_column_store(target_engine, store)
+        return
+
     # 读取 JSON 数据，保持顺序
     with open(data_file, 'r', encoding='utf-8') as f:
         data = json.load(f, object_pairs_hook=OrderedDict)
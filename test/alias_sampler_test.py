@@ -0,0 +1,77 @@
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+import numpy as np
+
+from tools.AliasSampler import AliasSampler
+from tools.KeyPool import KeyPool
+
+
+class TestAliasSampler(unittest.TestCase):
+
+    def test_bulk_draws_follow_weights(self):
+        sampler = AliasSampler(["a", "b", "c"], [0.7, 0.2, 0.1])
+        counts = Counter(sampler.sample(100000, np.random.default_rng(1)).tolist())
+        self.assertAlmostEqual(counts["a"] / 100000, 0.7, delta=0.01)
+        self.assertAlmostEqual(counts["b"] / 100000, 0.2, delta=0.01)
+        self.assertAlmostEqual(counts["c"] / 100000, 0.1, delta=0.01)
+
+    def test_single_draws_follow_weights(self):
+        sampler = AliasSampler([0, 2, 5], [1, 0, 3])
+        rand = random.Random(2)
+        counts = Counter(sampler.draw(rand) for _ in range(20000))
+        self.assertNotIn(2, counts)
+        self.assertAlmostEqual(counts[5] / 20000, 0.75, delta=0.02)
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            AliasSampler(["a", "b"], [0, 0])
+        with self.assertRaises(ValueError):
+            AliasSampler([])
+
+    def test_key_pool_grows(self):
+        pool = KeyPool(capacity=2)
+        pool.extend([10, 20])
+        pool.extend([30])
+        self.assertEqual(pool.values().tolist(), [10, 20, 30])
+        values = set(pool.sample(1000, np.random.default_rng(3)).tolist())
+        self.assertEqual(values, {10, 20, 30})
+
+    def test_weighted_key_pool(self):
+        pool = KeyPool(capacity=2)
+        pool.extend([10, 20])
+        pool.extend([30, 40], weights=[3.0, 0.0])
+        pool.extend([50])
+        counts = Counter(pool.sample(60000, np.random.default_rng(4)).tolist())
+        # 之前和之后未给权重的键值权重为 1
+        self.assertNotIn(40, counts)
+        self.assertAlmostEqual(counts[30] / 60000, 0.5, delta=0.01)
+        self.assertAlmostEqual(counts[10] / 60000, 1 / 6, delta=0.01)
+        with tempfile.TemporaryDirectory() as tmp:
+            for state in (pool.get_state(), pool.get_state(os.path.join(tmp, "keys"))):
+                restored = KeyPool.from_state(state)
+                self.assertEqual(restored.values().tolist(), [10, 20, 30, 40, 50])
+                self.assertNotIn(40, restored.sample(1000, np.random.default_rng(5)).tolist())
+
+    def test_key_pool_side_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, values in (("ints", [1, 2, 3]), ("strs", ["a", "b", "c"])):
+                path = os.path.join(tmp, name)
+                pool = KeyPool()
+                pool.extend(values[:2])
+                earlier = pool.get_state(path)
+                pool.extend(values[2:])
+                self.assertEqual(pool.get_state(path)["size"], 3)
+                self.assertEqual(KeyPool.from_state(pool.get_state(path)).values().tolist(), values)
+                # 从较早的状态恢复后保存，覆盖文件中之后追加的值
+                restored = KeyPool.from_state(earlier)
+                restored.extend(values[:1])
+                self.assertEqual(KeyPool.from_state(restored.get_state(path)).values().tolist(),
+                                 values[:2] + values[:1])
+
+
+if __name__ == '__main__':
+    unittest.main()
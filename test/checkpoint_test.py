@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+
+from gen_data_by_stats import gen_data_by_stats_stream, resume_gen_data_by_stats_stream, build_dependency_graph, \
+    topological_sort, create_generation_state, iter_generate_data, GenerationState
+from test.columnar_test import build_db_stats
+from tools.GenerationMetrics import GenerationMetrics
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(records):
+    def callback(snapshot):
+        if snapshot["completed_records"] >= records:
+            raise Interrupted()
+    return callback
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.stats_file = os.path.join(self.tmp.name, "db_stats.json")
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump(build_db_stats(), f)
+        self.output_dir = os.path.join(self.tmp.name, "out")
+
+    def read_table(self, table):
+        rows = []
+        for file_name in sorted(os.listdir(self.output_dir)):
+            if file_name.startswith(f"{table}."):
+                with open(os.path.join(self.output_dir, file_name), 'r', encoding='utf-8') as f:
+                    rows.extend(json.loads(line) for line in f)
+        return rows
+
+    def test_resume_after_interruption(self):
+        metrics = GenerationMetrics(report_interval=1e-9, callback=interrupt_after(25))
+        with self.assertRaises(Interrupted):
+            gen_data_by_stats_stream(self.stats_file, num_records=50, output_dir=self.output_dir, chunk_size=5,
+                                     seed=1, metrics=metrics, checkpoint_every=2)
+
+        row_counts = resume_gen_data_by_stats_stream(self.output_dir)
+        orders = self.read_table("orders")
+        order_ids = [row["order_id"] for row in orders]
+        self.assertEqual(len(order_ids), 50)
+        self.assertEqual(len(set(order_ids)), 50)
+        self.assertEqual(row_counts["orders"], 50)
+        payments = self.read_table("payments")
+        self.assertEqual(len(payments), 50)
+        self.assertTrue({row["order_id"] for row in payments} <= set(order_ids))
+        self.assertEqual(row_counts["order_lines"], len(self.read_table("order_lines")))
+
+    def test_new_run_replaces_finished_run(self):
+        gen_data_by_stats_stream(self.stats_file, num_records=40, output_dir=self.output_dir, chunk_size=5, seed=1,
+                                 checkpoint_every=2)
+        row_counts = gen_data_by_stats_stream(self.stats_file, num_records=10, output_dir=self.output_dir,
+                                              chunk_size=5, seed=2, checkpoint_every=2)
+        self.assertEqual(sorted(name for name in os.listdir(self.output_dir) if name.startswith("orders.")),
+                         ["orders.segment-00000.ndjson"])
+        self.assertEqual(len(self.read_table("orders")), 10)
+        self.assertEqual(row_counts["order_lines"], len(self.read_table("order_lines")))
+
+    def test_append_runs_with_resume(self):
+        state_file = os.path.join(self.tmp.name, "state.json")
+        gen_data_by_stats_stream(self.stats_file, num_records=20, output_dir=self.output_dir, chunk_size=5,
+                                 seed=1, state_file=state_file, checkpoint_every=2)
+        first_run = sorted(os.listdir(self.output_dir))
+        metrics = GenerationMetrics(report_interval=1e-9, callback=interrupt_after(10))
+        with self.assertRaises(Interrupted):
+            gen_data_by_stats_stream(self.stats_file, num_records=20, output_dir=self.output_dir, chunk_size=5,
+                                     metrics=metrics, state_file=state_file, checkpoint_every=2)
+        with self.assertRaises(ValueError):
+            gen_data_by_stats_stream(self.stats_file, num_records=20, output_dir=self.output_dir, chunk_size=5,
+                                     state_file=state_file, checkpoint_every=2)
+        resume_gen_data_by_stats_stream(self.output_dir)
+
+        # 第二次运行写入 run-00001 的段文件，第一次运行的文件保持不变
+        files = os.listdir(self.output_dir)
+        self.assertTrue(set(first_run) <= set(files))
+        self.assertIn("orders.run-00001.segment-00001.ndjson", files)
+        order_ids = [row["order_id"] for row in self.read_table("orders")]
+        self.assertEqual(len(order_ids), 40)
+        self.assertEqual(len(set(order_ids)), 40)
+        self.assertTrue({row["order_id"] for row in self.read_table("payments")} <= set(order_ids))
+
+    def test_state_keeps_key_pools_small(self):
+        db_stats = build_db_stats()
+        sorted_tables = topological_sort(build_dependency_graph(db_stats))
+        state = create_generation_state(db_stats, sorted_tables, seed=3)
+        for _ in iter_generate_data(db_stats, sorted_tables, 20, 5, state=state):
+            pass
+        saved = state.get_state(os.path.join(self.tmp.name, "pools"))
+        # 主键列的键值池只记录由分配器重建
+        self.assertEqual(saved["key_pools"], {"orders.order_id": {"from_allocator": True}})
+        restored = GenerationState.from_state(db_stats, sorted_tables, json.loads(json.dumps(saved)))
+        self.assertEqual(restored.key_pools["orders.order_id"].values().tolist(),
+                         state.key_pools["orders.order_id"].values().tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
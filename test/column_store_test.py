@@ -0,0 +1,49 @@
+import io
+import json
+import unittest
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from tools.ColumnStore import ColumnStore
+
+
+class TestColumnStore(unittest.TestCase):
+
+    def test_chunks_keep_column_order_and_types(self):
+        store = ColumnStore()
+        ids = np.arange(3, dtype=np.int64)
+        store.append("orders", {"order_id": ids, "channel": np.asarray(["web", "shop", "web"], dtype=object)})
+        store.append("orders", {"order_id": np.asarray([3]), "channel": np.asarray([None], dtype=object)})
+
+        arrow_table = store.to_arrow("orders")
+        self.assertEqual(arrow_table.column_names, ["order_id", "channel"])
+        self.assertEqual(store.num_rows("orders"), 4)
+        self.assertEqual(store.to_records("orders")[3], {"order_id": 3, "channel": None})
+        self.assertEqual(arrow_table.column("order_id").chunk(0).to_numpy().tolist(), ids.tolist())
+
+    def test_write_parquet(self):
+        store = ColumnStore()
+        store.append("t", {"a": np.asarray([1.5, 2.5]), "b": np.asarray([True, False])})
+        buffer = io.BytesIO()
+        store.write_parquet("t", buffer)
+        buffer.seek(0)
+        self.assertEqual(pq.read_table(buffer).to_pylist(), [{"a": 1.5, "b": True}, {"a": 2.5, "b": False}])
+
+    def test_json_export_and_preview(self):
+        store = ColumnStore()
+        store.append("orders", {"order_id": np.arange(3), "channel": np.asarray(["web", None, "店"], dtype=object)})
+        store.append("orders", {"order_id": np.asarray([3]), "channel": np.asarray(["shop"], dtype=object)})
+        store.append("empty", {})
+        store.append("lines", {"qty": np.asarray([1.5])})
+        buffer = io.StringIO()
+        store.write_json(buffer)
+        self.assertEqual(json.loads(buffer.getvalue()), store.to_dict())
+        buffer = io.StringIO()
+        store.write_ndjson("orders", buffer)
+        self.assertEqual([json.loads(line) for line in buffer.getvalue().splitlines()], store.to_records("orders"))
+        self.assertEqual(store.head("orders", 2)["order_id"].tolist(), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from gen_data_by_stats import build_dependency_graph, topological_sort, generate_data_columnar, iter_generate_data, \
+    generate_column_store
+from tools.StreamWriter import StreamWriter
+
+
+def build_db_stats():
+    return {
+        "status_cn": {
+            "is_codetable": True,
+            "data": [{"value": "A"}, {"value": "B"}]
+        },
+        "orders": {
+            "is_codetable": False,
+            "dependency": {"dep_table": "", "dep_relation": "", "dependencies": {}},
+            "columns": [
+                {"name": "order_id", "type": "integer", "stats": {}, "is_primary_key": True, "foreign_key": None},
+                {"name": "amount", "type": "numeric", "stats": {"min": 1.0, "max": 9.0},
+                 "is_primary_key": False, "foreign_key": None},
+                {"name": "channel", "type": "character varying", "stats": {"web": 0.8, "shop": 0.2},
+                 "is_primary_key": False, "foreign_key": None},
+                {"name": "status_cn", "type": "text", "stats": {}, "is_primary_key": False, "foreign_key": None},
+                {"name": "order_date", "type": "date", "stats": {"min_date": "2024-01-01", "max_date": "2024-01-31"},
+                 "sample_data": ["2024-01-02"], "is_primary_key": False, "foreign_key": None},
+            ]
+        },
+        "payments": {
+            "is_codetable": False,
+            "dependency": {},
+            "columns": [
+                {"name": "order_id", "type": "integer", "stats": {}, "is_primary_key": False,
+                 "foreign_key": {"foreign_table_name": "orders", "foreign_column_name": "order_id"}},
+                {"name": "paid", "type": "boolean", "stats": {}, "is_primary_key": False, "foreign_key": None},
+            ]
+        },
+        "order_lines": {
+            "is_codetable": False,
+            "dependency": {
+                "dep_table": "orders",
+                "dep_relation": "1:3",
+                "dependencies": {"order_id": {"field": "order_id", "func": ""},
+                                 "order_ref": {"field": "order_id", "func": "'R' + str(x)"}}
+            },
+            "columns": [
+                {"name": "order_id", "type": "integer", "stats": {}, "is_primary_key": False, "foreign_key": None},
+                {"name": "order_ref", "type": "text", "stats": {}, "is_primary_key": False, "foreign_key": None},
+                {"name": "qty", "type": "smallint", "stats": {"min": 1.0, "max": 5.0},
+                 "is_primary_key": False, "foreign_key": None},
+            ]
+        }
+    }
+
+
+class TestColumnarGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.db_stats = build_db_stats()
+        self.sorted_tables = topological_sort(build_dependency_graph(self.db_stats))
+
+    def test_root_table_values(self):
+        data = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=200, seed=1)
+        orders = data["orders"]
+        self.assertEqual(len(orders), 200)
+        self.assertEqual(len({row["order_id"] for row in orders}), 200)
+        self.assertTrue(all(1.0 <= row["amount"] <= 9.0 for row in orders))
+        self.assertTrue({row["channel"] for row in orders} <= {"web", "shop"})
+        self.assertTrue({row["status_cn"] for row in orders} <= {"A", "B"})
+        self.assertTrue(all("2024-01-01" <= row["order_date"] <= "2024-01-31" for row in orders))
+        self.assertNotIn("status_cn", data)
+
+    def test_child_rows_follow_dep_relation(self):
+        data = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=100, seed=2)
+        order_ids = {row["order_id"] for row in data["orders"]}
+        lines = data["order_lines"]
+        self.assertTrue(100 <= len(lines) <= 300)
+        self.assertTrue(all(row["order_id"] in order_ids for row in lines))
+        self.assertTrue(all(row["order_ref"] == f"R{row['order_id']}" for row in lines))
+
+    def test_child_counts_follow_captured_distribution(self):
+        self.db_stats["order_lines"]["dependency"]["dep_distribution"] = {"0": 1, "2": 1}
+        data = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=400, seed=6)
+        counts = Counter(row["order_id"] for row in data["order_lines"])
+        self.assertEqual(set(counts.values()), {2})
+        self.assertTrue(100 < len(counts) < 300)
+
+    def test_foreign_keys_reference_earlier_chunks(self):
+        order_ids = set()
+        payment_order_ids = []
+        for table, columns in iter_generate_data(self.db_stats, self.sorted_tables, num_records=50, chunk_size=7,
+                                                 seed=5):
+            if table == "orders":
+                order_ids.update(columns["order_id"].tolist())
+            elif table == "payments":
+                payment_order_ids.extend(columns["order_id"].tolist())
+        self.assertEqual(len(payment_order_ids), 50)
+        self.assertTrue(set(payment_order_ids) <= order_ids)
+
+    def test_seed_is_reproducible(self):
+        first = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=20, seed=3)
+        second = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=20, seed=3)
+        self.assertEqual(first, second)
+
+    def test_shards_have_disjoint_primary_keys(self):
+        data = generate_data_columnar(self.db_stats, self.sorted_tables, num_records=301, seed=4, workers=3)
+        order_ids = [row["order_id"] for row in data["orders"]]
+        self.assertEqual(len(order_ids), 301)
+        self.assertEqual(len(set(order_ids)), 301)
+
+    def test_append_runs_continue_from_saved_state(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = os.path.join(tmp, "state.json")
+            first = generate_column_store(self.db_stats, self.sorted_tables, num_records=50, seed=7,
+                                          state_file=state_file)
+            second = generate_column_store(self.db_stats, self.sorted_tables, num_records=50,
+                                           state_file=state_file)
+        first_ids = set(first.to_arrow("orders").column("order_id").to_pylist())
+        second_ids = set(second.to_arrow("orders").column("order_id").to_pylist())
+        self.assertEqual(len(second_ids), 50)
+        self.assertFalse(first_ids & second_ids)
+        payment_ids = set(second.to_arrow("payments").column("order_id").to_pylist())
+        self.assertTrue(payment_ids <= first_ids | second_ids)
+        self.assertTrue(payment_ids & first_ids)
+
+    def test_stream_writer_batches_with_different_nulls(self):
+        # 第一个数据块中 remark 全为空、amount 部分为空，第二个数据块相反
+        batches = [
+            {"id": np.array([1, 2]), "amount": np.array([1.5, None], dtype=object),
+             "remark": np.array([None, None], dtype=object)},
+            {"id": np.array([3, 4]), "amount": np.array([None, None], dtype=object),
+             "remark": np.array(["a", None], dtype=object)},
+        ]
+        expected = [{"id": 1, "amount": 1.5, "remark": None}, {"id": 2, "amount": None, "remark": None},
+                    {"id": 3, "amount": None, "remark": "a"}, {"id": 4, "amount": None, "remark": None}]
+        for fmt in StreamWriter.FORMATS:
+            with tempfile.TemporaryDirectory() as tmp:
+                with StreamWriter(tmp, fmt) as writer:
+                    for batch in batches:
+                        writer.write("orders", batch)
+                path = writer.path_for("orders")
+                if fmt == 'parquet':
+                    rows = pq.read_table(path).to_pylist()
+                else:
+                    with open(path, encoding='utf-8') as f:
+                        rows = [json.loads(line) for line in f]
+            self.assertEqual(rows, expected, fmt)
+            self.assertEqual(writer.row_counts, {"orders": 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
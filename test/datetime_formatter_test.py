@@ -0,0 +1,32 @@
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from tools.DateTimeFormatter import DateTimeFormatter
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class TestDateTimeFormatter(unittest.TestCase):
+
+    def test_matches_strftime(self):
+        start = int((datetime(1965, 3, 1) - EPOCH).total_seconds())
+        end = int((datetime(2024, 12, 31, 23, 59, 59) - EPOCH).total_seconds())
+        seconds = np.random.default_rng(1).integers(start, end, size=500, endpoint=True)
+        seconds[:2] = [start, end]
+        for date_format in ["%Y-%m-%d", "%Y%m%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%Y年%m月%d日",
+                            "%Y年%m月%d日 %H时%M分", "%Y年%m月", "%H:%M %Y-%m-%d"]:
+            formatter = DateTimeFormatter(date_format, start, end)
+            expected = [(EPOCH + timedelta(seconds=int(second))).strftime(date_format) for second in seconds]
+            self.assertEqual(formatter.format(seconds).tolist(), expected, date_format)
+            self.assertEqual(formatter.format_one(int(seconds[3])), expected[3], date_format)
+            # 查找表路径
+            if formatter._parts is not None:
+                formatter._build_tables()
+            self.assertEqual(formatter.format(seconds).tolist(), expected, date_format)
+            self.assertEqual(formatter.format_one(int(seconds[3])), expected[3], date_format)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+import random
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from get_db_statistic import build_aggregate_query, aggregate_analysis, sample_fraction, sampling_error, \
+    tablesample_clause, catalog_analysis, profile_in_groups, table_fingerprint, TableCatalog, \
+    child_distribution_from_stats, build_table_stats, load_catalog, column_kind, CATALOG_COLUMNS_QUERY, \
+    CATALOG_INDEXES_QUERY, CATALOG_FOREIGN_KEYS_QUERY
+
+
+class TestAggregatePushdown(unittest.TestCase):
+
+    def test_single_aggregate_query(self):
+        query = build_aggregate_query("orders", [("amount", "numeric"), ("remark", "text")])
+        self.assertEqual(query.count(" FROM "), 1)
+        self.assertIn('avg("amount")::float8 AS c0_mean', query)
+        self.assertIn('max(length("remark")) FILTER', query)
+
+    def test_aggregate_analysis(self):
+        row = pd.Series({"total_rows": 10, "c0_nulls": 2, "c0_min": 1, "c0_max": 9, "c0_mean": 4.5,
+                         "c1_nulls": 10})
+        self.assertEqual(aggregate_analysis(row, 0, 'numeric', 10),
+                         {"stats": {"mean": 4.5, "min": 1.0, "max": 9.0}, "null_rate": 0.2, "sample_data": []})
+        self.assertEqual(aggregate_analysis(row, 1, 'text', 10)["stats"], {"error": "No non-null values found"})
+
+
+class TestTableSample(unittest.TestCase):
+
+    def test_clause(self):
+        fraction = sample_fraction(10000000, 100000)
+        self.assertEqual(fraction, 0.01)
+        self.assertEqual(tablesample_clause('system', fraction, 7), "TABLESAMPLE SYSTEM (1.000000) REPEATABLE (7)")
+        self.assertEqual(sample_fraction(5000, 100000), 1.0)
+        with self.assertRaises(ValueError):
+            tablesample_clause('random', fraction)
+
+    def test_error_bound(self):
+        self.assertAlmostEqual(sampling_error(10000, 10 ** 9), 0.0098, places=4)
+        self.assertEqual(sampling_error(1000, 1000), 0.0)
+
+    def test_sampled_distinct_count_is_marked(self):
+        catalog = TableCatalog([["id", "integer"]], ["id"], [], [])
+        analysis = {"stats": {"min": 1.0}, "null_rate": 0.0, "sample_data": [], "distinct_count": 1000}
+        sample = {"method": "SYSTEM", "fraction": 0.01, "seed": 1, "sample_rows": 1000}
+        scans = [(1000, {"id": analysis}, '', None, False),
+                 (100000, {"id": analysis}, 'TABLESAMPLE SYSTEM (1.000000) REPEATABLE (1)', sample, False)]
+        with mock.patch('get_db_statistic.profile_scan_columns', side_effect=scans):
+            exact, _ = build_table_stats(None, "t", catalog, {}, {}, {})
+            sampled, _ = build_table_stats(None, "t", catalog, {}, {}, {})
+        self.assertEqual(exact["columns"][0]["distinct_count"], 1000)
+        self.assertNotIn("sample", exact["table_stats"])
+        # 样本中的不同取值个数不作为全表的基数
+        self.assertNotIn("distinct_count", sampled["columns"][0])
+        self.assertEqual(sampled["columns"][0]["sample_distinct_count"], 1000)
+        self.assertEqual(sampled["table_stats"]["sample"]["distinct_count"], "sample")
+
+
+class TestCatalogStatistics(unittest.TestCase):
+
+    def test_numeric_from_pg_stats(self):
+        stats = {"null_frac": 0.1, "most_common_vals": ["5", "7"], "most_common_freqs": [0.3, 0.2],
+                 "histogram_bounds": ["1", "3", "11"]}
+        analysis = catalog_analysis(stats, 'numeric', rand=random.Random(1))
+        self.assertEqual(analysis["stats"]["min"], 1.0)
+        self.assertEqual(analysis["stats"]["max"], 11.0)
+        # (5*0.3 + 7*0.2 + 0.4*(2+7)/2) / 0.9
+        self.assertAlmostEqual(analysis["stats"]["mean"], 4.7 / 0.9)
+        self.assertTrue(set(analysis["sample_data"]) <= {1, 3, 5, 7, 11})
+
+    def test_blank_values_and_fallback(self):
+        stats = {"null_frac": 0.1, "most_common_vals": ["A", " "], "most_common_freqs": [0.6, 0.3],
+                 "histogram_bounds": None}
+        analysis = catalog_analysis(stats, 'character')
+        self.assertAlmostEqual(analysis["null_rate"], 0.4)
+        self.assertAlmostEqual(analysis["stats"]["A"], 1.0)
+        # 没有高频值的字符列无法由 pg_stats 描述
+        unique = {"null_frac": 0.0, "most_common_vals": None, "most_common_freqs": None, "histogram_bounds": ["a", "b"]}
+        self.assertIsNone(catalog_analysis(unique, 'character'))
+
+    def test_child_distribution(self):
+        # 1000 条子记录：一个父记录有 100 条，其余 900 条分给 399 个父记录，1000 个父记录中 600 个没有子记录
+        stats = {"null_frac": 0.0, "n_distinct": -0.4, "most_common_freqs": [0.1]}
+        distribution = child_distribution_from_stats(stats, 1000, 1000)
+        self.assertEqual(distribution["100"], 1)
+        self.assertEqual(distribution["0"], 600)
+        self.assertEqual(sum(distribution.values()), 1000)
+        self.assertEqual(sum(int(count) * parents for count, parents in distribution.items()), 1000)
+
+    def test_sampled_child_distribution_matches_true_one(self):
+        # 1000 条父记录各有 0~9 条子记录；抽样统计时不对抽样的子记录分组（会低估每条父记录的子记录数），
+        # 由 ANALYZE 的 pg_stats 推算
+        rand = random.Random(3)
+        child_counts = [rand.randrange(10) for _ in range(1000)]
+        child_rows = sum(child_counts)
+        top = sorted(child_counts, reverse=True)[:5]
+        stats = {"null_frac": 0.0, "n_distinct": -sum(1 for count in child_counts if count) / child_rows,
+                 "most_common_freqs": [count / child_rows for count in top]}
+        catalog = TableCatalog([["id", "integer"], ["parent_id", "integer"]], ["id"], [], [])
+        dependency = {"dep_table": "parent", "dependencies": {"parent_id": {"field": "id"}}}
+        profiling = {"child_distribution": True}
+        sample = {"method": "BERNOULLI", "fraction": 0.01, "seed": 1, "sample_rows": 45}
+        analysis = {"stats": {"min": 1.0}, "null_rate": 0.0, "sample_data": []}
+        scan = (child_rows, {"id": analysis, "parent_id": analysis}, 'TABLESAMPLE BERNOULLI (1.0) REPEATABLE (1)',
+                sample, False)
+        with mock.patch('get_db_statistic.profile_scan_columns', return_value=scan), \
+                mock.patch('get_db_statistic.get_child_distribution') as exact, \
+                mock.patch('get_db_statistic.get_reltuples', side_effect=lambda engine, table:
+                           {"child": child_rows, "parent": 1000}[table]), \
+                mock.patch('get_db_statistic.get_pg_stats', return_value={"parent_id": stats}):
+            entry, complete = build_table_stats(None, "child", catalog, dependency, {}, profiling)
+        exact.assert_not_called()
+        self.assertTrue(complete)
+        distribution = {int(count): parents for count, parents in entry["dependency"]["dep_distribution"].items()}
+        self.assertAlmostEqual(sum(distribution.values()), 1000, delta=3)
+        self.assertEqual(distribution[0], child_counts.count(0))
+        self.assertAlmostEqual(sum(count * parents for count, parents in distribution.items()) / child_rows, 1,
+                               delta=0.01)
+
+
+class TestLoadCatalog(unittest.TestCase):
+
+    def setUp(self):
+        # 三个 pg_catalog 查询的结果：列按 attnum 排序，索引列按索引中的顺序排序，外键列按 conkey 顺序成对展开
+        columns = pd.DataFrame([
+            ["order_items", "order_id", "integer"],
+            ["order_items", "line_no", "integer"],
+            ["order_items", "sku", "character varying"],
+            ["order_items", "created_at", "timestamp without time zone"],
+            ["order_items", "tags", "ARRAY"],
+            # 域类型的列返回基础类型，与 information_schema.columns.data_type 一致
+            ["order_items", "email", "character varying"],
+            ["shipments", "shipment_id", "bigint"],
+            ["shipments", "order_id", "integer"],
+            ["shipments", "line_no", "integer"],
+        ], columns=["table_name", "column_name", "data_type"])
+        indexes = pd.DataFrame([
+            ["order_items", "order_id", True],
+            ["order_items", "line_no", True],
+            ["order_items", "sku", False],
+            ["order_items", "email", False],
+            ["shipments", "shipment_id", True],
+        ], columns=["table_name", "attname", "indisprimary"])
+        fk = ["public", "fk_shipments_items", "shipments"]
+        foreign_keys = pd.DataFrame([
+            fk + ["order_id", "public", "order_items", "order_id"],
+            fk + ["line_no", "public", "order_items", "line_no"],
+        ], columns=["table_schema", "constraint_name", "table_name", "column_name", "foreign_table_schema",
+                    "foreign_table_name", "foreign_column_name"])
+        self.results = {CATALOG_COLUMNS_QUERY: columns, CATALOG_INDEXES_QUERY: indexes,
+                        CATALOG_FOREIGN_KEYS_QUERY: foreign_keys}
+
+    def read_sql(self, query, engine, params=None):
+        self.assertEqual(params, {"schema": "public"})
+        return self.results[str(query)].copy()
+
+    def test_catalog_from_query_results(self):
+        with mock.patch('get_db_statistic.pd.read_sql', side_effect=self.read_sql):
+            catalog = load_catalog(None)
+        self.assertEqual(list(catalog), ["order_items", "shipments"])
+        items = catalog["order_items"]
+        self.assertEqual(items.columns, [["order_id", "integer"], ["line_no", "integer"],
+                                         ["sku", "character varying"],
+                                         ["created_at", "timestamp without time zone"],
+                                         ["tags", "ARRAY"], ["email", "character varying"]])
+        self.assertEqual([column_kind(data_type) for _, data_type in items.columns],
+                         ['numeric', 'numeric', 'character', 'date', None, 'character'])
+        self.assertEqual(items.primary_keys, ["order_id", "line_no"])
+        self.assertEqual(items.unique_constraints, ["sku", "email"])
+        self.assertEqual(items.foreign_keys, [])
+
+        shipments = catalog["shipments"]
+        self.assertEqual(shipments.primary_keys, ["shipment_id"])
+        self.assertEqual(shipments.unique_constraints, [])
+        self.assertEqual([(fk["column_name"], fk["foreign_table_name"], fk["foreign_column_name"])
+                          for fk in shipments.foreign_keys],
+                         [("order_id", "order_items", "order_id"), ("line_no", "order_items", "line_no")])
+        self.assertEqual({fk["constraint_name"] for fk in shipments.foreign_keys}, {"fk_shipments_items"})
+
+
+class TestColumnGroups(unittest.TestCase):
+
+    def test_groups_are_merged(self):
+        columns = [(f"c{i}", "integer") for i in range(7)]
+        profiled = []
+
+        def profile(group):
+            profiled.append(len(group))
+            return 100, {column: {"stats": {}} for column, _ in reversed(group)}
+
+        total_rows, analyses = profile_in_groups(profile, columns, group_size=3, workers=3)
+        self.assertEqual(total_rows, 100)
+        self.assertEqual(sorted(profiled), [1, 3, 3])
+        self.assertEqual(set(analyses), {column for column, _ in columns})
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_fingerprint_tracks_changes(self):
+        catalog = TableCatalog([["id", "integer"], ["parent_id", "integer"]], ["id"], [], [])
+        dependency = {"dep_table": "parent", "dep_relation": "1:3", "dependencies": {"parent_id": {"field": "id"}}}
+        activity = {"child": {"n_tup_ins": 10, "n_tup_upd": 0, "n_tup_del": 0, "n_mod_since_analyze": 10,
+                              "relation_size": 8192},
+                    "parent": {"n_tup_ins": 3, "n_tup_upd": 0, "n_tup_del": 0, "n_mod_since_analyze": 0,
+                               "relation_size": 8192}}
+        fingerprint = table_fingerprint("child", activity, catalog, dependency, {})
+        self.assertEqual(fingerprint, table_fingerprint("child", activity, catalog, dependency, {}))
+
+        # ANALYZE 重置 n_mod_since_analyze，数据没有变化，指纹不变
+        analyzed = {table: {**counters, "n_mod_since_analyze": 0} for table, counters in activity.items()}
+        self.assertEqual(fingerprint, table_fingerprint("child", analyzed, catalog, dependency, {}))
+
+        # 父表的变化会影响子记录数分布
+        activity["parent"] = {**activity["parent"], "n_tup_ins": 4}
+        self.assertNotEqual(fingerprint, table_fingerprint("child", activity, catalog, dependency, {}))
+        self.assertNotEqual(fingerprint, table_fingerprint("child", activity, catalog, dependency,
+                                                           {"specified_columns": [{"id": "name"}]}))
+        self.assertIsNone(table_fingerprint("some_view", activity, catalog, {}, {}))
+
+    def test_failed_profile_is_incomplete(self):
+        catalog = TableCatalog([["id", "integer"]], ["id"], [], [])
+        dependency = {"dep_table": "parent", "dependencies": {"parent_id": {"field": "id"}}}
+        profiling = {"child_distribution": True}
+        scan = (10, {"id": {"stats": {"min": 1.0}, "null_rate": 0.0, "sample_data": []}}, '', None, False)
+        with mock.patch('get_db_statistic.profile_scan_columns', return_value=scan), \
+                mock.patch('get_db_statistic.get_child_distribution', side_effect=RuntimeError("timeout")):
+            entry, complete = build_table_stats(None, "child", catalog, dependency, {}, profiling)
+        self.assertFalse(complete)
+        self.assertNotIn("dep_distribution", entry["dependency"])
+        with mock.patch('get_db_statistic.profile_scan_columns', return_value=scan), \
+                mock.patch('get_db_statistic.get_child_distribution', return_value={"1": 10}):
+            self.assertTrue(build_table_stats(None, "child", catalog, dependency, {}, profiling)[1])
+        # 默认不采集子记录数分布，不对子表额外扫描，生成数据时使用 dep_relation
+        with mock.patch('get_db_statistic.profile_scan_columns', return_value=scan), \
+                mock.patch('get_db_statistic.get_child_distribution') as exact:
+            entry, complete = build_table_stats(None, "child", catalog, dependency, {}, {})
+        exact.assert_not_called()
+        self.assertTrue(complete)
+        self.assertNotIn("dep_distribution", entry["dependency"])
+
+
+if __name__ == '__main__':
+    unittest.main()
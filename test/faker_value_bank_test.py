@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from tools.FakerValueBank import FakerValueBank
+
+
+class TestFakerValueBank(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_values_are_cached_between_runs(self):
+        bank = FakerValueBank(cache_dir=self.tmp.name, pool_size=50, seed=1)
+        bank.sample('name', 200, np.random.default_rng(1))
+        bank.wait()
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'zh_CN', 'seed-1', 'name.json')))
+
+        cached = FakerValueBank(cache_dir=self.tmp.name, pool_size=50, seed=1)
+        # 第二次运行直接读取缓存，不再调用 Faker
+        with mock.patch.object(cached, '_generate', side_effect=AssertionError):
+            cached.sample('name', 10, np.random.default_rng(2))
+        self.assertEqual(cached._pools['name'].tolist(), bank._values['name'][:50])
+
+    def test_seeded_draws_are_reproducible(self):
+        # 有缓存和没有缓存、后台补充快慢不同时，相同种子的抽取结果相同
+        runs = []
+        for cache_dir in (self.tmp.name, self.tmp.name, None):
+            bank = FakerValueBank(cache_dir=cache_dir, pool_size=20, max_size=100, seed=5)
+            rng = np.random.default_rng(7)
+            runs.append([bank.sample('name', 15, rng).tolist() for _ in range(10)])
+            bank.rewind()
+            self.assertEqual(bank.sample('name', 15, np.random.default_rng(7)).tolist(), runs[-1][0])
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(runs[0], runs[2])
+        other = FakerValueBank(cache_dir=None, pool_size=20, seed=6)
+        self.assertNotEqual(other.sample('name', 15, np.random.default_rng(7)).tolist(), runs[0][0])
+
+    def test_refill_after_reuse_budget(self):
+        bank = FakerValueBank(cache_dir=None, pool_size=20, max_size=40, seed=3)
+        bank.sample('address', 25, np.random.default_rng(3))
+        bank.wait()
+        self.assertEqual(len(bank._pools['address']), 40)
+        bank.sample('address', 100, np.random.default_rng(4))
+        bank.wait()
+        self.assertEqual(len(bank._pools['address']), 40)
+
+    def test_unsupported_provider(self):
+        bank = FakerValueBank(cache_dir=None, pool_size=5)
+        self.assertFalse(bank.supports('date_object'))
+        self.assertTrue(bank.supports('phone_number'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+from tools.GenerationMetrics import GenerationMetrics
+
+
+class TestGenerationMetrics(unittest.TestCase):
+
+    def setUp(self):
+        # 用可控的时钟代替 time.perf_counter
+        self.now = 100.0
+        patcher = mock.patch('tools.GenerationMetrics.time')
+        self.addCleanup(patcher.stop)
+        patcher.start().perf_counter.side_effect = lambda: self.now
+
+    def test_counters_and_snapshot(self):
+        metrics = GenerationMetrics(total_records=10, report_interval=0)
+        metrics.add_rows("orders", 4)
+        metrics.add_rows("payments")
+        metrics.add_dropped("payments", 2)
+        metrics.add_pk_shortfall("orders")
+        with metrics.time_column("integer"):
+            self.now += 0.5
+        with metrics.time_table("orders"):
+            self.now += 1.5
+        metrics.advance(4)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["completed_records"], 4)
+        self.assertAlmostEqual(snapshot["progress"], 0.4)
+        self.assertEqual(snapshot["rows"], 5)
+        self.assertAlmostEqual(snapshot["elapsed"], 2.0)
+        self.assertAlmostEqual(snapshot["rows_per_second"], 2.5)
+        self.assertEqual(snapshot["tables"], {"orders": {"rows": 4, "dropped": 0, "pk_shortfall": 1},
+                                              "payments": {"rows": 1, "dropped": 2, "pk_shortfall": 0}})
+        self.assertEqual(snapshot["column_seconds"], {"integer": 0.5})
+        self.assertEqual(snapshot["table_seconds"], {"orders": 1.5})
+
+        # 快照是副本，之后的更新不影响已取得的快照
+        metrics.add_rows("orders")
+        self.assertEqual(snapshot["tables"]["orders"]["rows"], 4)
+
+        merged = GenerationMetrics(total_records=10, report_interval=0)
+        merged.merge(snapshot)
+        merged.merge(snapshot)
+        self.assertEqual(merged.completed_records, 8)
+        self.assertEqual(merged.tables["payments"], {"rows": 2, "dropped": 4, "pk_shortfall": 0})
+        self.assertEqual(merged.column_seconds, {"integer": 1.0})
+        self.assertEqual(merged.table_seconds, {"orders": 3.0})
+
+    def test_interval_reporting(self):
+        reports = []
+        metrics = GenerationMetrics(total_records=100, report_interval=10, callback=reports.append)
+        metrics.add_rows("orders", 10)
+        metrics.advance(10)
+        self.now += 5
+        metrics.advance(10)
+        self.assertEqual(reports, [])
+
+        self.now += 5
+        metrics.advance(10)
+        self.assertEqual([report["completed_records"] for report in reports], [30])
+        self.assertAlmostEqual(reports[0]["rows_per_second"], 1.0)
+
+        # 间隔从上一次输出开始计算
+        self.now += 9
+        metrics.advance(10)
+        self.assertEqual(len(reports), 1)
+
+        # 结束时强制输出一次，进度没有变化时不重复输出
+        metrics.maybe_report(force=True)
+        metrics.maybe_report(force=True)
+        self.assertEqual([report["completed_records"] for report in reports], [30, 40])
+
+    def test_no_reporting_without_interval(self):
+        reports = []
+        metrics = GenerationMetrics(report_interval=None, callback=reports.append)
+        self.now += 1000
+        metrics.advance(5)
+        self.assertEqual(reports, [])
+        self.assertEqual(metrics.progress, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
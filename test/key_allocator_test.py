@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from gen_data_by_stats import allocate_primary_keys
+from tools.KeyAllocator import FeistelPermutation, KeyAllocator
+
+
+class TestKeyAllocator(unittest.TestCase):
+
+    def test_permutation_is_bijection(self):
+        for size in (1, 2, 7, 1000, 65537):
+            values = FeistelPermutation(size, seed=11).permute(np.arange(size, dtype=np.uint64))
+            self.assertEqual(sorted(values.tolist()), list(range(size)))
+
+    def test_shards_are_disjoint_and_overflow_is_unique(self):
+        allocators = [KeyAllocator(100, seed=5, shard_index=i, shard_count=4) for i in range(4)]
+        values = [value for allocator in allocators for value in allocator.allocate(60).tolist()]
+        self.assertEqual(len(values), 240)
+        self.assertEqual(len(set(values)), 240)
+
+    def test_state_round_trip(self):
+        allocator = KeyAllocator(1000, seed=9)
+        first = allocator.allocate(10).tolist()
+        restored = KeyAllocator.from_state(allocator.get_state())
+        self.assertEqual(restored.allocate(10).tolist(), allocator.allocate(10).tolist())
+        self.assertFalse(set(first) & set(restored.allocate(10).tolist()))
+
+    def test_primary_keys_respect_observed_range(self):
+        column = {"name": "id", "type": "integer", "stats": {"min": 100.0, "max": 199.0}}
+        key_allocators = {}
+        values = allocate_primary_keys(key_allocators, "t", column, 100, key_seed=1).tolist()
+        self.assertEqual(sorted(values), list(range(100, 200)))
+        more = allocate_primary_keys(key_allocators, "t", column, 5, key_seed=1).tolist()
+        self.assertEqual(more, [200, 201, 202, 203, 204])
+
+
+if __name__ == '__main__':
+    unittest.main()
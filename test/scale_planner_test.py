@@ -0,0 +1,31 @@
+import unittest
+
+from gen_data_by_stats import build_dependency_graph, topological_sort, generate_column_store
+from test.columnar_test import build_db_stats
+from tools.ScalePlanner import plan_scale
+
+
+class TestScalePlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.db_stats = build_db_stats()
+        for table, rows in {"orders": 1000, "payments": 400, "order_lines": 5000}.items():
+            self.db_stats[table]["table_stats"] = {"total_rows": rows}
+        self.sorted_tables = topological_sort(build_dependency_graph(self.db_stats))
+
+    def test_plan_targets(self):
+        plan = plan_scale(self.db_stats, self.sorted_tables, 0.5)
+        self.assertEqual(plan.num_records, 500)
+        self.assertEqual(plan.expected_rows, {"orders": 500, "payments": 200, "order_lines": 2500})
+        self.assertAlmostEqual(plan.child_factors["order_lines"], 2.5)
+
+    def test_generated_rows_follow_plan(self):
+        plan = plan_scale(self.db_stats, self.sorted_tables, 2)
+        store = generate_column_store(self.db_stats, self.sorted_tables, plan.num_records, seed=1, scale_plan=plan)
+        self.assertEqual(store.num_rows("orders"), 2000)
+        self.assertEqual(store.num_rows("payments"), 800)
+        self.assertAlmostEqual(store.num_rows("order_lines") / 10000, 1, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
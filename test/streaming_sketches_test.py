@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tools.StreamingSketches import HyperLogLog, MisraGries, RunningMoments, TDigest
+
+
+class TestStreamingSketches(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_moments_and_quantiles(self):
+        values = self.rng.normal(10, 3, 200000)
+        moments = RunningMoments()
+        digest = TDigest()
+        for chunk in np.array_split(values, 20):
+            moments.update(chunk)
+            digest.update(chunk)
+        self.assertAlmostEqual(moments.mean, values.mean())
+        self.assertAlmostEqual(moments.std, values.std())
+        self.assertEqual((moments.min, moments.max), (values.min(), values.max()))
+        for q in (0.01, 0.5, 0.99):
+            self.assertAlmostEqual(digest.quantile(q), np.quantile(values, q), delta=0.05)
+        self.assertLess(len(digest._means), 500)
+
+    def test_frequent_values(self):
+        values = pd.Series(self.rng.zipf(1.5, 200000))
+        frequent = MisraGries(100)
+        for chunk in np.array_split(np.arange(len(values)), 20):
+            frequent.update(values.iloc[chunk])
+        expected = values.value_counts()
+        self.assertEqual([value for value, _ in frequent.top(3)], expected.index[:3].tolist())
+        for value, count in frequent.top(3):
+            self.assertLessEqual(expected[value] - count, len(values) / 101)
+        self.assertLessEqual(len(frequent._counts), 100)
+
+    def test_distinct_count(self):
+        values = pd.Series(self.rng.integers(0, 50000, 200000)).astype(str)
+        distinct = HyperLogLog()
+        for chunk in np.array_split(np.arange(len(values)), 20):
+            distinct.update(values.iloc[chunk])
+        self.assertAlmostEqual(distinct.estimate() / values.nunique(), 1, delta=0.03)
+
+
+if __name__ == '__main__':
+    unittest.main()
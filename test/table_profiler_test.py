@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from tools.TableProfiler import TableProfiler
+
+
+class TestTableProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            "amount": [1.0, 2.5, None, 4.0, 10.0, None],
+            "status": ["A", "B", "A", "", "  ", None],
+            "remark": ["abc", "de", None, "fghij", " ", "k"],
+            "created": pd.to_datetime(["2020-01-02", None, "2019-05-06", "2021-03-04", None, "2020-07-08"]),
+        })
+        self.columns = [("amount", "numeric"), ("status", "character"), ("remark", "text"), ("created", "date")]
+
+    def test_chunks_match_single_pass(self):
+        whole = TableProfiler(self.columns, seed=1)
+        whole.update(self.df)
+        chunked = TableProfiler(self.columns, seed=1)
+        for start in range(0, len(self.df), 4):
+            chunked.update(self.df.iloc[start:start + 4])
+        self.assertEqual(chunked.rows, 6)
+        for name, result in whole.result().items():
+            self.assertEqual(chunked.result()[name]["stats"], result["stats"])
+            self.assertEqual(chunked.result()[name]["null_rate"], result["null_rate"])
+
+    def test_stats(self):
+        profiler = TableProfiler(self.columns)
+        profiler.update(self.df)
+        result = profiler.result()
+        amount = result["amount"]["stats"]
+        self.assertEqual((amount["mean"], amount["min"], amount["max"]), (4.375, 1.0, 10.0))
+        self.assertAlmostEqual(amount["std"], np.std([1.0, 2.5, 4.0, 10.0]))
+        self.assertEqual(result["amount"]["distinct_count"], 4)
+        self.assertAlmostEqual(result["amount"]["null_rate"], 2 / 6)
+        self.assertEqual(result["status"]["stats"], {"A": 2 / 3, "B": 1 / 3})
+        self.assertAlmostEqual(result["status"]["null_rate"], 3 / 6)
+        self.assertEqual(result["remark"]["stats"], {"min_length": 1, "max_length": 5, "avg_length": 11 / 4})
+        self.assertEqual(result["created"]["stats"], {"min_date": "2019-05-06 00:00:00",
+                                                      "max_date": "2021-03-04 00:00:00"})
+        self.assertEqual(len(result["created"]["sample_data"]), 3)
+        self.assertTrue(set(result["status"]["sample_data"]) <= {"A", "B"})
+
+
+if __name__ == '__main__':
+    unittest.main()
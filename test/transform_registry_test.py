@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from tools.TransformRegistry import TransformRegistry, registry
+
+
+class TestTransformRegistry(unittest.TestCase):
+
+    def test_named_and_expression_transforms(self):
+        self.assertEqual(registry.compile("upper").one("ab"), "AB")
+        self.assertEqual(registry.compile("'C' + str(x)[:2]").one(1234), "C12")
+        self.assertEqual(registry.compile("lambda v: v * 10 + 1").one(3), 31)
+        self.assertIs(registry.compile("x * 2"), registry.compile("x * 2"))
+
+    def test_batch_matches_single_values(self):
+        values = np.arange(5)
+        for func in ["x * 10 + 1", "str(x)", "x if x > 2 else -x"]:
+            transform = registry.compile(func)
+            self.assertEqual(transform.batch(values).tolist(), [transform.one(value) for value in values.tolist()])
+
+    def test_batch_matches_python_integer_semantics(self):
+        values = np.asarray([-7, -1, 2, 3, 2 ** 61], dtype=np.int64)
+        for func in ["x // 2", "x % 3", "-7 // x", "x * 8 + 1", "x * x", "x / 4",
+                     "pow(x, 3)", "-x"]:
+            transform = registry.compile(func)
+            self.assertEqual(transform.batch(values).tolist(), [transform.one(value) for value in values.tolist()],
+                             func)
+        # 除数含 0 时与逐值求值一样抛出 ZeroDivisionError，而不是得到 0 或 inf
+        for func in ["10 // x", "10 % x", "1 / x"]:
+            with self.assertRaises(ZeroDivisionError):
+                registry.compile(func).batch(np.asarray([1, 0]))
+            with self.assertRaises(ZeroDivisionError):
+                registry.compile(func).batch(np.asarray([1.0, 0.0]))
+
+    def test_int_and_abs_batches_match_single_values(self):
+        min_int = np.iinfo(np.int64).min
+        cases = [
+            np.asarray([min_int, -5, 0, np.iinfo(np.int64).max], dtype=np.int64),
+            np.asarray([2 ** 64 - 1, 3], dtype=np.uint64),
+            np.asarray([-2.7, 0.5, 9.2e18, -9.3e18, 1e19, 1e300]),
+            np.asarray([True, False]),
+            np.asarray([2 ** 70, -(2 ** 80), 4], dtype=object),
+            np.asarray(["12", "-3"]),
+        ]
+        for func in ("int", "abs", "abs(x) + 1", "int(x)"):
+            transform = registry.compile(func)
+            for values in cases:
+                if func != "int" and func != "int(x)" and values.dtype.kind == 'U':
+                    continue
+                expected = [transform.one(value) for value in values.tolist()]
+                self.assertEqual(transform.batch(values).tolist(), expected, f"{func} {values.dtype}")
+        # NaN 和无穷在两种方式下都抛出 int 的异常，而不是得到任意的整数
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises((ValueError, OverflowError)):
+                registry.compile("int").batch(np.asarray([1.0, value]))
+
+    def test_rejects_unsafe_expressions(self):
+        for func in ["__import__('os')", "x.__class__", "open('f')", "lambda a, b: a", "9 ** 9 ** 9", "_bounded_mul"]:
+            with self.assertRaises(ValueError):
+                registry.compile(func)
+        for func in ["pow(9, 99999)", "'x' * 10000000000", "str(x) * 10000000000"]:
+            with self.assertRaises(ValueError):
+                registry.compile(func).one(1)
+
+    def test_register_custom_transform(self):
+        custom = TransformRegistry()
+
+        @custom.register("prefix")
+        def prefix(value):
+            return f"P{value}"
+
+        self.assertEqual(custom.compile("prefix(x)").batch(np.asarray([1, 2])).tolist(), ["P1", "P2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import random
+
+import numpy as np
+
+
+class AliasSampler:
+    """
+    Walker/Vose 别名法抽样器：构建一次，之后单次抽样和批量抽样都是 O(1)/每个值。
+    weights 为空时等概率抽样。
+    """
+
+    def __init__(self, values, weights=None):
+        """
+        :param values: 候选值
+        :param weights: 与 values 对应的非负权重，为空表示等权
+        """
+        if len(values) == 0:
+            raise ValueError("候选值不能为空")
+        self.values = self._to_array(values)
+        self._value_list = self.values.tolist()
+        self.size = len(self._value_list)
+        self.prob = None
+        self.alias = None
+        if weights is not None:
+            self._build(np.asarray(weights, dtype=np.float64))
+
+    @staticmethod
+    def _to_array(values):
+        array = np.asarray(values)
+        if array.dtype.kind in 'biuf':
+            return array
+        # 字符串等类型统一使用 object 数组，与其它列的取值类型保持一致
+        result = np.empty(len(values), dtype=object)
+        result[:] = list(values)
+        return result
+
+    def _build(self, weights):
+        if len(weights) != self.size:
+            raise ValueError("权重数量与候选值数量不一致")
+        total = weights.sum()
+        if not np.isfinite(total) or total <= 0 or (weights < 0).any():
+            raise ValueError("权重必须为非负数且总和大于 0")
+
+        scaled = (weights * (self.size / total)).tolist()
+        prob = [1.0] * self.size
+        alias = list(range(self.size))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # 队列中剩余的下标只差数值误差，保持概率为 1
+        self.prob = np.asarray(prob)
+        self.alias = np.asarray(alias, dtype=np.int64)
+        self._prob_list = prob
+        self._alias_list = alias
+
+    def draw(self, rand=random):
+        """
+        抽取单个值
+        :param rand: 提供 random() 方法的随机数发生器，默认使用 random 模块
+        """
+        index = int(rand.random() * self.size)
+        if self.prob is not None and rand.random() >= self._prob_list[index]:
+            index = self._alias_list[index]
+        return self._value_list[index]
+
+    def sample(self, n: int, rng):
+        """
+        批量抽取 n 个值
+        :param rng: numpy Generator
+        :return: 数组
+        """
+        index = rng.integers(0, self.size, size=n)
+        if self.prob is not None:
+            keep = rng.random(n) < self.prob[index]
+            index = np.where(keep, index, self.alias[index])
+        return self.values[index]
@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class ColumnStore:
+    """
+    生成数据的列式内存表示：每张表是一组 Arrow RecordBatch，列顺序与 db_stats.json 中的 columns 一致。
+    数值列直接引用 numpy 数组的内存，字符串列保存为 Arrow 字符串数组，不再为每行保存一个字典。
+    Parquet 和数据库写入可以直接使用 to_arrow() 返回的 Arrow 表，无需先转换为记录或 DataFrame。
+    """
+
+    def __init__(self):
+        self._batches = {}
+
+    def append(self, table: str, columns: dict):
+        """
+        追加一个数据块
+        :param table: 表名
+        :param columns: {列名: 数组} 形式的数据块
+        """
+        if not columns:
+            return
+        batch = pa.RecordBatch.from_arrays([self._to_arrow(values) for values in columns.values()],
+                                           names=list(columns.keys()))
+        batches = self._batches.setdefault(table, [])
+        if batches and batch.schema != batches[0].schema:
+            batch = self._unify(batches, batch)
+        batches.append(batch)
+
+    @staticmethod
+    def _to_arrow(values):
+        if isinstance(values, (pa.Array, pa.ChunkedArray)):
+            return values
+        values = np.asarray(values)
+        if values.dtype.kind in 'biuf':
+            # 无空值的数值数组不复制
+            return pa.array(values)
+        return pa.array(values.tolist())
+
+    @staticmethod
+    def _unify(batches, batch):
+        """数据块之间类型不一致时（如某块全为空值）统一为兼容的类型"""
+        schema = pa.unify_schemas([batches[0].schema, batch.schema], promote_options='permissive')
+        for i, existing in enumerate(batches):
+            if existing.schema != schema:
+                batches[i] = existing.cast(schema)
+        return batch.cast(schema)
+
+    def tables(self):
+        return list(self._batches.keys())
+
+    def __contains__(self, table):
+        return table in self._batches
+
+    def num_rows(self, table: str) -> int:
+        return sum(batch.num_rows for batch in self._batches.get(table, []))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(batch.nbytes for batches in self._batches.values() for batch in batches)
+
+    def to_arrow(self, table: str) -> pa.Table:
+        """返回表的 Arrow 表，各数据块作为 Arrow 表的分块，不复制数据"""
+        return pa.Table.from_batches(self._batches[table])
+
+    def to_pandas(self, table: str):
+        return self.to_arrow(table).to_pandas()
+
+    def head(self, table: str, n: int = 100):
+        """表的前 n 行（DataFrame），用于预览，只转换这 n 行"""
+        return self.to_arrow(table).slice(0, n).to_pandas()
+
+    @staticmethod
+    def _batch_records(batch) -> list:
+        names = batch.schema.names
+        values = [column.to_pylist() if column.null_count else column.to_numpy(zero_copy_only=False).tolist()
+                  for column in batch.columns]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def to_records(self, table: str) -> list:
+        """转换为 [记录, ...]，与逐行模式的输出相同"""
+        records = []
+        for batch in self._batches.get(table, []):
+            records.extend(self._batch_records(batch))
+        return records
+
+    def write_json(self, f):
+        """
+        把所有表写为与 to_dict() 相同结构的 JSON（{表名: [记录, ...]}），每次只转换一个数据块
+        :param f: 以文本方式打开的可写文件对象
+        """
+        f.write('{')
+        for i, table in enumerate(self._batches):
+            f.write(('' if i == 0 else ',') + f'\n{json.dumps(table, ensure_ascii=False)}: [')
+            first = True
+            for batch in self._batches[table]:
+                for record in self._batch_records(batch):
+                    f.write(('\n' if first else ',\n') + json.dumps(record, ensure_ascii=False, default=str))
+                    first = False
+            f.write('\n]')
+        f.write('\n}\n')
+
+    def write_ndjson(self, table: str, f):
+        """把一张表写为每行一条记录的 NDJSON，每次只转换一个数据块"""
+        for batch in self._batches.get(table, []):
+            f.writelines(json.dumps(record, ensure_ascii=False, default=str) + '\n'
+                         for record in self._batch_records(batch))
+
+    def to_dict(self) -> dict:
+        """转换为 {表名: [记录, ...]}，用于保存 JSON"""
+        return {table: self.to_records(table) for table in self._batches}
+
+    def write_parquet(self, table: str, where):
+        """
+        把表写为 Parquet
+        :param where: 文件路径或可写的文件对象
+        """
+        pq.write_table(self.to_arrow(table), where)
@@ -0,0 +1,99 @@
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+# 日期部分查找表的最大天数，超过后退回 pandas 批量格式化
+MAX_DAY_TABLE = 1000000
+
+_DATE_DIRECTIVES = {'%Y', '%m', '%d'}
+# 时间部分的格式符及其对应的查找表粒度（秒）
+_TIME_DIRECTIVES = {'%H': 3600, '%M': 60, '%S': 1}
+_EPOCH = datetime(1970, 1, 1)
+
+
+class DateTimeFormatter:
+    """
+    把 epoch 秒数批量格式化为字符串。格式只包含 %Y %m %d（在前）和 %H %M %S（在后）及普通字符时
+    （如 "%Y-%m-%d %H:%M:%S"、"%Y年%m月%d日 %H时%M分"），拆成日期和时间两部分，
+    分别预先格式化 [start, end] 内的每一天和一天内的每个时刻，之后只需查表和拼接；
+    其它格式使用 pandas 批量格式化。查找表在累计格式化的数量超过表的大小后才构建，少量取值直接格式化。
+    """
+
+    def __init__(self, date_format: str, start: int, end: int):
+        """
+        :param date_format: strftime 格式
+        :param start: 取值下限（epoch 秒）
+        :param end: 取值上限（epoch 秒）
+        """
+        self.date_format = date_format
+        self.start_day = start // SECONDS_PER_DAY
+        self.days = end // SECONDS_PER_DAY - self.start_day + 1
+        parts = self._split(date_format)
+        if parts is None or self.days > MAX_DAY_TABLE:
+            parts = None
+        self._parts = parts
+        self._date_table = None
+        self._time_table = None
+        self._time_unit = 1
+        if parts is not None:
+            time_units = [unit for directive, unit in _TIME_DIRECTIVES.items() if directive in parts[1]]
+            self._time_unit = min(time_units) if time_units else SECONDS_PER_DAY
+        # 直接格式化的数量达到 _table_size 后改为构建查找表
+        self._table_size = self.days + SECONDS_PER_DAY // self._time_unit
+        self._formatted = 0
+
+    @staticmethod
+    def _split(date_format):
+        """拆分为 (日期部分, 时间部分)，不支持查表时返回 None"""
+        tokens = re.findall(r'%.|[^%]+', date_format)
+        if any(token.startswith('%') and token not in _DATE_DIRECTIVES and token not in _TIME_DIRECTIVES
+               for token in tokens):
+            return None
+        split = next((i for i, token in enumerate(tokens) if token in _TIME_DIRECTIVES), len(tokens))
+        if any(token in _DATE_DIRECTIVES for token in tokens[split:]):
+            return None
+        return ''.join(tokens[:split]), ''.join(tokens[split:])
+
+    def _build_tables(self):
+        date_part, time_part = self._parts
+        first_day = np.datetime64(int(self.start_day), 'D')
+        self._date_table = np.asarray(pd.date_range(first_day, periods=self.days, freq='D').strftime(date_part),
+                                      dtype=object)
+        if time_part:
+            times = pd.date_range(_EPOCH, periods=SECONDS_PER_DAY // self._time_unit, freq=f'{self._time_unit}s')
+            self._time_table = np.asarray(times.strftime(time_part), dtype=object)
+
+    def format(self, seconds):
+        """
+        :param seconds: epoch 秒数组（int64），取值需在 [start, end] 内
+        :return: 字符串 object 数组
+        """
+        seconds = np.asarray(seconds, dtype=np.int64)
+        if not self._use_tables(len(seconds)):
+            return np.asarray(pd.to_datetime(seconds, unit='s').strftime(self.date_format), dtype=object)
+        result = self._date_table[seconds // SECONDS_PER_DAY - self.start_day]
+        if self._time_table is not None:
+            result = result + self._time_table[seconds % SECONDS_PER_DAY // self._time_unit]
+        return result
+
+    def format_one(self, second: int) -> str:
+        if not self._use_tables(1):
+            return (_EPOCH + timedelta(seconds=second)).strftime(self.date_format)
+        result = self._date_table[second // SECONDS_PER_DAY - self.start_day]
+        if self._time_table is not None:
+            result += self._time_table[second % SECONDS_PER_DAY // self._time_unit]
+        return result
+
+    def _use_tables(self, n):
+        if self._date_table is not None:
+            return True
+        if self._parts is None:
+            return False
+        self._formatted += n
+        if self._formatted < self._table_size:
+            return False
+        self._build_tables()
+        return True
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import random
+import threading
+import weakref
+
+import numpy as np
+from faker import Faker, VERSION as FAKER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# 默认缓存目录：项目根目录下的 faker_cache，与当前工作目录无关
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'faker_cache')
+
+_banks = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    # fork 时可能有后台线程持有锁，子进程中没有这些线程，重新创建锁并丢弃未完成的补充
+    for bank in list(_banks):
+        bank._lock = threading.Lock()
+        bank._prefetching = {}
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class FakerValueBank:
+    """
+    Faker 取值库：每个 provider 预先生成一批取值，保存在本地缓存目录中供之后的运行复用，
+    生成数据时从取值库中抽取（支持批量抽取）。某个 provider 的抽取次数超过取值数量 × max_reuse 时，
+    取值库再扩充 pool_size 个取值，直到 max_size 为止；达到一半次数时后台线程提前准备下一批取值。
+
+    取值按 BLOCK_SIZE 个一块生成，每块使用由 seed 和块序号确定的 Faker 种子，因此取值序列只取决于 seed，
+    与缓存是否存在、后台线程何时完成无关；每次运行从前 pool_size 个取值开始，在相同的抽取次数处扩充，
+    使用相同种子的随机数发生器抽取时结果可以复现。
+    只缓存返回字符串/数值的 provider，其它 provider 由调用方直接调用 Faker。
+    """
+
+    CACHEABLE_TYPES = (str, int, float, bool)
+    BLOCK_SIZE = 1000
+
+    def __init__(self, locale: str = 'zh_CN', cache_dir: str = DEFAULT_CACHE_DIR, pool_size: int = 10000,
+                 max_size: int = 200000, max_reuse: float = 1.0, seed: int = 0):
+        """
+        :param locale: Faker 语言区域
+        :param cache_dir: 缓存目录，为空时不读写缓存；不同 seed 的取值缓存在各自的子目录中
+        :param pool_size: 首次使用及每次扩充的取值数量
+        :param max_size: 单个 provider 取值数量上限
+        :param max_reuse: 平均每个取值被抽取的次数达到该值时扩充取值库
+        :param seed: 生成取值使用的随机种子
+        """
+        self.locale = locale
+        self.cache_dir = cache_dir
+        self.pool_size = pool_size
+        self.max_size = max_size
+        self.max_reuse = max_reuse
+        self.seed = seed
+        self._pools = {}  # 当前可抽取的取值
+        self._values = {}  # 已生成（或从缓存读取）的全部取值，_pools 是它的前缀
+        self._draws = {}
+        self._prefetching = {}
+        self._lock = threading.Lock()
+        _banks.add(self)
+
+    def supports(self, provider: str) -> bool:
+        """provider 是否可以由取值库提供"""
+        return self._pool(provider) is not None
+
+    def draw(self, provider: str, rand=random):
+        """抽取单个取值"""
+        values = self._pool(provider)
+        self._count(provider, 1)
+        return values[int(rand.random() * len(values))]
+
+    def sample(self, provider: str, n: int, rng):
+        """
+        批量抽取 n 个取值
+        :param rng: numpy Generator
+        """
+        values = self._pool(provider)
+        self._count(provider, n)
+        return values[rng.integers(0, len(values), size=n)]
+
+    def wait(self):
+        """等待正在进行的后台补充完成；fork 子进程之前调用，避免后台线程持有锁"""
+        for thread in list(self._prefetching.values()):
+            thread.join()
+
+    def rewind(self):
+        """每次运行开始时调用：可抽取的取值回到前 pool_size 个，抽取计数清零，运行结果与之前的运行无关"""
+        self.wait()
+        with self._lock:
+            for provider, values in self._values.items():
+                self._pools[provider] = self._to_array(values[:self.pool_size])
+                self._draws[provider] = 0
+
+    def get_state(self) -> dict:
+        """返回可序列化的状态：每个 provider 可抽取的取值数量和抽取计数"""
+        return {provider: [len(pool), self._draws[provider]]
+                for provider, pool in self._pools.items() if pool is not None}
+
+    def set_state(self, state: dict):
+        """根据 get_state 的结果恢复，之后在与原运行相同的抽取次数处扩充"""
+        for provider, (size, draws) in state.items():
+            if self._pool(provider) is None:
+                continue
+            if len(self._values[provider]) < size:
+                self._refill(provider, size)
+            with self._lock:
+                self._pools[provider] = self._to_array(self._values[provider][:size])
+                self._draws[provider] = draws
+
+    def _pool(self, provider):
+        if provider not in self._pools:
+            with self._lock:
+                if provider not in self._pools:
+                    self._pools[provider] = self._load(provider)
+                    self._draws[provider] = 0
+        return self._pools[provider]
+
+    def _load(self, provider):
+        values = self._read_cache(provider) or []
+        if len(values) < self.pool_size:
+            generated = self._generate(provider, len(values), self.pool_size)
+            if generated is None:
+                return None
+            values = values + generated
+            self._write_cache(provider, values)
+        self._values[provider] = values
+        return self._to_array(values[:self.pool_size])
+
+    def _generate(self, provider, start, stop):
+        """生成序号 [start, stop) 所在的整块取值，start 为 BLOCK_SIZE 的整数倍"""
+        faker = Faker(self.locale)
+        method = getattr(faker, provider)
+        values = []
+        for block in range(start // self.BLOCK_SIZE, -(-stop // self.BLOCK_SIZE)):
+            # 独立的随机数发生器，不影响全局 Faker 的随机序列
+            faker.seed_instance(f"{self.seed}:{block}")
+            values.extend(method() for _ in range(self.BLOCK_SIZE))
+        if not all(isinstance(value, self.CACHEABLE_TYPES) for value in values):
+            return None
+        return values
+
+    @staticmethod
+    def _to_array(values):
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    def _count(self, provider, n):
+        self._draws[provider] += n
+        size = len(self._pools[provider])
+        if size >= self.max_size:
+            return
+        target = min(size + self.pool_size, self.max_size)
+        if self._draws[provider] >= size * self.max_reuse / 2:
+            self._prefetch(provider, target)
+        if self._draws[provider] >= size * self.max_reuse:
+            self._extend(provider, target)
+
+    def _prefetch(self, provider, target):
+        with self._lock:
+            thread = self._prefetching.get(provider)
+            if len(self._values[provider]) >= target or (thread is not None and thread.is_alive()):
+                return
+            thread = threading.Thread(target=self._refill, args=(provider, target), daemon=True)
+            self._prefetching[provider] = thread
+            thread.start()
+
+    def _extend(self, provider, target):
+        """把可抽取的取值扩充到 target 个；后台准备的取值还不够时等待或直接生成"""
+        thread = self._prefetching.get(provider)
+        if thread is not None:
+            thread.join()
+        if len(self._values[provider]) < target:
+            self._refill(provider, target)
+        with self._lock:
+            self._pools[provider] = self._to_array(self._values[provider][:target])
+            self._draws[provider] = 0
+        logger.debug("取值库 %s 已扩充到 %d 个取值", provider, target)
+
+    def _refill(self, provider, target):
+        start = len(self._values[provider])
+        try:
+            values = self._generate(provider, start, target)
+        except Exception as e:
+            logger.warning("补充取值库 %s 失败: %s", provider, e)
+            return
+        if values is None:
+            return
+        with self._lock:
+            if len(self._values[provider]) != start:
+                return
+            # 整体替换列表，正在读取的线程仍使用旧列表
+            self._values[provider] = self._values[provider] + values
+            values = self._values[provider]
+        self._write_cache(provider, values)
+
+    def _cache_path(self, provider):
+        return os.path.join(self.cache_dir, self.locale, f"seed-{self.seed}", f"{provider}.json")
+
+    def _read_cache(self, provider):
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(provider)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Faker 版本变化后 provider 的输出可能不同，重新生成
+        if cache.get('faker_version') != FAKER_VERSION or not cache.get('values'):
+            return None
+        values = cache['values']
+        return values[:len(values) // self.BLOCK_SIZE * self.BLOCK_SIZE]
+
+    def _write_cache(self, provider, values):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(provider)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再替换，多个进程同时写入时不会留下不完整的文件
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'faker_version': FAKER_VERSION, 'values': values}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("写入取值库缓存 %s 失败: %s", path, e)
@@ -0,0 +1,131 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 由父记录字段复制或转换得到的依赖列单独计时，不计入其列类型，逐行和列式生成统计的是同一组列
+DEPENDENCY_COLUMN_TYPE = 'dependency'
+
+
+class GenerationMetrics:
+    """
+    数据生成过程的统计指标：每张表的生成行数、因空值放弃的行数、主键键空间不足的次数，
+    以及每种列类型（依赖列单独为 DEPENDENCY_COLUMN_TYPE）和每张表的耗时。按固定间隔输出生成速度，并可通过 snapshot() 或回调函数查询进度。
+    """
+
+    def __init__(self, total_records: int = 0, report_interval: float = 10.0, callback=None):
+        """
+        :param total_records: 计划生成的根记录数，用于计算进度
+        :param report_interval: 输出生成速度的间隔（秒），为 0 或 None 时不输出
+        :param callback: 每次输出时调用 callback(snapshot)，例如更新页面进度条
+        """
+        self.total_records = total_records
+        self.report_interval = report_interval
+        self.callback = callback
+        self.completed_records = 0
+        self.tables = {}
+        self.column_seconds = {}
+        self.table_seconds = {}
+        self.start_time = time.perf_counter()
+        self._last_report = self.start_time
+        self._last_reported_records = None
+
+    def _table(self, table):
+        counters = self.tables.get(table)
+        if counters is None:
+            counters = self.tables[table] = {"rows": 0, "dropped": 0, "pk_shortfall": 0}
+        return counters
+
+    def add_rows(self, table: str, count: int = 1):
+        self._table(table)["rows"] += count
+
+    def add_dropped(self, table: str, count: int = 1):
+        self._table(table)["dropped"] += count
+
+    def add_pk_shortfall(self, table: str, count: int = 1):
+        self._table(table)["pk_shortfall"] += count
+
+    def add_column_time(self, column_type: str, seconds: float):
+        self.column_seconds[column_type] = self.column_seconds.get(column_type, 0.0) + seconds
+
+    def add_table_time(self, table: str, seconds: float):
+        self.table_seconds[table] = self.table_seconds.get(table, 0.0) + seconds
+
+    @contextmanager
+    def time_column(self, column_type: str):
+        """统计代码块耗时，计入该列类型"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_column_time(column_type, time.perf_counter() - start)
+
+    @contextmanager
+    def time_table(self, table: str):
+        """统计代码块耗时，计入该表"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_table_time(table, time.perf_counter() - start)
+
+    def advance(self, count: int = 1):
+        """记录已完成的根记录数，并在到达输出间隔时输出生成速度"""
+        self.completed_records += count
+        self.maybe_report()
+
+    @property
+    def rows(self) -> int:
+        return sum(counters["rows"] for counters in self.tables.values())
+
+    @property
+    def progress(self) -> float:
+        if not self.total_records:
+            return 0.0
+        return min(1.0, self.completed_records / self.total_records)
+
+    def snapshot(self) -> dict:
+        """返回当前指标的可序列化副本"""
+        elapsed = time.perf_counter() - self.start_time
+        rows = self.rows
+        return {
+            "total_records": self.total_records,
+            "completed_records": self.completed_records,
+            "progress": self.progress,
+            "elapsed": elapsed,
+            "rows": rows,
+            "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+            "tables": {table: dict(counters) for table, counters in self.tables.items()},
+            "column_seconds": dict(self.column_seconds),
+            "table_seconds": dict(self.table_seconds),
+        }
+
+    def merge(self, snapshot: dict):
+        """合并其它进程（分片）的指标快照"""
+        self.completed_records += snapshot["completed_records"]
+        for table, counters in snapshot["tables"].items():
+            own = self._table(table)
+            for name, value in counters.items():
+                own[name] += value
+        for column_type, seconds in snapshot["column_seconds"].items():
+            self.add_column_time(column_type, seconds)
+        for table, seconds in snapshot.get("table_seconds", {}).items():
+            self.add_table_time(table, seconds)
+        self.maybe_report()
+
+    def maybe_report(self, force: bool = False):
+        now = time.perf_counter()
+        if force:
+            # 刚输出过同样的进度时不重复输出
+            if self.completed_records == self._last_reported_records:
+                return
+        elif not self.report_interval or now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        self._last_reported_records = self.completed_records
+        snapshot = self.snapshot()
+        logger.info("已完成 %d/%d 条根记录，共生成 %d 行，%.0f 行/秒", snapshot["completed_records"],
+                    snapshot["total_records"], snapshot["rows"], snapshot["rows_per_second"])
+        if self.callback:
+            self.callback(snapshot)
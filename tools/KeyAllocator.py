@@ -0,0 +1,120 @@
+import numpy as np
+
+# 64 位乘法哈希常数，用作 Feistel 轮函数
+_ROUND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class FeistelPermutation:
+    """
+    [0, size) 上的伪随机双射：在不小于 size 的 4 的幂次域上做平衡 Feistel 置换，
+    落在 size 之外的结果继续置换（cycle walking），直到回到 [0, size) 内。
+    不需要保存任何已发放的值。
+    """
+
+    def __init__(self, size: int, seed: int, rounds: int = 4):
+        """
+        :param size: 置换域大小，最大 2**64
+        :param seed: 决定置换的随机种子
+        :param rounds: Feistel 轮数
+        """
+        self.size = size
+        self.half_bits = max(1, (max(size - 1, 1).bit_length() + 1) // 2)
+        self.half_mask = np.uint64((1 << self.half_bits) - 1)
+        keys = np.random.default_rng(seed).integers(0, 2 ** 63, size=rounds, dtype=np.int64)
+        self.round_keys = keys.astype(np.uint64)
+
+    def _round(self, right, key):
+        value = (right ^ key) * _ROUND_MULTIPLIER
+        return (value ^ (value >> np.uint64(29))) & self.half_mask
+
+    def _encrypt(self, values):
+        half_bits = np.uint64(self.half_bits)
+        left = values >> half_bits
+        right = values & self.half_mask
+        for key in self.round_keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << half_bits) | right
+
+    def permute(self, indexes):
+        """
+        :param indexes: [0, size) 内的下标数组
+        :return: 置换后的 uint64 数组
+        """
+        values = self._encrypt(np.asarray(indexes, dtype=np.uint64))
+        outside = values >= np.uint64(self.size) if self.size < 2 ** 64 else np.zeros(len(values), dtype=bool)
+        while outside.any():
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= np.uint64(self.size)
+        return values
+
+
+class KeyAllocator:
+    """
+    单个主键列的键空间分配器：按顺序发放下标，经 FeistelPermutation 映射为 [0, size) 内不重复、
+    看起来随机的偏移量；size 用完后继续按 size, size+1, ... 单调发放。内存占用与发放数量无关。
+
+    多个分片共享同一 seed 时，各自发放不相交的下标区间，因此结果也互不重叠。
+    """
+
+    def __init__(self, size: int, seed: int, shard_index: int = 0, shard_count: int = 1, limit: int = None):
+        """
+        :param size: 置换部分的大小，通常为源数据 min/max 之间的取值个数
+        :param seed: 置换种子，同一列的所有分片必须相同
+        :param shard_index: 分片序号
+        :param shard_count: 分片总数
+        :param limit: 偏移量上限（不含），超过后不再发放；为空表示不限制
+        """
+        self.size = size
+        self.seed = seed
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.limit = limit
+        self.permutation = FeistelPermutation(size, seed)
+        # 当前分片在置换部分负责的下标区间 [start, stop)
+        self.start = size * shard_index // shard_count
+        self.stop = size * (shard_index + 1) // shard_count
+        self.position = 0  # 已发放的数量
+
+    def allocate(self, n: int):
+        """
+        发放 n 个不重复的偏移量，键空间耗尽时返回的数量可能少于 n
+        :return: uint64 数组
+        """
+        capacity = self.stop - self.start
+        permuted_count = max(0, min(n, capacity - self.position))
+        offsets = []
+        if permuted_count:
+            first = self.start + self.position
+            offsets.append(self.permutation.permute(np.arange(first, first + permuted_count, dtype=np.uint64)))
+
+        overflow_count = n - permuted_count
+        if overflow_count:
+            # 置换部分用完后，每个分片按分片数为步长单调发放
+            overflow_start = max(0, self.position - capacity)
+            steps = np.arange(overflow_start, overflow_start + overflow_count, dtype=np.uint64)
+            overflow = np.uint64(self.size + self.shard_index) + steps * np.uint64(self.shard_count)
+            if self.limit is not None:
+                overflow = overflow[overflow < np.uint64(self.limit)]
+            offsets.append(overflow)
+
+        result = np.concatenate(offsets) if offsets else np.zeros(0, dtype=np.uint64)
+        self.position += len(result)
+        return result
+
+    def get_state(self) -> dict:
+        """返回可序列化的分配器状态"""
+        return {
+            "size": self.size,
+            "seed": self.seed,
+            "shard_index": self.shard_index,
+            "shard_count": self.shard_count,
+            "limit": self.limit,
+            "position": self.position,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """根据 get_state 的结果恢复分配器"""
+        allocator = cls(state["size"], state["seed"], state["shard_index"], state["shard_count"], state["limit"])
+        allocator.position = state["position"]
+        return allocator
@@ -0,0 +1,237 @@
+import json
+import os
+
+import numpy as np
+
+from tools.AliasSampler import AliasSampler
+
+
+class KeyPool:
+    """
+    单个被外键引用列的键值池：只保存该列的取值，数值类型使用定长类型化数组，按倍数扩容；
+    支持 O(1) 均匀抽样；追加时给出权重则按权重抽样，每批追加的键值各有一个别名表，批次之间再按权重总和用别名表选择，
+    同样为 O(1)，追加后只需为新批次建表。父表的数据块写出后即可丢弃，子表仍能从键值池中抽取有效外键。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        :param capacity: 初始容量
+        """
+        self._capacity = capacity
+        self._values = None
+        self._weights = None
+        # 按权重抽样时每批键值的 (起始下标, 个数, 别名表概率, 别名)，以及按批次权重总和选择批次的别名表
+        self._blocks = []
+        self._block_totals = []
+        self._block_alias = None
+        self.size = 0
+        # 最近一次保存的旁路文件、其中已保存的键值个数和字节数，之后只追加新增的键值
+        self._file = None
+        self._saved = 0
+        self._saved_bytes = 0
+        self._saved_weighted = False
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def weighted(self) -> bool:
+        return self._weights is not None
+
+    def extend(self, values, weights=None):
+        """
+        追加一批键值
+        :param values: 键值数组
+        :param weights: 每个键值被引用的相对权重，为空表示等权（之前追加过权重时权重为 1）
+        """
+        values = np.asarray(values)
+        if len(values) == 0:
+            return
+        start = self.size
+        if self._values is None:
+            # 数值/布尔类型保持类型化存储，其它类型（如字符串）退化为 object 数组
+            dtype = values.dtype if values.dtype.kind in 'biuf' else object
+            self._values = np.empty(max(self._capacity, len(values)), dtype=dtype)
+        elif self._values.dtype != object and values.dtype != self._values.dtype:
+            values = values.astype(self._values.dtype)
+
+        end = self.size + len(values)
+        if end > len(self._values):
+            self._values = self._grow(self._values, end)
+        self._values[self.size:end] = values
+        self.size = end
+        if weights is not None or self._weights is not None:
+            self._extend_weights(start, weights)
+
+    def _extend_weights(self, start, weights):
+        if self._weights is None:
+            # 之前追加的键值等权，合成一个批次
+            self._weights = np.ones(len(self._values), dtype=np.float64)
+            if start:
+                self._add_block(0, start)
+        elif len(self._weights) < len(self._values):
+            self._weights = self._grow(self._weights, len(self._values))
+        self._weights[start:self.size] = 1.0 if weights is None else weights
+        self._add_block(start, self.size)
+
+    def _add_block(self, start, end):
+        weights = self._weights[start:end]
+        if (weights < 0).any() or not np.isfinite(weights).all():
+            raise ValueError("权重必须为非负数")
+        total = float(weights.sum())
+        if total <= 0:
+            return
+        if weights.min() == weights.max():
+            prob, alias = None, None
+        else:
+            # 只保留别名表的数组，不保留抽样器中的候选值列表
+            sampler = AliasSampler(np.arange(end - start), weights)
+            prob, alias = sampler.prob, sampler.alias
+        self._blocks.append((start, end - start, prob, alias))
+        self._block_totals.append(total)
+        self._block_alias = None
+
+    @staticmethod
+    def _grow(array, min_size):
+        grown = np.empty(max(min_size, len(array) * 2), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def values(self):
+        """返回已保存键值的视图（不复制）"""
+        if self._values is None:
+            return np.empty(0, dtype=object)
+        return self._values[:self.size]
+
+    def sample(self, n: int, rng):
+        """
+        抽取 n 个键值；设置过权重时按权重抽取，否则均匀抽取
+        :param rng: numpy Generator
+        """
+        if self._weights is None:
+            return self._values[rng.integers(0, self.size, size=n)]
+        if not self._blocks:
+            raise ValueError("键值池的权重总和为 0")
+        if self._block_alias is None:
+            self._block_alias = AliasSampler(np.arange(len(self._blocks)), self._block_totals)
+        blocks = self._block_alias.sample(n, rng)
+        index = np.empty(n, dtype=np.int64)
+        for block in np.unique(blocks):
+            selected = blocks == block
+            start, size, prob, alias = self._blocks[block]
+            local = rng.integers(0, size, size=int(selected.sum()))
+            if prob is not None:
+                local = np.where(rng.random(len(local)) < prob[local], local, alias[local])
+            index[selected] = start + local
+        return self._values[index]
+
+    def get_state(self, path: str = None) -> dict:
+        """
+        返回可序列化的键值池状态
+        :param path: 旁路文件路径（不含扩展名）。为空时状态中包含全部键值；否则键值写入 {path}.npy（数值类型）
+                     或每行一个 JSON 值的 {path}.jsonl，状态只记录文件名和键值个数。
+                     同一文件中上次保存之后的键值直接追加，保存的开销与新增的键值个数成正比
+        """
+        weights = None if self._weights is None else self._weights[:self.size]
+        if path is None:
+            return {"values": self.values().tolist(), "weights": None if weights is None else weights.tolist()}
+        values = self.values()
+        file_name = path + ('.jsonl' if values.dtype == object else '.npy')
+        keep = self._saved if file_name == self._file and os.path.exists(file_name) else 0
+        if values.dtype == object:
+            self._saved_bytes = _append_jsonl(file_name, values[keep:], self._saved_bytes if keep else 0)
+        else:
+            _append_npy(file_name, values[keep:], keep)
+        state = {"file": file_name, "size": self.size}
+        if weights is not None:
+            # 权重写入 {path}.weights.npy；上次保存时还没有权重的话整个重写
+            state["weights_file"] = path + '.weights.npy'
+            weights_keep = keep if self._saved_weighted and os.path.exists(state["weights_file"]) else 0
+            _append_npy(state["weights_file"], weights[weights_keep:], weights_keep)
+        self._file = file_name
+        self._saved = self.size
+        self._saved_weighted = weights is not None
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """根据 get_state 的结果恢复键值池"""
+        if "file" in state:
+            return cls._load(state["file"], state["size"], state.get("weights_file"))
+        pool = cls()
+        if state["values"]:
+            values = np.empty(len(state["values"]), dtype=object) if any(
+                isinstance(value, str) for value in state["values"]) else np.asarray(state["values"])
+            if values.dtype == object:
+                values[:] = state["values"]
+            pool.extend(values, state.get("weights"))
+        return pool
+
+    @classmethod
+    def _load(cls, file_name, size, weights_file=None):
+        """读取旁路文件中的前 size 个键值（和权重），文件中之后的键值属于未保存状态的运行，下次保存时被覆盖"""
+        pool = cls()
+        weights = None
+        if weights_file is not None:
+            weights = np.load(weights_file, mmap_mode='r')
+            if len(weights) < size:
+                raise ValueError(f"键值池权重文件 {weights_file} 只有 {len(weights)} 个值，状态中为 {size} 个")
+            weights = np.array(weights[:size])
+        saved_bytes = 0
+        if file_name.endswith('.npy'):
+            values = np.load(file_name, mmap_mode='r')
+            if len(values) < size:
+                raise ValueError(f"键值池文件 {file_name} 只有 {len(values)} 个值，状态中为 {size} 个")
+            pool.extend(np.array(values[:size]), weights)
+        else:
+            values = np.empty(size, dtype=object)
+            with open(file_name, 'rb') as f:
+                for i in range(size):
+                    line = f.readline()
+                    if not line:
+                        raise ValueError(f"键值池文件 {file_name} 只有 {i} 个值，状态中为 {size} 个")
+                    values[i] = json.loads(line)
+                saved_bytes = f.tell()
+            pool.extend(values, weights)
+        pool._file = file_name
+        pool._saved = size
+        pool._saved_bytes = saved_bytes
+        pool._saved_weighted = weights is not None
+        return pool
+
+
+def _append_npy(file_name, values, keep):
+    """保留 .npy 文件中的前 keep 个值并追加 values；keep 为 0 时重写整个文件"""
+    if keep == 0:
+        with open(file_name, 'wb') as f:
+            np.save(f, values)
+        return
+    with open(file_name, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            _, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            _, _, dtype = np.lib.format.read_array_header_2_0(f)
+        data_offset = f.tell()
+        # np.save 在文件头中为长度字段预留了空间，更新长度后文件头大小不变
+        f.seek(0)
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                  "shape": (keep + len(values),)}
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(f, header)
+        else:
+            np.lib.format.write_array_header_2_0(f, header)
+        if f.tell() != data_offset:
+            raise ValueError(f"无法在原位更新 {file_name} 的文件头")
+        f.seek(data_offset + keep * dtype.itemsize)
+        f.truncate()
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+
+def _append_jsonl(file_name, values, keep_bytes):
+    """保留 .jsonl 文件的前 keep_bytes 字节并追加 values，返回追加后的文件大小"""
+    with open(file_name, 'r+b' if keep_bytes else 'wb') as f:
+        f.seek(keep_bytes)
+        f.truncate()
+        f.writelines((json.dumps(value, ensure_ascii=False) + '\n').encode('utf-8') for value in values.tolist())
+        return f.tell()
@@ -6,8 +6,13 @@ import streamlit as st  # 导入 Streamlit
 
 
 class ParquetExporter:
-    def __init__(self, json_file_path):
+    def __init__(self, json_file_path=None, store=None):
+        """
+        :param json_file_path: 生成数据的 JSON 文件
+        :param store: 列式生成的 ColumnStore，设置后直接把 Arrow 表写为 Parquet，不再读取 JSON
+        """
         self.json_file_path = json_file_path
+        self.store = store
         self.data = None
         self.df = None
 
@@ -26,6 +31,8 @@ class ParquetExporter:
 
     def extract_all_tables(self):
         """提取所有子表名称"""
+        if self.store is not None:
+            return self.store.tables()
         if self.data is None:
             st.warning("⚠️ 数据尚未加载，请先调用 load_json()。")
             return []
@@ -54,6 +61,13 @@ class ParquetExporter:
         buffer = io.BytesIO()
         with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
             for table_name in self.extract_all_tables():
+                if self.store is not None:
+                    if self.store.num_rows(table_name):
+                        parquet_buffer = io.BytesIO()
+                        self.store.write_parquet(table_name, parquet_buffer)
+                        zf.writestr(f"{table_name}.parquet", parquet_buffer.getvalue())
+                    continue
+
                 df = self.extract_table_data(table_name)
                 if df is not None and not df.empty:
                     parquet_buffer = io.BytesIO()
@@ -0,0 +1,77 @@
+import logging
+import math
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# num_records: 根记录迭代次数；root_ratios: {根表: 每条根记录对应的行数}；
+# child_factors: {依赖表: 子记录数的缩放系数}；source_rows / expected_rows: {表名: 源表行数 / 预计生成行数}
+ScalePlan = namedtuple('ScalePlan', ['scale_factor', 'num_records', 'root_ratios', 'child_factors',
+                                     'source_rows', 'expected_rows'])
+
+
+def expected_child_count(dependency) -> float:
+    """每条父记录的平均子记录数：优先使用 dep_distribution，否则取 dep_relation 范围的中点"""
+    distribution = dependency.get('dep_distribution')
+    if distribution:
+        total = sum(float(weight) for weight in distribution.values())
+        if total > 0:
+            return sum(int(count) * float(weight) for count, weight in distribution.items()) / total
+    min_records, max_records = map(int, dependency['dep_relation'].split(':'))
+    return (min_records + max_records) / 2
+
+
+def plan_scale(db_stats, sorted_tables, scale_factor: float) -> ScalePlan:
+    """
+    按比例因子规划每张表的行数：目标行数为 table_stats.total_rows × scale_factor。
+    根表（没有 dep_table 的表）按各自的目标行数生成，迭代次数取根表目标行数的最大值；
+    依赖表按父表的预计行数缩放子记录数，使预计行数接近目标行数。没有 table_stats 的表保持原有比例。
+    """
+    if scale_factor <= 0:
+        raise ValueError(f"比例因子必须大于 0: {scale_factor}")
+
+    tables = [table for table in sorted_tables if not db_stats[table].get('is_codetable', False)]
+    source_rows = {}
+    targets = {}
+    for table in tables:
+        total_rows = db_stats[table].get('table_stats', {}).get('total_rows')
+        if total_rows is not None:
+            source_rows[table] = int(total_rows)
+            targets[table] = int(round(total_rows * scale_factor))
+    if not targets:
+        raise ValueError("db_stats 中没有 table_stats.total_rows，无法按比例因子生成")
+
+    root_tables = [table for table in tables if not db_stats[table].get('dependency', {}).get('dep_table')]
+    root_targets = [targets[table] for table in root_tables if table in targets]
+    num_records = max(root_targets) if root_targets else max(targets.values())
+
+    root_ratios = {}
+    child_factors = {}
+    expected_rows = {}
+    for table in tables:
+        dependency = db_stats[table].get('dependency', {})
+        dep_table = dependency.get('dep_table')
+        if not dep_table:
+            ratio = targets[table] / num_records if table in targets and num_records else 1.0
+            root_ratios[table] = ratio
+            expected_rows[table] = math.floor(num_records * ratio)
+            continue
+
+        parent_rows = expected_rows.get(dep_table, 0)
+        mean = expected_child_count(dependency)
+        factor = 1.0
+        if table in targets and parent_rows > 0 and mean > 0:
+            factor = targets[table] / parent_rows / mean
+        child_factors[table] = factor
+        expected_rows[table] = int(round(parent_rows * mean * factor))
+
+    return ScalePlan(scale_factor, num_records, root_ratios, child_factors, source_rows, expected_rows)
+
+
+def report_scale_plan(plan: ScalePlan):
+    """生成前输出每张表的源表行数和预计生成的行数"""
+    logger.info("比例因子 %s：根记录迭代 %d 次，预计共生成 %d 行", plan.scale_factor, plan.num_records,
+                sum(plan.expected_rows.values()))
+    for table, rows in plan.expected_rows.items():
+        source = plan.source_rows.get(table)
+        logger.info("  %s: 源表 %s 行，预计生成 %d 行", table, '未知' if source is None else source, rows)
@@ -0,0 +1,114 @@
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class StreamWriter:
+    """按表增量写出生成的数据块，每张表一个 NDJSON 或 Parquet 文件"""
+
+    FORMATS = ('ndjson', 'parquet')
+    # 数据块中全为空值的列推断不出类型，Parquet 文件最多缓存这么多个数据块等待后续数据块确定类型
+    MAX_PENDING_BATCHES = 16
+
+    def __init__(self, output_dir: str, fmt: str = 'ndjson', part: int = None, run: int = None,
+                 segment: int = None):
+        """
+        :param output_dir: 输出目录，不存在时自动创建
+        :param fmt: 输出格式，ndjson 或 parquet
+        :param part: 分片序号，多进程生成时每个分片写各自的文件
+        :param run: 追加运行的序号，大于 0 时写入单独的文件，不覆盖之前运行的输出
+        :param segment: 检查点模式下的段序号，每段写各自的文件
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"不支持的输出格式: {fmt}")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.part = part
+        self.run = run
+        self.segment = segment
+        self.row_counts = {}
+        self._files = {}
+        self._writers = {}
+        self._pending = {}
+        os.makedirs(output_dir, exist_ok=True)
+
+    def path_for(self, table: str) -> str:
+        """返回表对应的输出文件路径"""
+        name = table
+        if self.run:
+            name += f".run-{self.run:05d}"
+        if self.part is not None:
+            name += f".part-{self.part:05d}"
+        if self.segment is not None:
+            name += f".segment-{self.segment:05d}"
+        return os.path.join(self.output_dir, f"{name}.{self.fmt}")
+
+    def write(self, table: str, columns: dict):
+        """
+        追加写入一个数据块
+        :param table: 表名
+        :param columns: {列名: 数组} 形式的数据块
+        """
+        num_rows = len(next(iter(columns.values()))) if columns else 0
+        if num_rows == 0:
+            return
+
+        if self.fmt == 'ndjson':
+            self._write_ndjson(table, columns)
+        else:
+            self._write_parquet(table, columns)
+        self.row_counts[table] = self.row_counts.get(table, 0) + num_rows
+
+    def _write_ndjson(self, table, columns):
+        f = self._files.get(table)
+        if f is None:
+            f = self._files[table] = open(self.path_for(table), 'w', encoding='utf-8')
+        names = list(columns.keys())
+        values = [column.tolist() if hasattr(column, 'tolist') else list(column) for column in columns.values()]
+        f.writelines(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n' for row in zip(*values))
+
+    def _write_parquet(self, table, columns):
+        batch = pa.table({name: pa.array(values) for name, values in columns.items()})
+        writer = self._writers.get(table)
+        if writer is None:
+            pending = self._pending.setdefault(table, [])
+            pending.append(batch)
+            schema = pa.unify_schemas([b.schema for b in pending], promote_options='permissive')
+            if any(pa.types.is_null(field.type) for field in schema) and len(pending) < self.MAX_PENDING_BATCHES:
+                return
+            # 缓存的数据块仍未确定类型的列按字符串写出，之后的非空值也可以转换为字符串
+            schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                for field in schema])
+            self._open_parquet(table, schema)
+            return
+        if batch.schema != writer.schema:
+            # 后续数据块的推断类型可能不同（例如全为空），统一到文件的 schema
+            batch = batch.cast(writer.schema)
+        writer.write_table(batch)
+
+    def _open_parquet(self, table, schema):
+        """创建表的 Parquet 文件并写出缓存的数据块"""
+        writer = self._writers[table] = pq.ParquetWriter(self.path_for(table), schema)
+        for batch in self._pending.pop(table):
+            writer.write_table(batch.cast(schema))
+
+    def close(self):
+        """关闭所有打开的文件"""
+        for table in list(self._pending):
+            # 直到最后都全为空值的列保留空类型
+            self._open_parquet(table, pa.unify_schemas([b.schema for b in self._pending[table]],
+                                                      promote_options='permissive'))
+        for f in self._files.values():
+            f.close()
+        for writer in self._writers.values():
+            writer.close()
+        self._files = {}
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,166 @@
+"""
+流式统计使用的在线摘要。每个摘要逐块调用 update，占用的内存与数据行数无关。
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RunningMoments:
+    """Welford 算法的分块形式：逐块合并个数、均值和二阶中心矩，同时记录最小值和最大值"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        count = len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class TDigest:
+    """
+    t-digest 分位数摘要（合并式）：质心按 k1 尺度函数 k(q) = δ/(2π)·asin(2q-1) 分组，
+    两端的质心更小，尾部分位数更准确；质心个数约为 compression 的量级。
+    """
+
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        self.buffer_size = buffer_size or compression * 50
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.count += len(values)
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self._buffered >= self.buffer_size:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        means = np.concatenate([self._means] + self._buffer)
+        weights = np.concatenate([self._weights, np.ones(self._buffered)])
+        self._buffer = []
+        self._buffered = 0
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # 按每个质心左端的分位数映射到 k 尺度，k 值整数部分相同的质心合并
+        left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * left - 1)
+        groups = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / merged_weights
+        self._weights = merged_weights
+
+    def quantile(self, q: float):
+        self._compress()
+        if not self.count:
+            return None
+        centers = np.cumsum(self._weights) - self._weights / 2
+        value = float(np.interp(q * self.count, centers, self._means))
+        return min(max(value, self.min), self.max)
+
+
+class MisraGries:
+    """
+    Misra-Gries 频繁项摘要：最多保留 capacity 个计数，超出时所有计数减去第 capacity+1 大的计数。
+    每个值的计数最多被低估 n/(capacity+1)；不同取值不超过 capacity 个时计数是精确的。
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.count = 0
+        self._counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series):
+        if values.empty:
+            return
+        self.count += len(values)
+        counts = values.value_counts()
+        counts.index = counts.index.astype(object)
+        self._counts = counts if self._counts.empty else self._counts.add(counts, fill_value=0)
+        if len(self._counts) > self.capacity:
+            threshold = self._counts.nlargest(self.capacity + 1).iloc[-1]
+            self._counts = self._counts[self._counts > threshold] - threshold
+
+    def top(self, k: int):
+        """出现次数最多的 k 个值，[(值, 计数), ...]"""
+        return [(value, int(count)) for value, count in self._counts.nlargest(k).items()]
+
+
+class HyperLogLog:
+    """HyperLogLog 基数估计，使用 2^precision 个寄存器，标准误差约为 1.04/sqrt(2^precision)"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series):
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # 剩余位中第一个 1 的位置（从高位起，1 开始计数）
+        rank = (bits + 1 - self._bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    @staticmethod
+    def _bit_length(values):
+        length = np.zeros(len(values), dtype=np.int64)
+        values = values.copy()
+        for shift in (32, 16, 8, 4, 2, 1):
+            mask = values >= (np.uint64(1) << np.uint64(shift))
+            length[mask] += shift
+            values[mask] >>= np.uint64(shift)
+        return length + (values > 0)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # 小基数时使用线性计数
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from tools.StreamingSketches import HyperLogLog, MisraGries, RunningMoments, TDigest
+
+NO_VALUES = {"error": "No non-null values found"}
+# 数值列输出的分位数
+QUANTILES = {"p01": 0.01, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p99": 0.99}
+
+
+class ColumnAccumulator:
+    """
+    单列的增量统计：逐块更新空值数、在线摘要和样本，结果格式与 get_db_statistic 中的 analyze_* 相同。
+    数值列使用 Welford 均值/方差和 t-digest 分位数，字符列使用 Misra-Gries 高频值，长文本列累计长度，
+    所有列用 HyperLogLog 估计不同取值个数，每列占用的内存与行数无关。
+    kind 取值 numeric / character / text / date。
+    """
+
+    def __init__(self, kind: str, sample_size: int, top_k: int, rng, capacity=1000):
+        """
+        :param capacity: 字符列 Misra-Gries 摘要保留的计数个数，不同取值不超过该数时高频值占比是精确的
+        """
+        self.kind = kind
+        self.sample_size = sample_size
+        self.top_k = top_k
+        self.rng = rng
+        self.rows = 0
+        self.nulls = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.moments = RunningMoments() if kind == 'numeric' else None
+        self.digest = TDigest() if kind == 'numeric' else None
+        self.frequent = MisraGries(max(capacity, top_k)) if kind == 'character' else None
+        self.lengths = RunningMoments() if kind == 'text' else None
+        self.distinct = HyperLogLog()
+        # 样本采用 bottom-k 抽样：每个值取一个随机键，保留键最小的 sample_size 个值
+        self._sample_keys = np.empty(0)
+        self._samples = []
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        not_null = series.notnull()
+        # 空值率与 calculate_null_rate 一致：字符串列中的空串和纯空白也计为空值
+        blank = pd.Series(False, index=series.index)
+        if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+            blank = series.str.strip().eq('').fillna(False).astype(bool)
+        elif series.dtype == object:
+            blank = series.map(lambda x: isinstance(x, str) and not x.strip()).astype(bool)
+        self.nulls += int((~not_null | blank).sum())
+
+        valid = series[not_null & ~blank] if self.kind in ('character', 'text') else series[not_null]
+        if valid.empty:
+            return
+        self.count += len(valid)
+        if self.kind == 'numeric':
+            numbers = valid.to_numpy(dtype=np.float64)
+            self.moments.update(numbers)
+            self.digest.update(numbers)
+            # 含空值的数据块为 float 类型，统一按 float 计算哈希，使各块中相同的值哈希一致
+            self.distinct.update(pd.Series(numbers))
+        elif self.kind == 'date':
+            self._update_range(valid.min(), valid.max())
+            self.distinct.update(valid if pd.api.types.is_datetime64_any_dtype(valid.dtype) else valid.astype(str))
+        else:
+            if self.kind == 'character':
+                self.frequent.update(valid)
+            else:
+                self.lengths.update(valid.str.len().to_numpy())
+            self.distinct.update(valid.astype(str))
+        self._update_samples(valid)
+
+    def _update_range(self, low, high):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def _update_samples(self, valid):
+        keys = np.concatenate([self._sample_keys, self.rng.random(len(valid))])
+        keep = np.argsort(keys)[:self.sample_size]
+        offset = len(self._samples)
+        # 只转换本块中被选中的值
+        chosen = valid.iloc[[i - offset for i in keep if i >= offset]].tolist()
+        self._samples = [self._samples[i] if i < offset else chosen.pop(0) for i in keep]
+        self._sample_keys = keys[keep]
+
+    def result(self) -> dict:
+        null_rate = float(self.nulls / self.rows) if self.rows else 1.0
+        if not self.count:
+            return {"stats": dict(NO_VALUES), "null_rate": null_rate, "sample_data": []}
+        samples = list(self._samples)
+        if self.kind == 'numeric':
+            stats = {"mean": self.moments.mean, "min": self.moments.min, "max": self.moments.max,
+                     "std": self.moments.std,
+                     "quantiles": {name: self.digest.quantile(q) for name, q in QUANTILES.items()}}
+        elif self.kind == 'date':
+            stats = {"min_date": str(self.min), "max_date": str(self.max)}
+            samples = [str(value) for value in samples]
+        elif self.kind == 'character':
+            stats = {str(value): count / self.count for value, count in self.frequent.top(self.top_k)}
+        else:
+            stats = {"min_length": int(self.lengths.min), "max_length": int(self.lengths.max),
+                     "avg_length": self.lengths.mean}
+        # 不同取值个数不超过非空值个数
+        distinct_count = min(self.distinct.estimate(), self.count)
+        return {"stats": stats, "null_rate": null_rate, "sample_data": samples, "distinct_count": distinct_count}
+
+
+class TableProfiler:
+    """
+    单次扫描一张表，同时计算多列的统计信息。
+    逐块调用 update 传入查询结果的 DataFrame，最后由 result 返回 {列名: {stats, null_rate, sample_data, distinct_count}}。
+    """
+
+    def __init__(self, columns, sample_size=3, top_k=10, seed=None):
+        """
+        :param columns: [(列名, kind), ...]
+        :param sample_size: 每列保留的样本数
+        :param top_k: 字符列保留的高频值个数
+        """
+        rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.columns = {name: ColumnAccumulator(kind, sample_size, top_k, rng) for name, kind in columns}
+
+    def update(self, df: pd.DataFrame):
+        self.rows += len(df)
+        for name, accumulator in self.columns.items():
+            accumulator.update(df[name])
+
+    def result(self) -> dict:
+        return {name: accumulator.result() for name, accumulator in self.columns.items()}
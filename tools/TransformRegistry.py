@@ -0,0 +1,232 @@
+import ast
+import copy
+from collections import namedtuple
+
+import numpy as np
+
+# one(value): 转换单个父字段值；batch(values): 一次转换整个父字段数组
+Transform = namedtuple('Transform', ['one', 'batch'])
+
+# 表达式中允许的运算符；乘方不作为运算符开放，只能通过限制了指数的 pow 转换使用
+_ALLOWED_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare,
+    ast.IfExp, ast.Call, ast.Subscript, ast.Slice, ast.Tuple,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.USub, ast.UAdd, ast.Not,
+    ast.And, ast.Or, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+# 可以直接对 numpy 数组整体求值的运算符
+_VECTOR_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant, ast.BinOp, ast.UnaryOp,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.USub, ast.UAdd,
+)
+_VECTOR_OPS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.remainder,
+}
+_INT64 = np.iinfo(np.int64)
+# pow 的指数上限和字符串/序列重复后的长度上限，避免表达式产生极大的结果
+MAX_EXPONENT = 64
+MAX_REPEAT_LENGTH = 1000000
+
+
+class _NotVectorizable(Exception):
+    """批量求值的结果可能与逐值求值不同（整数溢出、除数为 0 等），改为逐值求值"""
+
+
+def _bounded_pow(base, exponent):
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"pow 的指数不能超过 {MAX_EXPONENT}: {exponent}")
+    return base ** exponent
+
+
+def _bounded_mul(left, right):
+    for sequence, count in ((left, right), (right, left)):
+        if isinstance(sequence, (str, bytes, list, tuple)) and isinstance(count, int) \
+                and len(sequence) * count > MAX_REPEAT_LENGTH:
+            raise ValueError(f"重复后的长度不能超过 {MAX_REPEAT_LENGTH}")
+    return left * right
+
+
+class _BoundMultiplication(ast.NodeTransformer):
+    """把逐值求值中的乘法替换为 _bounded_mul，限制 'x' * n 这类重复的长度"""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Mult):
+            return node
+        return ast.copy_location(ast.Call(ast.Name('_bounded_mul', ast.Load()), [node.left, node.right], []), node)
+
+
+def _vector_eval(node, variable, values):
+    """
+    对数值数组整体求值，语义与 Python 逐值求值一致：整数运算可能超出 int64、除数或模数含 0 时
+    抛出 _NotVectorizable，由调用方逐值求值（Python 整数不会溢出，除以 0 抛出 ZeroDivisionError）
+    """
+    if isinstance(node, ast.Expression):
+        return _vector_eval(node.body, variable, values)
+    if isinstance(node, ast.Name):
+        return values
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        operand = _vector_eval(node.operand, variable, values)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if np.asarray(operand).dtype.kind == 'i' and np.any(np.asarray(operand) == _INT64.min):
+            raise _NotVectorizable()
+        return np.negative(operand)
+
+    left = _vector_eval(node.left, variable, values)
+    right = _vector_eval(node.right, variable, values)
+    op = type(node.op)
+    if op in (ast.Div, ast.FloorDiv, ast.Mod) and np.any(np.asarray(right) == 0):
+        raise _NotVectorizable()
+    integer = np.asarray(left).dtype.kind == 'i' and np.asarray(right).dtype.kind == 'i'
+    if integer and op in (ast.Add, ast.Sub, ast.Mult):
+        # 用浮点数估计结果的大小，可能超出 int64 时放弃批量求值
+        estimate = _VECTOR_OPS[op](np.asarray(left, dtype=np.float64), np.asarray(right, dtype=np.float64))
+        if np.any(np.abs(estimate) >= 2.0 ** 62):
+            raise _NotVectorizable()
+    return _VECTOR_OPS[op](left, right)
+
+
+def _elementwise(func):
+    def batch(values):
+        return np.asarray([func(value) for value in np.asarray(values, dtype=object).tolist()], dtype=object)
+    return batch
+
+
+def _batch_int(values):
+    """int 的批量版本：结果能用 int64 精确表示时整体转换，否则（超出范围、NaN、字符串等）逐值调用 int"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'bi':
+        return values.astype(np.int64)
+    if values.dtype.kind == 'u' and (not len(values) or values.max() <= _INT64.max):
+        return values.astype(np.int64)
+    if values.dtype.kind == 'f' and np.all(np.abs(values) < 2.0 ** 63):
+        # 与 int 相同向 0 截断；NaN 和无穷比较结果为 False，逐值调用时抛出与 int 相同的异常
+        return values.astype(np.int64)
+    return _elementwise(int)(values)
+
+
+def _batch_abs(values):
+    """abs 的批量版本：int64 的最小值取绝对值会溢出，布尔和其它类型的结果类型不同，这些情况逐值调用 abs"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'uf' or (values.dtype.kind == 'i' and not np.any(values == np.iinfo(values.dtype).min)):
+        return np.abs(values)
+    return _elementwise(abs)(values)
+
+
+class TransformRegistry:
+    """
+    依赖字段转换函数的注册表。dependency.json 中 dependencies[列名].func 可以是：
+      - 已注册的转换名，如 "str"、"upper"；
+      - 受限表达式，用 x 表示父字段值，如 "x * 10 + 1"、"upper(x)[:4]"、"'C' + str(x)"；
+        兼容旧写法 "lambda v: ..."（只允许一个参数）。
+    表达式中只能使用字面量、算术/比较/条件运算、切片和已注册的转换，不能访问属性或其它内置函数。
+    每个 func 只解析编译一次，结果缓存；每个转换都有逐值版本和批量版本。
+    """
+
+    def __init__(self):
+        self._transforms = {}
+        self._compiled = {}
+
+    def register(self, name: str, one=None, batch=None):
+        """
+        注册转换，可作为装饰器使用：@registry.register("upper")
+        :param one: 逐值转换函数
+        :param batch: 批量转换函数，为空时逐个调用 one
+        """
+        if one is None:
+            def decorator(func):
+                self.register(name, func, batch)
+                return func
+            return decorator
+        self._transforms[name] = Transform(one, batch or _elementwise(one))
+        self._compiled.clear()
+        return self._transforms[name]
+
+    def names(self):
+        return sorted(self._transforms)
+
+    def compile(self, func: str) -> Transform:
+        """
+        编译 func（转换名或表达式），同一 func 只编译一次
+        :raises ValueError: 未注册的转换名或表达式不合法
+        """
+        func = func.strip()
+        transform = self._compiled.get(func)
+        if transform is None:
+            transform = self._transforms.get(func) or self._compile_expression(func)
+            self._compiled[func] = transform
+        return transform
+
+    def _compile_expression(self, source):
+        try:
+            tree = ast.parse(source, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"转换表达式语法错误: {source}") from e
+
+        variable = 'x'
+        if isinstance(tree.body, ast.Lambda):
+            args = tree.body.args
+            if len(args.args) != 1 or args.vararg or args.kwarg or args.kwonlyargs or args.defaults:
+                raise ValueError(f"转换函数只能有一个参数: {source}")
+            variable = args.args[0].arg
+            tree = ast.fix_missing_locations(ast.Expression(tree.body.body))
+
+        vectorizable = True
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise ValueError(f"转换表达式不支持 {type(node).__name__}: {source}")
+            if isinstance(node, ast.Name) and node.id != variable and node.id not in self._transforms:
+                raise ValueError(f"转换表达式中的未知名称 {node.id}: {source}")
+            if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords):
+                raise ValueError(f"转换表达式只能调用已注册的转换: {source}")
+            vectorizable = vectorizable and isinstance(node, _VECTOR_NODES)
+            if isinstance(node, ast.Constant):
+                # 只有 int64 范围内的整数和浮点数常量可以参与数组运算
+                vectorizable = vectorizable and (type(node.value) is float or (
+                    type(node.value) is int and _INT64.min <= node.value <= _INT64.max))
+
+        vector_tree = tree
+        tree = ast.fix_missing_locations(_BoundMultiplication().visit(copy.deepcopy(tree)))
+        code = compile(tree, f'<transform {source}>', 'eval')
+        namespace = {'__builtins__': {}, '_bounded_mul': _bounded_mul}
+        namespace.update({name: transform.one for name, transform in self._transforms.items()})
+
+        def one(value):
+            namespace[variable] = value
+            return eval(code, namespace)
+
+        elementwise = _elementwise(one)
+        if not vectorizable:
+            return Transform(one, elementwise)
+
+        def batch(values):
+            # 纯算术表达式对整数/浮点数数组整体求值，其它类型或可能与逐值求值结果不同时逐个求值
+            values = np.asarray(values)
+            if values.dtype.kind not in 'if':
+                return elementwise(values)
+            try:
+                with np.errstate(over='ignore'):
+                    return np.asarray(_vector_eval(vector_tree, variable, values))
+            except _NotVectorizable:
+                return elementwise(values)
+
+        return Transform(one, batch)
+
+
+# 默认注册表，内置常用转换
+registry = TransformRegistry()
+registry.register('identity', lambda value: value, lambda values: values)
+registry.register('str', str, _elementwise(str))
+registry.register('int', int, _batch_int)
+registry.register('float', float, lambda values: np.asarray(values).astype(np.float64))
+registry.register('upper', lambda value: str(value).upper())
+registry.register('lower', lambda value: str(value).lower())
+registry.register('strip', lambda value: str(value).strip())
+registry.register('len', len)
+registry.register('abs', abs, _batch_abs)
+registry.register('round', round)
+registry.register('pow', _bounded_pow)